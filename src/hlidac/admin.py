@@ -1,6 +1,49 @@
-from django.contrib import admin
+import io
 
-from hlidac.models import Rizeni
+from django.contrib import admin, messages
+from django.db.models import Q
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from hlidac import hledani
+from hlidac.fazety import fazety
+from hlidac.forms import ImportRizeniForm
+from hlidac.hromadny_import import nacist_radky, zaradit
+from hlidac.models import (
+    HromadnyImport,
+    Predmet,
+    Rizeni,
+    Soud,
+    Uloha,
+    zneplatnit_fazety,
+)
+from hlidac.spisova_znacka import SpisovaZnacka
+
+
+class FazetaFilter(admin.SimpleListFilter):
+    # hodnoty filtru se berou z cachovanych fazet misto SELECT DISTINCT nad
+    # celou tabulkou rizeni
+    def lookups(self, request, model_admin):
+        return [
+            (str(pk), f"{nazev} ({pocet})")
+            for pk, nazev, pocet in fazety()[self.parameter_name]
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{f"{self.parameter_name}_id": self.value()})
+        return queryset
+
+
+class SoudFilter(FazetaFilter):
+    title = "soud"
+    parameter_name = "soud"
+
+
+class PredmetFilter(FazetaFilter):
+    title = "předmět"
+    parameter_name = "predmet"
 
 
 class RizeniAdmin(admin.ModelAdmin):
@@ -9,10 +52,105 @@ class RizeniAdmin(admin.ModelAdmin):
         "predmet",
         "ukoncene",
         "zmena_ve_spisu",
-        "delka_rizeni",
+        "delka",
         "probehlo_odvolani",
     ]
-    list_filter = ["ukoncene", "predmet", "soud"]
+    list_filter = ["ukoncene", PredmetFilter, SoudFilter]
+    list_select_related = ["predmet"]
+    search_fields = ["spisova_znacka"]
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).s_delkou()
+
+    def get_search_results(self, request, queryset, search_term):
+        # cela spisova znacka se hleda v indexu slozek, ostatni vyrazy
+        # podle textu znacky a fulltextem v nazvech soudu a predmetu
+        if not search_term.strip():
+            return queryset, False
+        znacka = SpisovaZnacka.parse_or_none(search_term)
+        if znacka:
+            return queryset.podle_znacky(znacka), False
+        return (
+            queryset.filter(
+                Q(spisova_znacka__icontains=search_term.strip())
+                | hledani.filtr(search_term)
+            ),
+            False,
+        )
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        zneplatnit_fazety()
+
+    @admin.display(description="Délka řízení", ordering="delka")
+    def delka(self, obj):
+        return obj.delka
+
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="hlidac_rizeni_import",
+            ),
+            path(
+                "import/<int:pk>/",
+                self.admin_site.admin_view(self.import_prubeh_view),
+                name="hlidac_rizeni_import_prubeh",
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        # rizeni se stahuji ve workeru zpracovat_ulohy, request je jen zaradi
+        if not self.has_add_permission(request):
+            return redirect("admin:hlidac_rizeni_changelist")
+        if request.method == "POST":
+            form = ImportRizeniForm(request.POST, request.FILES)
+            if form.is_valid():
+                soubor = form.cleaned_data["soubor"]
+                hromadny_import = zaradit(
+                    nacist_radky(io.TextIOWrapper(soubor, "utf-8-sig")),
+                    soubor=soubor.name,
+                )
+                messages.success(
+                    request,
+                    f"Ke stažení zařazeno {hromadny_import.ulohy.count()} řízení",
+                )
+                return redirect(
+                    "admin:hlidac_rizeni_import_prubeh", pk=hromadny_import.pk
+                )
+        else:
+            form = ImportRizeniForm()
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import řízení",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/hlidac/rizeni/import.html", context)
+
+    def import_prubeh_view(self, request, pk):
+        if not self.has_add_permission(request):
+            return redirect("admin:hlidac_rizeni_changelist")
+        hromadny_import = get_object_or_404(HromadnyImport, pk=pk)
+        pocty = hromadny_import.pocty()
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": f"Import řízení: {hromadny_import}",
+            "hromadny_import": hromadny_import,
+            "pocty": [
+                (nazev, pocty[stav]) for stav, nazev in Uloha.STAVY if stav in pocty
+            ],
+            "dokonceno": not (pocty.keys() & {Uloha.CEKA, Uloha.BEZI}),
+            "chyby": hromadny_import.ulohy.filter(stav=Uloha.CHYBA).order_by("pk"),
+        }
+        return TemplateResponse(
+            request, "admin/hlidac/rizeni/import_prubeh.html", context
+        )
 
 
 admin.site.register(Rizeni, RizeniAdmin)
+admin.site.register(Soud)
+admin.site.register(Predmet)
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def nastavit_sqlite(sender, connection, **kwargs):
+    # ve WAL rezimu muze worker zapisovat, zatimco ostatni ctou
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
 
 
 class HlidacConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "hlidac"
+
+    def ready(self):
+        connection_created.connect(nastavit_sqlite)
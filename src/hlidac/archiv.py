@@ -0,0 +1,248 @@
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from hlidac import metriky, parser
+from hlidac.fetcher import AsyncFetcher, get_default_fetcher
+from hlidac.models import BATCH_SIZE, SlovnikKomprese, Snimek, StazenaStranka
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+KODEK_ZSTD = "zstd"
+KODEK_ZLIB = "zlib"
+# zstandard je volitelna zavislost, bez ni se komprimuje zlibem, ktery take
+# umi sdileny slovnik, jen mensi a bez trenovani
+VYCHOZI_KODEK = KODEK_ZSTD if zstandard else KODEK_ZLIB
+
+ZSTD_LEVEL = 10
+ZLIB_LEVEL = 9
+VELIKOST_SLOVNIKU = {KODEK_ZSTD: 112640, KODEK_ZLIB: 32768}
+
+
+class ChybaTrenovani(Exception):
+    pass
+
+
+# pripravene zstd slovniky podle pk SlovnikKomprese; drzi se jen nekolik
+# naposledy pouzitych verzi
+_zstd_slovniky: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+MAX_ZSTD_SLOVNIKU = 4
+
+
+def aktualni_slovnik() -> Optional[SlovnikKomprese]:
+    return SlovnikKomprese.objects.filter(kodek=VYCHOZI_KODEK).order_by("-pk").first()
+
+
+def komprimovat(
+    data: bytes, kodek: str, slovnik: Optional[bytes] = None, slovnik_id=None
+) -> bytes:
+    if kodek == KODEK_ZSTD:
+        _zkontrolovat_zstandard()
+        compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=_zstd_slovnik(slovnik, slovnik_id)
+        )
+        return compressor.compress(data)
+    if kodek == KODEK_ZLIB:
+        if slovnik:
+            compressor = zlib.compressobj(ZLIB_LEVEL, zdict=slovnik)
+        else:
+            compressor = zlib.compressobj(ZLIB_LEVEL)
+        return compressor.compress(data) + compressor.flush()
+    raise ValueError(f"Neznámý kodek {kodek}")
+
+
+def dekomprimovat(
+    data: bytes, kodek: str, slovnik: Optional[bytes] = None, slovnik_id=None
+) -> bytes:
+    if kodek == KODEK_ZSTD:
+        _zkontrolovat_zstandard()
+        return zstandard.ZstdDecompressor(
+            dict_data=_zstd_slovnik(slovnik, slovnik_id)
+        ).decompress(data)
+    if kodek == KODEK_ZLIB:
+        if slovnik:
+            decompressor = zlib.decompressobj(zdict=slovnik)
+        else:
+            decompressor = zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+    raise ValueError(f"Neznámý kodek {kodek}")
+
+
+def _zkontrolovat_zstandard():
+    if zstandard is None:
+        raise RuntimeError("Pro kodek zstd je potřeba nainstalovat balíček zstandard")
+
+
+def _zstd_slovnik(slovnik: Optional[bytes], slovnik_id: Optional[int]):
+    # priprava slovniku je draha, kompresory se ale mezi vlakny sdilet nesmi;
+    # neulozeny slovnik (pri trenovani) se necachuje
+    if not slovnik:
+        return None
+    if slovnik_id is None:
+        return zstandard.ZstdCompressionDict(slovnik)
+    pripraveny = _zstd_slovniky.get(slovnik_id)
+    if pripraveny is None:
+        if len(_zstd_slovniky) >= MAX_ZSTD_SLOVNIKU:
+            _zstd_slovniky.pop(next(iter(_zstd_slovniky)), None)
+        pripraveny = zstandard.ZstdCompressionDict(slovnik)
+        _zstd_slovniky[slovnik_id] = pripraveny
+    return pripraveny
+
+
+def vytvorit_snimek(
+    html: str, slovnik: Optional[SlovnikKomprese] = None, hash_obsahu=None
+) -> Snimek:
+    # nesaha do databaze, muze bezet ve vlakne stahovani
+    data = html.encode("utf-8")
+    kodek = slovnik.kodek if slovnik else VYCHOZI_KODEK
+    return Snimek(
+        hash=hash_obsahu or parser.content_hash(html),
+        kodek=kodek,
+        slovnik=slovnik,
+        data=komprimovat(
+            data,
+            kodek,
+            bytes(slovnik.data) if slovnik else None,
+            slovnik.pk if slovnik else None,
+        ),
+        velikost=len(data),
+    )
+
+
+@metriky.mereno("ulozit_snimky")
+def ulozit_snimky(snimky: Iterable[Snimek]):
+    Snimek.objects.bulk_create(snimky, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+class Archivace:
+    # stranky stazene mimo refresh_all (prochazeni, import, fronta uloh)
+    # a stranky zahajeni rizeni; pridat nesaha do databaze a muze bezet ve
+    # vlaknech stahovani, snimky a StazenaStranka se zapisou az v ulozit
+    def __init__(self, slovnik: Optional[SlovnikKomprese] = None):
+        self.slovnik = slovnik
+        self._stranky: Dict[str, Tuple[StazenaStranka, Snimek]] = {}
+        self._lock = threading.Lock()
+
+    def fetcher(self, fetcher=None):
+        # obali Fetcher nebo AsyncFetcher, stranky stazene pres get se archivuji
+        if isinstance(fetcher, AsyncFetcher):
+            return _ArchivujiciAsyncFetcher(fetcher, self)
+        return _ArchivujiciFetcher(fetcher or get_default_fetcher(), self)
+
+    def pridat(self, url, response):
+        if response.status_code != 200:
+            return
+        hash_obsahu = parser.content_hash(response.text)
+        stranka = StazenaStranka(
+            url=url,
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+            hash_obsahu=hash_obsahu,
+            stazeno=timezone.now(),
+            snimek_id=hash_obsahu,
+        )
+        snimek = vytvorit_snimek(response.text, self.slovnik, hash_obsahu)
+        with self._lock:
+            self._stranky[url] = (stranka, snimek)
+
+    @transaction.atomic
+    def ulozit(self):
+        with self._lock:
+            stranky, self._stranky = self._stranky, {}
+        if not stranky:
+            return
+        ulozit_snimky([snimek for _, snimek in stranky.values()])
+        existujici = StazenaStranka.objects.in_bulk(list(stranky), field_name="url")
+        for url, (stranka, _) in stranky.items():
+            if url in existujici:
+                stranka.pk = existujici[url].pk
+        StazenaStranka.objects.bulk_create(
+            [stranka for stranka, _ in stranky.values() if stranka.pk is None],
+            batch_size=BATCH_SIZE,
+        )
+        StazenaStranka.objects.bulk_update(
+            [stranka for stranka, _ in stranky.values() if stranka.pk is not None],
+            ["etag", "last_modified", "hash_obsahu", "stazeno", "snimek"],
+            batch_size=BATCH_SIZE,
+        )
+
+
+class _ArchivujiciFetcher:
+    def __init__(self, fetcher, archivace: Archivace):
+        self.fetcher = fetcher
+        self.archivace = archivace
+
+    def get(self, url, **kwargs):
+        response = self.fetcher.get(url, **kwargs)
+        self.archivace.pridat(url, response)
+        return response
+
+
+class _ArchivujiciAsyncFetcher(_ArchivujiciFetcher):
+    async def get(self, url, **kwargs):
+        response = await self.fetcher.get(url, **kwargs)
+        self.archivace.pridat(url, response)
+        return response
+
+
+def obsah(snimek: Snimek) -> str:
+    slovnik = bytes(snimek.slovnik.data) if snimek.slovnik_id else None
+    return dekomprimovat(
+        bytes(snimek.data), snimek.kodek, slovnik, snimek.slovnik_id
+    ).decode("utf-8")
+
+
+def trenovat_slovnik(
+    vzorky: List[bytes], kodek=VYCHOZI_KODEK, velikost=None
+) -> SlovnikKomprese:
+    velikost = velikost or VELIKOST_SLOVNIKU[kodek]
+    if kodek == KODEK_ZSTD:
+        _zkontrolovat_zstandard()
+        try:
+            data = zstandard.train_dictionary(velikost, vzorky).as_bytes()
+        except zstandard.ZstdError as e:
+            raise ChybaTrenovani(f"Slovník se nepodařilo natrénovat: {e}")
+    elif kodek == KODEK_ZLIB:
+        data = _zlib_slovnik(vzorky, velikost)
+    else:
+        raise ValueError(f"Neznámý kodek {kodek}")
+    if not data:
+        raise ChybaTrenovani("Vzorky nemají žádný společný obsah")
+    return SlovnikKomprese(kodek=kodek, data=data)
+
+
+def _zlib_slovnik(vzorky: List[bytes], velikost: int) -> bytes:
+    # zlib slovnik je jen text, ze ktereho se odkazuje na shodne useky;
+    # pouziji se radky spolecne aspon polovine vzorku, nejcastejsi na konec,
+    # kam vidi zlib nejlepe
+    cetnosti = Counter()
+    for vzorek in vzorky:
+        cetnosti.update(set(vzorek.splitlines(keepends=True)))
+    radky = [
+        radek
+        for radek, cetnost in sorted(cetnosti.items(), key=lambda x: (x[1], x[0]))
+        if cetnost * 2 >= len(vzorky) and radek.strip()
+    ]
+    return b"".join(radky)[-min(velikost, VELIKOST_SLOVNIKU[KODEK_ZLIB]) :]
+
+
+# preparsovani archivu bezi v samostatnych procesech, slovniky se do nich
+# predaji jednou pri startu a snimky jen jako surova data
+_slovniky_procesu: Dict[int, bytes] = {}
+
+
+def pripravit_proces(slovniky: Dict[int, bytes]):
+    _slovniky_procesu.update(slovniky)
+
+
+def preparsovat(polozka: Tuple[str, str, Optional[int], bytes]):
+    url, kodek, slovnik_id, data = polozka
+    html = dekomprimovat(data, kodek, _slovniky_procesu.get(slovnik_id), slovnik_id)
+    return url, parser.parse_rizeni(html.decode("utf-8"))
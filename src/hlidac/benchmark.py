@@ -0,0 +1,172 @@
+import copy
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Sequence
+
+import lxml.html
+
+from hlidac import parser
+
+testdata_dir = Path(__file__).parent / "testdata"
+
+RIZENI_FIXTURES = [
+    "62-Nc-2528-2019.html",
+    "62-Nc-2503-2019.html",
+    "12-P-A-NC-105.html",
+]
+PREDMET_FIXTURES = ["62-Nc-2528-2019-ZAHAJ_RIZ.html"]
+SYNTHETIC_TEMPLATE = "62-Nc-2503-2019.html"
+
+STAGE_RIZENI = "parse_rizeni"
+STAGE_UDALOST = "parse_udalost"
+STAGE_PREDMET = "parse_predmet_rizeni"
+
+PRUBEH_XPATH = (
+    "//td[contains(concat(' ', normalize-space(@class), ' '), ' body ')]"
+    "/table/tr/td/table/*[7][self::tr]/td/table"
+)
+
+
+@dataclass
+class BenchmarkResult:
+    stage: str
+    page: str
+    backend: str
+    calls: int
+    seconds: float
+    peak_memory: int
+
+    @property
+    def per_second(self):
+        return self.calls / self.seconds if self.seconds else 0.0
+
+    @property
+    def mean_ms(self):
+        return self.seconds / self.calls * 1000 if self.calls else 0.0
+
+    @property
+    def key(self):
+        return f"{self.stage}:{self.page}:{self.backend}"
+
+    def to_dict(self):
+        return {
+            **asdict(self),
+            "per_second": self.per_second,
+            "mean_ms": self.mean_ms,
+        }
+
+
+def synthetic_page(udalosti: int) -> str:
+    doc = lxml.html.fromstring((testdata_dir / SYNTHETIC_TEMPLATE).read_text())
+    prubeh = doc.xpath(PRUBEH_XPATH)[0]
+    rows = prubeh.findall("tr")[1:]
+    for i in range(udalosti - len(rows)):
+        prubeh.append(copy.deepcopy(rows[i % len(rows)]))
+    return lxml.html.tostring(doc, encoding=str)
+
+
+def udalost_rows(html) -> list:
+    return lxml.html.fromstring(html).xpath(PRUBEH_XPATH)[0].findall("tr")[1:]
+
+
+def measure(
+    stage, page, backend, func: Callable, args: Sequence, repeat
+) -> BenchmarkResult:
+    func(*args)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(stage, page, backend, repeat, seconds, peak_memory)
+
+
+def _parse_udalosti(rows, backend):
+    for row in rows:
+        parser.parse_udalost(row, backend=backend)
+
+
+def run_benchmark(
+    backends: Iterable[str] = parser.BACKENDS,
+    repeat=20,
+    synthetic_sizes: Iterable[int] = (100, 500),
+) -> List[BenchmarkResult]:
+    pages = {name: (testdata_dir / name).read_text() for name in RIZENI_FIXTURES}
+    for size in synthetic_sizes:
+        pages[f"synteticka-{size}"] = synthetic_page(size)
+    predmet_pages = {
+        name: (testdata_dir / name).read_text() for name in PREDMET_FIXTURES
+    }
+
+    results = []
+    for backend in backends:
+        for name, html in pages.items():
+            results.append(
+                measure(
+                    STAGE_RIZENI,
+                    name,
+                    backend,
+                    parser.parse_rizeni,
+                    (html, backend),
+                    repeat,
+                )
+            )
+            # pocet volani parse_udalost je pocet radku krat pocet opakovani
+            result = measure(
+                STAGE_UDALOST,
+                name,
+                backend,
+                _parse_udalosti,
+                (udalost_rows(html), backend),
+                repeat,
+            )
+            result.calls *= len(udalost_rows(html))
+            results.append(result)
+        for name, html in predmet_pages.items():
+            results.append(
+                measure(
+                    STAGE_PREDMET,
+                    name,
+                    backend,
+                    parser.parse_predmet_rizeni,
+                    (html, backend),
+                    repeat,
+                )
+            )
+    return results
+
+
+def to_json(results: List[BenchmarkResult]) -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [result.to_dict() for result in results],
+    }
+
+
+def compare(
+    results: List[BenchmarkResult], baseline: dict, tolerance=0.1
+) -> Dict[str, float]:
+    # vraci pomer zpomaleni vysledku, ktere jsou horsi nez baseline o vic nez tolerance
+    previous = {
+        f"{r['stage']}:{r['page']}:{r['backend']}": r["mean_ms"]
+        for r in baseline["results"]
+    }
+    regressions = {}
+    for result in results:
+        if result.key in previous and previous[result.key]:
+            ratio = result.mean_ms / previous[result.key]
+            if ratio > 1 + tolerance:
+                regressions[result.key] = ratio
+    return regressions
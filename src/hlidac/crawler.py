@@ -0,0 +1,88 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from hlidac import parser
+from hlidac.fetcher import Fetcher
+from hlidac.refresh import fetch_rizeni
+
+KLIC_PARAMETRY = ("org", "cisloSenatu", "druhVec", "bcVec", "rocnik")
+
+
+def klic_rizeni(url) -> str:
+    # stejne rizeni muze byt dostupne pres search.do i list.do, proto se
+    # navstivena rizeni rozlisuji podle soudu a slozek spisove znacky
+    query = parse_qs(urlsplit(url).query)
+    if all(name in query for name in KLIC_PARAMETRY):
+        return "/".join(query[name][0].upper() for name in KLIC_PARAMETRY)
+    return url
+
+
+@dataclass
+class CrawlState:
+    fronta: List[Tuple[str, int]] = field(default_factory=list)
+    navstivene: Set[str] = field(default_factory=set)
+
+    def pridat(self, url, hloubka):
+        klic = klic_rizeni(url)
+        if klic not in self.navstivene:
+            self.navstivene.add(klic)
+            self.fronta.append((url, hloubka))
+
+    def save(self, path):
+        Path(path).write_text(
+            json.dumps({"fronta": self.fronta, "navstivene": sorted(self.navstivene)})
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = json.loads(Path(path).read_text())
+        return cls(
+            fronta=[(url, hloubka) for url, hloubka in data["fronta"]],
+            navstivene=set(data["navstivene"]),
+        )
+
+
+@dataclass
+class CrawlResult:
+    url: str
+    hloubka: int
+    rizeni: Optional[parser.Rizeni] = None
+    error: Optional[Exception] = None
+
+
+def crawl(
+    state: CrawlState,
+    fetcher: Fetcher,
+    max_depth=3,
+    max_workers=8,
+) -> Iterator[List[CrawlResult]]:
+    # prochazi strom dilcich rizeni po vrstvach, kazda vrstva se stahuje
+    # soubezne a po jejim zpracovani volajicim je stav mozne ulozit a pozdeji
+    # v prochazeni pokracovat
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while state.fronta:
+            vrstva = state.fronta
+            state.fronta = []
+            futures = [
+                (url, hloubka, executor.submit(fetch_rizeni, url, fetcher))
+                for url, hloubka in vrstva
+            ]
+            results = []
+            for url, hloubka, future in futures:
+                try:
+                    rizeni = future.result()
+                except Exception as e:
+                    # chybna stranka (i chyba parseru) neprerusi vrstvu, stav
+                    # prochazeni se po ni da ulozit
+                    results.append(CrawlResult(url, hloubka, error=e))
+                    continue
+                results.append(CrawlResult(url, hloubka, rizeni=rizeni))
+                if hloubka < max_depth:
+                    for dilci in rizeni.dilci_rizeni:
+                        if dilci.url:
+                            state.pridat(dilci.absolute_url, hloubka + 1)
+            yield results
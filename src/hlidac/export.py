@@ -0,0 +1,227 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple
+
+from django.db.models import Q
+
+from hlidac.models import Rizeni, Udalost
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# radky se ctou z databaze po davkach pres QuerySet.iterator a kazda davka
+# se hned zapise, pamet tak nezavisi na poctu exportovanych radku; v Parquetu
+# je davka jedna skupina radku
+CHUNK_SIZE = 5000
+
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+TYPY_OBSAHU = {
+    FORMAT_CSV: "text/csv; charset=utf-8",
+    FORMAT_JSONL: "application/x-ndjson; charset=utf-8",
+    FORMAT_PARQUET: "application/vnd.apache.parquet",
+}
+
+
+class Sloupec(NamedTuple):
+    nazev: str
+    pole: str
+    typ: str
+
+
+class Dataset(NamedTuple):
+    model: type
+    sloupce: List[Sloupec]
+    # cesta od modelu k rizeni pro filtr seznamu rizeni
+    rizeni: str
+
+
+DATASETY = {
+    "rizeni": Dataset(
+        Rizeni,
+        [
+            Sloupec("id", "id", "int"),
+            Sloupec("spisova_znacka", "spisova_znacka", "str"),
+            Sloupec("senat", "senat", "int"),
+            Sloupec("rejstrik", "rejstrik", "str"),
+            Sloupec("cislo", "cislo", "int"),
+            Sloupec("rocnik", "rocnik", "int"),
+            Sloupec("soud", "soud__nazev", "str"),
+            Sloupec("predmet", "predmet__nazev", "str"),
+            Sloupec("url", "url", "str"),
+            Sloupec("stav", "stav", "str"),
+            Sloupec("ukoncene", "ukoncene", "bool"),
+            Sloupec("probehlo_odvolani", "probehlo_odvolani", "bool"),
+            Sloupec("datum_zahajeni", "datum_zahajeni", "date"),
+            Sloupec("datum_skonceni", "datum_skonceni", "date"),
+            Sloupec("zmena_ve_spisu", "zmena_ve_spisu", "datetime"),
+            Sloupec("delka_rizeni", "delka", "dny"),
+        ],
+        rizeni="",
+    ),
+    "udalosti": Dataset(
+        Udalost,
+        [
+            Sloupec("id", "id", "int"),
+            Sloupec("rizeni_id", "rizeni_id", "int"),
+            Sloupec("spisova_znacka", "rizeni__spisova_znacka", "str"),
+            Sloupec("soud", "rizeni__soud__nazev", "str"),
+            Sloupec("druh", "druh", "str"),
+            Sloupec("poradi", "poradi", "int"),
+            Sloupec("nazev", "nazev", "str"),
+            Sloupec("datum", "datum", "date"),
+            Sloupec("url", "url", "str"),
+        ],
+        rizeni="rizeni__",
+    ),
+}
+
+
+def radky(dataset: str, filtr: Q = Q(), chunk_size=CHUNK_SIZE) -> Iterator[tuple]:
+    model, sloupce, cesta = DATASETY[dataset]
+    queryset = model.objects.all()
+    if filtr and model is Rizeni:
+        queryset = queryset.filter(filtr)
+    elif filtr:
+        queryset = queryset.filter(
+            **{f"{cesta}pk__in": Rizeni.objects.filter(filtr).values("pk")}
+        )
+    if model is Rizeni:
+        queryset = queryset.s_delkou()
+    dny = [i for i, sloupec in enumerate(sloupce) if sloupec.typ == "dny"]
+    for radek in (
+        queryset.order_by("pk")
+        .values_list(*(sloupec.pole for sloupec in sloupce))
+        .iterator(chunk_size=chunk_size)
+    ):
+        if dny:
+            radek = list(radek)
+            for i in dny:
+                radek[i] = radek[i].days if radek[i] is not None else None
+        yield tuple(radek)
+
+
+def exportovat(
+    dataset: str, format: str, filtr: Q = Q(), chunk_size=CHUNK_SIZE
+) -> Iterator[bytes]:
+    # vraci casti souboru pro StreamingHttpResponse nebo zapis do souboru
+    sloupce = DATASETY[dataset].sloupce
+    davky = _davky(radky(dataset, filtr, chunk_size), chunk_size)
+    if format == FORMAT_CSV:
+        return _csv(sloupce, davky)
+    if format == FORMAT_JSONL:
+        return _jsonl(sloupce, davky)
+    if format == FORMAT_PARQUET:
+        _zkontrolovat_pyarrow()
+        return _parquet(sloupce, davky)
+    raise ValueError(f"Neznámý formát {format}")
+
+
+def _davky(radky: Iterable[tuple], velikost: int) -> Iterator[List[tuple]]:
+    radky = iter(radky)
+    while True:
+        davka = list(islice(radky, velikost))
+        if not davka:
+            return
+        yield davka
+
+
+def _csv(sloupce, davky) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(sloupec.nazev for sloupec in sloupce)
+    yield buffer.getvalue().encode()
+    for davka in davky:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            ["" if hodnota is None else _text(hodnota) for hodnota in radek]
+            for radek in davka
+        )
+        yield buffer.getvalue().encode()
+
+
+def _jsonl(sloupce, davky) -> Iterator[bytes]:
+    nazvy = [sloupec.nazev for sloupec in sloupce]
+    for davka in davky:
+        yield "".join(
+            json.dumps(dict(zip(nazvy, radek)), ensure_ascii=False, default=_text)
+            + "\n"
+            for radek in davka
+        ).encode()
+
+
+def _text(hodnota):
+    if isinstance(hodnota, (date, datetime)):
+        return hodnota.isoformat()
+    return hodnota
+
+
+class _Odtok(io.RawIOBase):
+    # Parquet se zapisuje do proudu, zapsane casti se po kazde skupine radku
+    # vyzvednou a zahodi; pozice musi dal rust, paticka souboru obsahuje
+    # offsety skupin
+    def __init__(self):
+        super().__init__()
+        self.casti = []
+        self.pozice = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.casti.append(bytes(data))
+        self.pozice += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.pozice
+
+    def vyzvednout(self) -> bytes:
+        data = b"".join(self.casti)
+        self.casti.clear()
+        return data
+
+
+def _parquet(sloupce, davky) -> Iterator[bytes]:
+    typy = {
+        "int": pyarrow.int64(),
+        "str": pyarrow.string(),
+        "bool": pyarrow.bool_(),
+        "date": pyarrow.date32(),
+        "datetime": pyarrow.timestamp("us", tz="UTC"),
+        "dny": pyarrow.int32(),
+    }
+    schema = pyarrow.schema(
+        [pyarrow.field(sloupec.nazev, typy[sloupec.typ]) for sloupec in sloupce]
+    )
+    odtok = _Odtok()
+    writer = pyarrow.parquet.ParquetWriter(odtok, schema)
+    try:
+        for davka in davky:
+            hodnoty = list(zip(*davka))
+            writer.write_table(
+                pyarrow.Table.from_arrays(
+                    [
+                        pyarrow.array(sloupec, type=pole.type)
+                        for sloupec, pole in zip(hodnoty, schema)
+                    ],
+                    schema=schema,
+                )
+            )
+            yield odtok.vyzvednout()
+    finally:
+        writer.close()
+    yield odtok.vyzvednout()
+
+
+def _zkontrolovat_pyarrow():
+    if pyarrow is None:
+        raise RuntimeError("Pro formát Parquet je potřeba nainstalovat balíček pyarrow")
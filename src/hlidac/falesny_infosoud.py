@@ -0,0 +1,197 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from hlidac import parser
+from hlidac.spisova_znacka import NeplatnaSpisovaZnackaError, SpisovaZnacka
+
+testdata_dir = Path(__file__).parent / "testdata"
+
+# stranky se generuji ze vzoru v testdata, ve kterych se nahradi spisova
+# znacka, kod soudu a cas posledni zmeny
+VZOR_RIZENI = "62-Nc-2528-2019.html"
+VZOR_ZAHAJENI = "62-Nc-2528-2019-ZAHAJ_RIZ.html"
+VZOR_NEEXISTUJE = "neexistuje.html"
+VZOR_ZNACKA = SpisovaZnacka(62, "NC", 2528, 2019)
+VZOR_ORG = "OSPHA09"
+VZOR_ZMENA = datetime(2019, 8, 8, 16, 46, 30)
+
+# parametry odkazu v systemu InfoSoud a odpovidajici casti spisove znacky
+PARAMETRY_ZNACKY = {
+    "cisloSenatu": "senat",
+    "druhVec": "rejstrik",
+    "bcVec": "cislo",
+    "rocnik": "rocnik",
+}
+PARAMETR_RE = re.compile(
+    r"\b(?P<nazev>cisloSenatu|druhVec|bcVec|rocnik)(?P<pripona>Label|Id)?="
+    r"(?P<hodnota>[^&\"]*)"
+)
+
+
+@dataclass
+class Nastaveni:
+    # latence v sekundach, podily odpovedi jsou pravdepodobnosti 0 az 1
+    latence: float = 0.0
+    rozptyl: float = 0.0
+    chybovost: float = 0.0
+    omezeni: float = 0.0
+    zmeny: float = 0.0
+    seed: Optional[int] = None
+
+
+@lru_cache(maxsize=None)
+def _vzor(nazev: str) -> str:
+    return (testdata_dir / nazev).read_text()
+
+
+def stranka_rizeni(znacka: SpisovaZnacka, org: str, verze=0) -> str:
+    html = _nahradit_znacku(_vzor(VZOR_RIZENI), znacka, org)
+    return html.replace(
+        VZOR_ZMENA.strftime(parser.DATETIME_FORMAT),
+        (VZOR_ZMENA + timedelta(minutes=verze)).strftime(parser.DATETIME_FORMAT),
+    )
+
+
+def stranka_zahajeni(znacka: SpisovaZnacka, org: str) -> str:
+    return _nahradit_znacku(_vzor(VZOR_ZAHAJENI), znacka, org)
+
+
+def _nahradit_znacku(html: str, znacka: SpisovaZnacka, org: str) -> str:
+    def nahradit(match):
+        # odkazy na dilci rizeni maji jine hodnoty nez vzor, ty zustanou
+        cast = PARAMETRY_ZNACKY[match["nazev"]]
+        if match["hodnota"] != str(getattr(VZOR_ZNACKA, cast)):
+            return match[0]
+        return f"{match['nazev']}{match['pripona'] or ''}={getattr(znacka, cast)}"
+
+    html = PARAMETR_RE.sub(nahradit, html)
+    html = html.replace(str(VZOR_ZNACKA), str(znacka))
+    vzor_id = f"{VZOR_ORG}{VZOR_ZNACKA.rejstrik}{VZOR_ZNACKA.rocnik}"
+    vzor_id += f"{VZOR_ZNACKA.senat}{VZOR_ZNACKA.cislo}"
+    html = html.replace(
+        vzor_id, f"{org}{znacka.rejstrik}{znacka.rocnik}{znacka.senat}{znacka.cislo}"
+    )
+    return html.replace(VZOR_ORG, org)
+
+
+class FalesnyInfoSoud(ThreadingHTTPServer):
+    # nahrada systemu InfoSoud pro zatezove a integracni testy, rizeni
+    # s cislem 0 neexistuje, ostatni existuji vsechna
+    daemon_threads = True
+
+    def __init__(self, adresa=("127.0.0.1", 0), nastaveni: Optional[Nastaveni] = None):
+        super().__init__(adresa, _Handler)
+        self.nastaveni = nastaveni or Nastaveni()
+        self.pocitadla = Counter()
+        self._random = random.Random(self.nastaveni.seed)
+        self._verze: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._vlakno = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def nahodne(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def zapocitat(self, status: int):
+        with self._lock:
+            self.pocitadla[status] += 1
+
+    def verze(self, klic: tuple) -> int:
+        # stranka se s pravdepodobnosti zmeny pri kazdem stazeni zmeni
+        zmenit = self.nahodne() < self.nastaveni.zmeny
+        with self._lock:
+            verze = self._verze.get(klic, 0) + zmenit
+            self._verze[klic] = verze
+            return verze
+
+    def start(self) -> "FalesnyInfoSoud":
+        self._vlakno = threading.Thread(target=self.serve_forever, daemon=True)
+        self._vlakno.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._vlakno:
+            self._vlakno.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FalesnyInfoSoud
+
+    def do_GET(self):
+        nastaveni = self.server.nastaveni
+        latence = nastaveni.latence + nastaveni.rozptyl * self.server.nahodne()
+        if latence:
+            time.sleep(latence)
+        nahoda = self.server.nahodne()
+        if nahoda < nastaveni.omezeni:
+            self.odpovedet(429, "Too Many Requests", {"Retry-After": "1"})
+        elif nahoda < nastaveni.omezeni + nastaveni.chybovost:
+            self.odpovedet(500, "Internal Server Error")
+        else:
+            self.odpovedet_strankou()
+
+    def odpovedet_strankou(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        try:
+            znacka = SpisovaZnacka.from_url(self.path)
+            org = query["org"][0]
+        except (NeplatnaSpisovaZnackaError, KeyError):
+            self.odpovedet(404, "Not Found")
+            return
+        if znacka.cislo == 0:
+            html = _vzor(VZOR_NEEXISTUJE)
+        elif url.path.endswith("/search.do"):
+            html = stranka_rizeni(znacka, org, self.server.verze((znacka, org)))
+        elif url.path.endswith("/list.do") and query.get("druhUdalosti") == [
+            parser.DRUH_ZAHAJENI
+        ]:
+            html = stranka_zahajeni(znacka, org)
+        else:
+            self.odpovedet(404, "Not Found")
+            return
+
+        etag = f'"{hashlib.sha1(html.encode()).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.odpovedet(304, "")
+        else:
+            self.odpovedet(200, html, {"ETag": etag})
+
+    def odpovedet(self, status, text, headers=None):
+        self.server.zapocitat(status)
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for nazev, hodnota in (headers or {}).items():
+            self.send_header(nazev, hodnota)
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
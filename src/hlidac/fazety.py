@@ -0,0 +1,29 @@
+from typing import Dict, List
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from hlidac.models import FAZETY_CACHE_KEY, Predmet, Soud
+
+# zapisy rizeni cache mazou, timeout jen omezuje zastarani v jinych procesech,
+# pokud neni nastavena sdilena cache
+FAZETY_TIMEOUT = 600
+
+
+def fazety() -> Dict[str, List]:
+    # pocty rizeni podle soudu a predmetu pro filtry, pocitaji se nad
+    # ciselniky a indexy cizich klicu a drzi se v cache do dalsiho zapisu
+    vysledek = cache.get(FAZETY_CACHE_KEY)
+    if vysledek is None:
+        vysledek = {"soud": _pocty(Soud), "predmet": _pocty(Predmet)}
+        cache.set(FAZETY_CACHE_KEY, vysledek, FAZETY_TIMEOUT)
+    return vysledek
+
+
+def _pocty(model) -> List[tuple]:
+    return list(
+        model.objects.annotate(pocet=Count("rizeni"))
+        .filter(pocet__gt=0)
+        .order_by("nazev")
+        .values_list("pk", "nazev", "pocet")
+    )
@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from hlidac import metriky
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_TIMEOUT = (5, 30)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HostRateLimiter:
+    def __init__(self, requests_per_second: float):
+        self.interval = 1 / requests_per_second if requests_per_second else 0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        cekani = self._reserve(url)
+        if cekani > 0:
+            time.sleep(cekani)
+
+    async def wait_async(self, url):
+        cekani = self._reserve(url)
+        if cekani > 0:
+            await asyncio.sleep(cekani)
+
+    def _reserve(self, url) -> float:
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        return slot - now
+
+
+class Fetcher:
+    def __init__(
+        self,
+        timeout=DEFAULT_TIMEOUT,
+        retries=3,
+        backoff_factor=0.5,
+        pool_maxsize=10,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ):
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        adapter = HTTPAdapter(
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=("GET",),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, **kwargs) -> requests.Response:
+        return self._request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs) -> requests.Response:
+        return self._request("POST", url, **kwargs)
+
+    def _request(self, method, url, **kwargs) -> requests.Response:
+        if self.rate_limiter:
+            self.rate_limiter.wait(url)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            metriky.zaznamenat_chybu(e, time.perf_counter() - start)
+            raise
+        metriky.zaznamenat_odpoved(response, time.perf_counter() - start)
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncFetcher:
+    # obdoba Fetcher nad httpx pro asynchronni pohledy; httpx opakuje jen
+    # nepovedena spojeni, odpovedi RETRY_STATUSES se opakuji tady
+    def __init__(
+        self,
+        timeout=DEFAULT_TIMEOUT,
+        retries=3,
+        backoff_factor=0.5,
+        pool_maxsize=10,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ):
+        _zkontrolovat_httpx()
+        connect, read = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.rate_limiter = rate_limiter
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            headers={"Accept-Encoding": "gzip, deflate"},
+            transport=httpx.AsyncHTTPTransport(
+                retries=retries, limits=httpx.Limits(max_connections=pool_maxsize)
+            ),
+        )
+
+    async def get(self, url, **kwargs) -> "httpx.Response":
+        for pokus in range(self.retries + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.wait_async(url)
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(url, **kwargs)
+            except httpx.HTTPError as e:
+                metriky.zaznamenat_chybu(e, time.perf_counter() - start)
+                raise
+            metriky.zaznamenat_odpoved(response, time.perf_counter() - start)
+            if response.status_code not in RETRY_STATUSES or pokus == self.retries:
+                break
+            metriky.pricist(metriky.HTTP_OPAKOVANI)
+            await asyncio.sleep(self._cekani(response, pokus))
+        response.raise_for_status()
+        return response
+
+    def _cekani(self, response, pokus) -> float:
+        # Retry-After v sekundach ma prednost jako u urllib3, datum se nepouziva
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return self.backoff_factor * 2**pokus
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def _zkontrolovat_httpx():
+    if httpx is None:
+        raise RuntimeError("Pro asynchronní stahování je potřeba nainstalovat httpx")
+
+
+# chyby stahovani obou klientu, pro except
+CHYBY_STAHOVANI = (requests.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+_default_fetcher: Optional[Fetcher] = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_default_fetcher() -> Fetcher:
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher()
+        return _default_fetcher
+
+
+def set_default_fetcher(fetcher: Optional[Fetcher]):
+    global _default_fetcher
+    with _default_fetcher_lock:
+        _default_fetcher = fetcher
@@ -1,4 +1,8 @@
 from django import forms
+from django.db.models import Q
+
+from hlidac import hledani
+from hlidac.spisova_znacka import NeplatnaSpisovaZnackaError, SpisovaZnacka
 
 
 class PridatRizeniForm(forms.Form):
@@ -11,3 +15,58 @@ class PridatRizeniForm(forms.Form):
             }
         ),
     )
+
+
+class ImportRizeniForm(forms.Form):
+    soubor = forms.FileField(
+        label="Soubor",
+        help_text="Na každém řádku adresa řízení v systému InfoSoud nebo spisová "
+        "značka a kód soudu, např. 62 NC 2528/2019,OSPHA09",
+    )
+
+
+class FiltrRizeniForm(forms.Form):
+    hledat = forms.CharField(required=False)
+    spisova_znacka = forms.CharField(required=False)
+    senat = forms.IntegerField(required=False, min_value=0)
+    rejstrik = forms.CharField(required=False)
+    rocnik = forms.IntegerField(required=False, min_value=0)
+    soud = forms.CharField(required=False)
+    predmet = forms.CharField(required=False)
+    ukoncene = forms.NullBooleanField(required=False)
+    kurzor = forms.CharField(required=False, widget=forms.HiddenInput)
+    velikost = forms.IntegerField(
+        required=False, min_value=1, max_value=500, widget=forms.HiddenInput
+    )
+
+    def clean_spisova_znacka(self):
+        hodnota = self.cleaned_data["spisova_znacka"]
+        if not hodnota:
+            return None
+        try:
+            return SpisovaZnacka.parse(hodnota)
+        except NeplatnaSpisovaZnackaError as e:
+            raise forms.ValidationError(str(e))
+
+    def clean_rejstrik(self):
+        return self.cleaned_data["rejstrik"].upper()
+
+    def filtr(self):
+        filtr = Q()
+        if self.cleaned_data.get("hledat"):
+            filtr &= hledani.filtr(self.cleaned_data["hledat"])
+        znacka = self.cleaned_data.get("spisova_znacka")
+        if znacka:
+            filtr &= Q(**znacka._asdict())
+        for pole, lookup in (
+            ("senat", "senat"),
+            ("rejstrik", "rejstrik"),
+            ("rocnik", "rocnik"),
+            ("soud", "soud__nazev"),
+            ("predmet", "predmet__nazev"),
+            ("ukoncene", "ukoncene"),
+        ):
+            hodnota = self.cleaned_data.get(pole)
+            if hodnota not in (None, ""):
+                filtr &= Q(**{lookup: hodnota})
+        return filtr
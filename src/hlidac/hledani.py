@@ -0,0 +1,131 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import List
+
+from django.db import connection
+from django.db.models import Q
+
+from hlidac.models import Predmet, Rizeni, Soud
+from hlidac.strankovani import PREJMENOVANA_POLE, SEZNAM_POLI
+
+# hleda se v nazvech soudu a predmetu; ciselniky jsou male, nejdriv se
+# v jejich fulltextovem indexu najdou shodne polozky a rizeni se pak
+# vyberou pres indexy cizich klicu (rizeni_soud_zmena, rizeni_predmet_zmena)
+CISELNIKY = (("soud", Soud), ("predmet", Predmet))
+MAX_SHOD = 20
+SLOVO_RE = re.compile(r"\w+")
+
+
+@dataclass
+class Shoda:
+    pole: str
+    pk: int
+    nazev: str
+    skore: float
+
+
+def najit(dotaz: str, limit=MAX_SHOD) -> List[Shoda]:
+    # shodne soudy a predmety od nejlepsi shody, slova dotazu se hledaji
+    # jako zacatky slov bez ohledu na diakritiku a velikost pismen;
+    # limit None vrati vsechny shody
+    slova = SLOVO_RE.findall(dotaz)
+    if not slova:
+        return []
+    if connection.vendor == "postgresql":
+        hledat_v_ciselniku = _postgresql
+    elif connection.vendor == "sqlite":
+        hledat_v_ciselniku = _sqlite
+    else:
+        hledat_v_ciselniku = _icontains
+    shody = [
+        Shoda(pole, pk, nazev, skore)
+        for pole, model in CISELNIKY
+        for pk, nazev, skore in hledat_v_ciselniku(model, slova, limit)
+    ]
+    shody.sort(key=lambda shoda: (-shoda.skore, shoda.nazev))
+    return shody[:limit]
+
+
+def filtr(dotaz: str) -> Q:
+    # pro seznam rizeni a admin, bez shody nevrati nic; omezeny pocet shod
+    # je jen pro razeni v hledat, filtr musi vzit vsechny
+    pks = defaultdict(list)
+    for shoda in najit(dotaz, limit=None):
+        pks[shoda.pole].append(shoda.pk)
+    filtr = Q(pk__in=[])
+    for pole, hodnoty in pks.items():
+        filtr |= Q(**{f"{pole}__in": hodnoty})
+    return filtr
+
+
+def hledat(dotaz: str, limit=50) -> List[dict]:
+    # rizeni serazena podle skore shody, v ramci jedne shody od posledni
+    # zmeny; kazda shoda je jeden dotaz pres index cizeho klice
+    radky = {}
+    for shoda in najit(dotaz):
+        if len(radky) >= limit:
+            break
+        queryset = (
+            Rizeni.objects.filter(**{shoda.pole: shoda.pk})
+            .exclude(pk__in=radky.keys())
+            .s_delkou()
+            .order_by("-zmena_ve_spisu", "-pk")
+            .values(*SEZNAM_POLI)
+        )
+        for radek in queryset[: limit - len(radky)]:
+            radky[radek["id"]] = {
+                **{PREJMENOVANA_POLE.get(pole, pole): h for pole, h in radek.items()},
+                "skore": shoda.skore,
+            }
+    return list(radky.values())
+
+
+def _postgresql(model, slova, limit):
+    # tsvector nad nazvem bez diakritiky ma GIN index z migrace 0016,
+    # trigramy najdou i preklepy a casti slov; LIMIT NULL je bez omezeni
+    tabulka = connection.ops.quote_name(model._meta.db_table)
+    vyraz = "to_tsvector('simple', hlidac_unaccent(nazev))"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT id, nazev, ts_rank({vyraz}, dotaz) "
+            f"+ word_similarity(hlidac_unaccent(lower(%s)), hlidac_unaccent(lower(nazev))) AS skore "
+            f"FROM {tabulka}, to_tsquery('simple', hlidac_unaccent(%s)) AS dotaz "
+            f"WHERE {vyraz} @@ dotaz "
+            f"OR hlidac_unaccent(lower(%s)) <%% hlidac_unaccent(lower(nazev)) "
+            f"ORDER BY skore DESC LIMIT %s",
+            [
+                " ".join(slova),
+                " & ".join(f"{slovo}:*" for slovo in slova),
+                " ".join(slova),
+                limit,
+            ],
+        )
+        return cursor.fetchall()
+
+
+def _sqlite(model, slova, limit):
+    # FTS5 tabulka s obsahem z ciselniku, udrzuji ji triggery z migrace 0016;
+    # bm25 vraci zaporne skore, lepsi shoda ma mensi hodnotu; LIMIT -1 je
+    # bez omezeni
+    tabulka = connection.ops.quote_name(f"{model._meta.db_table}_fts")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, nazev, -bm25({tabulka}) FROM {tabulka} "
+            f"WHERE {tabulka} MATCH %s ORDER BY bm25({tabulka}) LIMIT %s",
+            [
+                " ".join(f'"{slovo}"*' for slovo in slova),
+                -1 if limit is None else limit,
+            ],
+        )
+        return cursor.fetchall()
+
+
+def _icontains(model, slova, limit):
+    filtr = Q()
+    for slovo in slova:
+        filtr &= Q(nazev__icontains=slovo)
+    return [
+        (pk, nazev, 1.0)
+        for pk, nazev in model.objects.filter(filtr).values_list("pk", "nazev")[:limit]
+    ]
@@ -0,0 +1,181 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+import requests
+from django.db import transaction
+
+from hlidac import archiv, parser
+from hlidac.crawler import klic_rizeni
+from hlidac.fetcher import Fetcher, HostRateLimiter
+from hlidac.models import BATCH_SIZE, HromadnyImport, Rizeni, Uloha, ulozit_polozky
+from hlidac.refresh import fetch_rizeni
+from hlidac.spisova_znacka import NeplatnaSpisovaZnackaError, SpisovaZnacka
+
+PRIDANO = "přidáno"
+DUPLICITNI = "duplicitní"
+CHYBA = "chyba"
+
+ODDELOVAC_RE = re.compile(r"[,;\t]")
+
+
+@dataclass
+class RadekImportu:
+    cislo: int
+    vstup: str
+    url: str = ""
+    spisova_znacka: str = ""
+    stav: str = ""
+    zprava: str = ""
+    rizeni: Optional[parser.Rizeni] = None
+
+
+def nacist_radky(lines: Iterable[str]) -> List[RadekImportu]:
+    # radek obsahuje bud adresu rizeni v systemu InfoSoud, nebo spisovou znacku
+    # a kod soudu oddelene carkou, strednikem nebo tabulatorem
+    radky = []
+    for cislo, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        radek = RadekImportu(cislo=cislo, vstup=line)
+        try:
+            if line.startswith(("http://", "https://")):
+                radek.url = line
+                try:
+                    radek.spisova_znacka = str(SpisovaZnacka.from_url(line))
+                except NeplatnaSpisovaZnackaError:
+                    pass
+            else:
+                sloupce = [sloupec.strip() for sloupec in ODDELOVAC_RE.split(line)]
+                if len(sloupce) != 2:
+                    raise NeplatnaSpisovaZnackaError(
+                        "Očekávána adresa řízení nebo spisová značka a kód soudu"
+                    )
+                znacka = SpisovaZnacka.parse(sloupce[0])
+                radek.spisova_znacka = str(znacka)
+                radek.url = znacka.url(sloupce[1].upper())
+        except NeplatnaSpisovaZnackaError as e:
+            radek.stav = CHYBA
+            radek.zprava = str(e)
+        radky.append(radek)
+    return radky
+
+
+def _ke_stazeni(radky: List[RadekImportu]) -> List[RadekImportu]:
+    # radky s uz ulozenym rizenim se oznaci jako duplicitni; stejna spisova
+    # znacka muze byt u vice soudu, porovnava se proto znacka i soud z adresy
+    existujici = {
+        klic_rizeni(url)
+        for url in Rizeni.objects.filter(
+            spisova_znacka__in=[r.spisova_znacka for r in radky if r.spisova_znacka]
+        ).values_list("url", flat=True)
+    }
+    ke_stazeni = []
+    for radek in radky:
+        if radek.stav:
+            continue
+        klic = klic_rizeni(radek.url)
+        if klic in existujici:
+            radek.stav = DUPLICITNI
+            radek.zprava = "Řízení již existuje"
+            continue
+        existujici.add(klic)
+        ke_stazeni.append(radek)
+    return ke_stazeni
+
+
+def zaradit(radky: List[RadekImportu], soubor="") -> HromadnyImport:
+    # pro admin: rizeni se nestahuji v requestu, ale zaradi se do fronty uloh,
+    # kterou zpracovava zpracovat_ulohy; prubeh ukazuje HromadnyImport.pocty
+    ke_stazeni = _ke_stazeni(radky)
+    with transaction.atomic():
+        hromadny_import = HromadnyImport.objects.create(
+            soubor=soubor,
+            odmitnute=[
+                {
+                    "cislo": radek.cislo,
+                    "vstup": radek.vstup,
+                    "stav": radek.stav,
+                    "zprava": radek.zprava,
+                }
+                for radek in radky
+                if radek.stav
+            ],
+        )
+        Uloha.objects.bulk_create(
+            [
+                Uloha(url=radek.url, hromadny_import=hromadny_import)
+                for radek in ke_stazeni
+            ],
+            batch_size=BATCH_SIZE,
+        )
+    return hromadny_import
+
+
+def importovat(
+    radky: List[RadekImportu],
+    max_workers=8,
+    requests_per_second=5.0,
+    fetcher: Optional[Fetcher] = None,
+) -> List[RadekImportu]:
+    ke_stazeni = _ke_stazeni(radky)
+    fetcher = fetcher or Fetcher(
+        pool_maxsize=max_workers,
+        rate_limiter=HostRateLimiter(requests_per_second),
+    )
+    archivace = archiv.Archivace(archiv.aktualni_slovnik())
+    with fetcher, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            (
+                radek,
+                executor.submit(fetch_rizeni, radek.url, archivace.fetcher(fetcher)),
+            )
+            for radek in ke_stazeni
+        ]
+        for radek, future in futures:
+            try:
+                radek.rizeni = future.result()
+            except parser.SpisovaZnackaNeexistujeError as e:
+                radek.stav = CHYBA
+                radek.zprava = str(e)
+            except (requests.RequestException, AssertionError) as e:
+                radek.stav = CHYBA
+                radek.zprava = f"Řízení se nepodařilo načíst: {e}"
+            except Exception as e:
+                # stranka, ktera neni strankou rizeni (chyba parseru), nesmi
+                # shodit cely import
+                radek.stav = CHYBA
+                radek.zprava = f"Řízení se nepodařilo načíst: {e!r}"
+
+    _ulozit([radek for radek in ke_stazeni if radek.rizeni])
+    archivace.ulozit()
+    return radky
+
+
+@transaction.atomic
+def _ulozit(radky: List[RadekImportu]):
+    # adresa bez spisove znacky se da porovnat s existujicimi rizenimi az po stazeni
+    existujici = set(
+        Rizeni.objects.filter(
+            spisova_znacka__in=[r.rizeni.spisova_znacka for r in radky]
+        ).values_list("spisova_znacka", "soud__nazev")
+    )
+    nove = []
+    for radek in radky:
+        radek.spisova_znacka = radek.rizeni.spisova_znacka
+        klic = (radek.rizeni.spisova_znacka, radek.rizeni.soud)
+        if klic in existujici:
+            radek.stav = DUPLICITNI
+            continue
+        existujici.add(klic)
+        rizeni = Rizeni(url=radek.url)
+        rizeni.aktualizovat(radek.rizeni)
+        nove.append((rizeni, radek))
+
+    # rizeni pridane mezitim jinym importem se jen aktualizuje
+    Rizeni.objects.upsert(rizeni for rizeni, _ in nove)
+    ulozit_polozky((rizeni, radek.rizeni) for rizeni, radek in nove)
+    for _, radek in nove:
+        radek.stav = PRIDANO
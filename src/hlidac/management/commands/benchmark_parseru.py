@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hlidac.benchmark import compare, run_benchmark, to_json
+from hlidac.parser import BACKENDS
+
+
+class Command(BaseCommand):
+    help = "Změří rychlost a paměťovou náročnost parseru nad testovacími stránkami"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend",
+            action="append",
+            choices=BACKENDS,
+            help="Parser, který se má měřit (lze zadat vícekrát), výchozí jsou všechny",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--udalosti",
+            type=int,
+            action="append",
+            help="Velikost syntetické stránky v počtu událostí (lze zadat vícekrát)",
+        )
+        parser.add_argument("--json", help="Soubor pro výsledky ve formátu JSON")
+        parser.add_argument(
+            "--baseline", help="Výsledky předchozího běhu ve formátu JSON pro srovnání"
+        )
+        parser.add_argument("--tolerance", type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        results = run_benchmark(
+            backends=options["backend"] or BACKENDS,
+            repeat=options["repeat"],
+            synthetic_sizes=options["udalosti"] or (100, 500),
+        )
+
+        self.stdout.write(
+            f"{'etapa':<22}{'stránka':<32}{'parser':<9}"
+            f"{'volání/s':>12}{'ms/volání':>12}{'paměť kB':>12}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result.stage:<22}{result.page:<32}{result.backend:<9}"
+                f"{result.per_second:>12.1f}{result.mean_ms:>12.3f}"
+                f"{result.peak_memory / 1024:>12.0f}"
+            )
+
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(to_json(results), f, indent=2)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                regressions = compare(results, json.load(f), options["tolerance"])
+            for key, ratio in regressions.items():
+                self.stderr.write(f"{key} je {ratio:.2f}x pomalejší")
+            if regressions:
+                raise CommandError("Parser je pomalejší než v předchozím běhu")
@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from hlidac import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Vyexportuje řízení nebo jejich události do CSV, JSONL nebo Parquet, "
+        "řádky se čtou a zapisují po dávkách"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(export.DATASETY))
+        parser.add_argument(
+            "--format", choices=list(export.TYPY_OBSAHU), default=export.FORMAT_CSV
+        )
+        parser.add_argument(
+            "--vystup", default="-", help="Cílový soubor, výchozí je standardní výstup"
+        )
+        parser.add_argument("--davka", type=int, default=export.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        casti = export.exportovat(
+            options["dataset"], options["format"], chunk_size=options["davka"]
+        )
+        if options["vystup"] == "-":
+            for cast in casti:
+                sys.stdout.buffer.write(cast)
+            sys.stdout.buffer.flush()
+            return
+        with open(options["vystup"], "wb") as f:
+            for cast in casti:
+                f.write(cast)
+        self.stdout.write(f"Export uložen do {options['vystup']}")
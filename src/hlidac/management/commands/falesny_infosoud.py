@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+
+from hlidac.falesny_infosoud import FalesnyInfoSoud, Nastaveni
+
+
+def pridat_nastaveni_serveru(parser):
+    parser.add_argument(
+        "--latence", type=float, default=0.0, help="Doba odpovědi v sekundách"
+    )
+    parser.add_argument(
+        "--rozptyl",
+        type=float,
+        default=0.0,
+        help="Náhodné prodloužení doby odpovědi až o zadaný počet sekund",
+    )
+    parser.add_argument(
+        "--chybovost", type=float, default=0.0, help="Podíl odpovědí s chybou 500"
+    )
+    parser.add_argument(
+        "--omezeni",
+        type=float,
+        default=0.0,
+        help="Podíl odpovědí 429 Too Many Requests",
+    )
+    parser.add_argument(
+        "--zmeny",
+        type=float,
+        default=0.0,
+        help="Pravděpodobnost, že se stránka řízení při stažení změní",
+    )
+    parser.add_argument("--seed", type=int)
+
+
+def nastaveni_serveru(options) -> Nastaveni:
+    return Nastaveni(
+        latence=options["latence"],
+        rozptyl=options["rozptyl"],
+        chybovost=options["chybovost"],
+        omezeni=options["omezeni"],
+        zmeny=options["zmeny"],
+        seed=options["seed"],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Spustí náhradu systému InfoSoud, která generuje stránky řízení podle "
+        "testovacích dat"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8001)
+        pridat_nastaveni_serveru(parser)
+
+    def handle(self, *args, **options):
+        server = FalesnyInfoSoud(
+            (options["host"], options["port"]), nastaveni_serveru(options)
+        )
+        self.stdout.write(f"Náhrada systému InfoSoud běží na {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from hlidac.hromadny_import import CHYBA, DUPLICITNI, PRIDANO, importovat, nacist_radky
+
+
+class Command(BaseCommand):
+    help = (
+        "Hromadně přidá řízení ze souboru, na každém řádku je adresa řízení "
+        "v systému InfoSoud nebo spisová značka a kód soudu, např. 62 NC 2528/2019,OSPHA09"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("soubor", help="Soubor se seznamem řízení, - pro stdin")
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--rate", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        if options["soubor"] == "-":
+            radky = nacist_radky(sys.stdin)
+        else:
+            with open(options["soubor"], encoding="utf-8-sig") as f:
+                radky = nacist_radky(f)
+
+        importovat(
+            radky,
+            max_workers=options["workers"],
+            requests_per_second=options["rate"],
+        )
+
+        for radek in radky:
+            if radek.stav == CHYBA:
+                self.stderr.write(f"{radek.cislo}: {radek.vstup}: {radek.zprava}")
+            elif radek.stav == DUPLICITNI:
+                self.stdout.write(f"{radek.cislo}: {radek.vstup}: řízení již existuje")
+        pocty = {
+            stav: sum(1 for radek in radky if radek.stav == stav)
+            for stav in (PRIDANO, DUPLICITNI, CHYBA)
+        }
+        self.stdout.write(
+            f"Přidáno {pocty[PRIDANO]} řízení, duplicitních: {pocty[DUPLICITNI]}, "
+            f"chyb: {pocty[CHYBA]}"
+        )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from hlidac.pipeline import (
+    paralelne,
+    parsovat_soubor,
+    po_davkach,
+    projit_adresar,
+    ulozit_rizeni,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Načte řízení z uložených stránek systému InfoSoud, stránka zahájení "
+        "řízení se hledá vedle stránky řízení s příponou -ZAHAJ_RIZ"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("adresar", help="Adresář s uloženými stránkami")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Počet procesů, ve kterých se stránky zpracovávají, výchozí je "
+            "počet jader",
+        )
+        parser.add_argument("--davka", type=int, default=500)
+
+    def handle(self, *args, **options):
+        zpracovano = 0
+        chyby = 0
+        vysledky = paralelne(
+            parsovat_soubor,
+            projit_adresar(options["adresar"]),
+            max_workers=options["workers"],
+        )
+        for vysledek in po_davkach(vysledky, ulozit_rizeni, options["davka"]):
+            zpracovano += 1
+            if vysledek.chyba:
+                chyby += 1
+                self.stderr.write(f"{vysledek.zdroj}: {vysledek.chyba}")
+
+        self.stdout.write(f"Zpracováno {zpracovano} souborů, chyb: {chyby}")
@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand
+
+from hlidac import metriky
+from hlidac.models import Rizeni
+from hlidac.planovac import k_obnoveni
+from hlidac.refresh import refresh_all
+
+
+def pridat_mereni(parser):
+    parser.add_argument(
+        "--metriky",
+        metavar="SOUBOR",
+        help="Zapnout metriky a na konci je uložit v textovém formátu Promethea",
+    )
+    parser.add_argument(
+        "--profil",
+        metavar="SOUBOR",
+        help="Uložit profil cProfile celého běhu pro pstats nebo snakeviz",
+    )
+
+
+@contextmanager
+def mereni(options):
+    if options["metriky"]:
+        metriky.zapnout()
+    try:
+        with metriky.profilovat(options["profil"]):
+            yield
+    finally:
+        if options["metriky"]:
+            metriky.ulozit(options["metriky"])
+
+
+class Command(BaseCommand):
+    help = (
+        "Obnoví ze systému InfoSoud údaje sledovaných řízení, která jsou podle "
+        "plánovače na řadě"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Maximální počet souběžných požadavků",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=5.0,
+            help="Maximální počet požadavků za sekundu na jeden server",
+        )
+        parser.add_argument(
+            "--rozpocet",
+            type=int,
+            help="Maximální počet obnovených řízení, přednost mají nejdéle čekající",
+        )
+        parser.add_argument(
+            "--vse",
+            action="store_true",
+            help="Obnovit všechna řízení bez ohledu na plán kontrol",
+        )
+        pridat_mereni(parser)
+
+    def handle(self, *args, **options):
+        with mereni(options):
+            self.obnovit(options)
+
+    def obnovit(self, options):
+        obnoveno = 0
+        beze_zmeny = 0
+        chyby = 0
+        if options["vse"]:
+            rizeni = Rizeni.objects.all()
+        else:
+            rizeni = k_obnoveni(options["rozpocet"])
+        for result in refresh_all(
+            rizeni,
+            max_workers=options["workers"],
+            requests_per_second=options["rate"],
+        ):
+            if result.error:
+                chyby += 1
+                self.stderr.write(f"{result.rizeni}: {result.error}")
+            elif result.zmeneno:
+                obnoveno += 1
+            else:
+                beze_zmeny += 1
+        self.stdout.write(
+            f"Obnoveno {obnoveno} řízení, beze změny: {beze_zmeny}, chyb: {chyby}"
+        )
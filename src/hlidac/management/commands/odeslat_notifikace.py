@@ -0,0 +1,15 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from hlidac.notifikace import odeslat_notifikace
+
+
+class Command(BaseCommand):
+    help = "Odešle notifikace o změnách ve sledovaných řízeních"
+
+    def handle(self, *args, **options):
+        try:
+            odeslano = odeslat_notifikace()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        self.stdout.write(f"Odesláno {odeslano} změn")
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from hlidac import archiv
+from hlidac.models import SlovnikKomprese, StazenaStranka
+from hlidac.pipeline import paralelne, po_davkach, ulozit_rizeni
+
+
+class Command(BaseCommand):
+    help = (
+        "Znovu zpracuje řízení ze stránek uložených v archivu, "
+        "bez stahování ze systému InfoSoud"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Počet procesů, ve kterých se stránky zpracovávají, výchozí je "
+            "počet jader",
+        )
+        parser.add_argument("--davka", type=int, default=500)
+
+    def handle(self, *args, **options):
+        slovniky = {
+            pk: bytes(data)
+            for pk, data in SlovnikKomprese.objects.values_list("pk", "data")
+        }
+        # archiv obsahuje i stranky udalosti (zahajeni rizeni s predmetem),
+        # ty se od stranek rizeni lisi parametrem druhUdalosti
+        polozky = (
+            (url, kodek, slovnik_id, bytes(data))
+            for url, kodek, slovnik_id, data in StazenaStranka.objects.filter(
+                snimek__isnull=False
+            )
+            .exclude(url__contains="druhUdalosti=")
+            .values_list("url", "snimek__kodek", "snimek__slovnik", "snimek__data")
+            .iterator()
+        )
+
+        zpracovano = 0
+        chyby = 0
+        vysledky = paralelne(
+            archiv.preparsovat,
+            polozky,
+            max_workers=options["workers"],
+            initializer=archiv.pripravit_proces,
+            initargs=(slovniky,),
+        )
+        for vysledek in po_davkach(vysledky, ulozit_rizeni, options["davka"]):
+            zpracovano += 1
+            if vysledek.chyba:
+                chyby += 1
+                self.stderr.write(f"{vysledek.zdroj}: {vysledek.chyba}")
+
+        self.stdout.write(f"Zpracováno {zpracovano} stránek, chyb: {chyby}")
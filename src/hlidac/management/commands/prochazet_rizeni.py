@@ -0,0 +1,74 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hlidac import archiv
+from hlidac.crawler import CrawlState, crawl
+from hlidac.fetcher import Fetcher, HostRateLimiter
+from hlidac.models import Rizeni, ulozit_polozky
+
+
+class Command(BaseCommand):
+    help = "Načte řízení včetně všech jeho dílčích řízení ze systému InfoSoud"
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", nargs="*", help="Adresa řízení v systému InfoSoud")
+        parser.add_argument(
+            "--hloubka",
+            type=int,
+            default=3,
+            help="Maximální hloubka zanoření dílčích řízení",
+        )
+        parser.add_argument(
+            "--stav",
+            help="Soubor se stavem procházení, pokud existuje, procházení pokračuje",
+        )
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--rate", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        stav_soubor = options["stav"]
+        if stav_soubor and os.path.exists(stav_soubor):
+            state = CrawlState.load(stav_soubor)
+        else:
+            state = CrawlState()
+        for url in options["url"]:
+            state.pridat(url, 0)
+
+        nacteno = 0
+        chyby = 0
+        fetcher = Fetcher(
+            pool_maxsize=options["workers"],
+            rate_limiter=HostRateLimiter(options["rate"]),
+        )
+        archivace = archiv.Archivace(archiv.aktualni_slovnik())
+        with fetcher:
+            for results in crawl(
+                state,
+                archivace.fetcher(fetcher),
+                max_depth=options["hloubka"],
+                max_workers=options["workers"],
+            ):
+                for result in results:
+                    if result.error:
+                        chyby += 1
+                        self.stderr.write(f"{result.url}: {result.error}")
+                nactene = [result for result in results if result.rizeni]
+                self.ulozit(nactene)
+                archivace.ulozit()
+                nacteno += len(nactene)
+                if stav_soubor:
+                    state.save(stav_soubor)
+
+        self.stdout.write(f"Načteno {nacteno} řízení, chyb: {chyby}")
+
+    @transaction.atomic
+    def ulozit(self, results):
+        dvojice = []
+        for result in results:
+            rizeni = Rizeni(url=result.url)
+            rizeni.aktualizovat(result.rizeni)
+            dvojice.append((rizeni, result.rizeni))
+        Rizeni.objects.upsert(rizeni for rizeni, _ in dvojice)
+        ulozit_polozky(dvojice)
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hlidac import archiv
+from hlidac.models import BATCH_SIZE, Snimek
+
+
+class Command(BaseCommand):
+    help = "Natrénuje slovník pro kompresi archivu stažených stránek"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--vzorky",
+            type=int,
+            default=1000,
+            help="Počet nejnovějších stránek, ze kterých se slovník trénuje",
+        )
+        parser.add_argument("--velikost", type=int, help="Velikost slovníku v bajtech")
+        parser.add_argument(
+            "--kodek",
+            choices=[archiv.KODEK_ZSTD, archiv.KODEK_ZLIB],
+            default=archiv.VYCHOZI_KODEK,
+        )
+        parser.add_argument(
+            "--prekomprimovat",
+            action="store_true",
+            help="Znovu zkomprimovat novým slovníkem všechny uložené stránky",
+        )
+
+    def handle(self, *args, **options):
+        vzorky = [
+            archiv.obsah(snimek).encode("utf-8")
+            for snimek in Snimek.objects.select_related("slovnik").order_by(
+                "-vytvoreno"
+            )[: options["vzorky"]]
+        ]
+        if not vzorky:
+            raise CommandError("Archiv je prázdný")
+        try:
+            slovnik = archiv.trenovat_slovnik(
+                vzorky, options["kodek"], options["velikost"]
+            )
+        except (RuntimeError, archiv.ChybaTrenovani) as e:
+            raise CommandError(str(e))
+        slovnik.save()
+        self.stdout.write(
+            f"Vytvořen slovník {slovnik.kodek} o velikosti {len(slovnik.data)} B "
+            f"z {len(vzorky)} stránek"
+        )
+
+        if options["prekomprimovat"]:
+            puvodne = 0
+            nove = 0
+            snimky = Snimek.objects.select_related("slovnik").order_by("pk")
+            for start in range(0, snimky.count(), BATCH_SIZE):
+                davka = list(snimky[start : start + BATCH_SIZE])
+                for snimek in davka:
+                    puvodne += len(snimek.data)
+                    data = archiv.obsah(snimek).encode("utf-8")
+                    snimek.kodek = slovnik.kodek
+                    snimek.slovnik = slovnik
+                    snimek.data = archiv.komprimovat(
+                        data, slovnik.kodek, bytes(slovnik.data), slovnik.pk
+                    )
+                    nove += len(snimek.data)
+                Snimek.objects.bulk_update(davka, ["kodek", "slovnik", "data"])
+            self.stdout.write(f"Archiv překomprimován z {puvodne} B na {nove} B")
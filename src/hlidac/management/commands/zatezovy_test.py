@@ -0,0 +1,68 @@
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from hlidac.falesny_infosoud import FalesnyInfoSoud
+from hlidac.management.commands.falesny_infosoud import (
+    nastaveni_serveru,
+    pridat_nastaveni_serveru,
+)
+from hlidac.management.commands.obnovit_rizeni import mereni, pridat_mereni
+from hlidac.zatez import zatezovy_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Změří propustnost importu a obnovení řízení proti náhradě systému "
+        "InfoSoud, vytvořená řízení na konci smaže"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pocet", type=int, default=100)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=0.0,
+            help="Maximální počet požadavků za sekundu, 0 znamená bez omezení",
+        )
+        parser.add_argument(
+            "--opakovani", type=int, default=1, help="Počet kol obnovení"
+        )
+        parser.add_argument(
+            "--adresa",
+            help="Adresa už běžící náhrady systému InfoSoud, jinak se spustí "
+            "vlastní s nastavením níže",
+        )
+        parser.add_argument(
+            "--ponechat", action="store_true", help="Nemazat vytvořená řízení"
+        )
+        pridat_nastaveni_serveru(parser)
+        pridat_mereni(parser)
+
+    def handle(self, *args, **options):
+        if options["adresa"]:
+            server = nullcontext()
+        else:
+            server = FalesnyInfoSoud(nastaveni=nastaveni_serveru(options))
+        with server, mereni(options):
+            vysledky = zatezovy_test(
+                options["adresa"] or server.url,
+                pocet=options["pocet"],
+                max_workers=options["workers"],
+                requests_per_second=options["rate"],
+                opakovani=options["opakovani"],
+                ponechat=options["ponechat"],
+            )
+
+        self.stdout.write(
+            f"{'fáze':<12}{'řízení':>8}{'chyb':>6}{'požadavků':>11}"
+            f"{'řízení/s':>10}{'p50 ms':>9}{'p95 ms':>9}"
+        )
+        for vysledek in vysledky:
+            self.stdout.write(
+                f"{vysledek.faze:<12}{vysledek.rizeni:>8}{vysledek.chyby:>6}"
+                f"{vysledek.pozadavky:>11}{vysledek.za_sekundu:>10.1f}"
+                f"{vysledek.percentil(0.5) * 1000:>9.1f}"
+                f"{vysledek.percentil(0.95) * 1000:>9.1f}"
+            )
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hlidac.fetcher import Fetcher, HostRateLimiter
+from hlidac.ulohy import vyzvednout_ulohu, zpracovat_ulohu
+
+
+class Command(BaseCommand):
+    help = "Zpracovává frontu úloh načítání řízení ze systému InfoSoud"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--jednou",
+            action="store_true",
+            help="Zpracovat čekající úlohy a skončit",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Prodleva v sekundách mezi kontrolami prázdné fronty",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=5.0,
+            help="Nejvyšší počet požadavků na systém InfoSoud za sekundu",
+        )
+
+    def handle(self, *args, **options):
+        with Fetcher(rate_limiter=HostRateLimiter(options["rate"])) as fetcher:
+            while True:
+                uloha = vyzvednout_ulohu()
+                if uloha:
+                    zpracovat_ulohu(uloha, fetcher)
+                    self.stdout.write(f"{uloha}: {uloha.get_stav_display()}")
+                elif options["jednou"]:
+                    return
+                else:
+                    time.sleep(options["interval"])
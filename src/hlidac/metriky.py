@@ -0,0 +1,187 @@
+import cProfile
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# metriky se sbiraji jen v procesu, ktery je zapne; vypnute mereni stoji
+# jedno cteni promenne modulu na volani
+zapnuto = bool(os.environ.get("HLIDAC_METRIKY"))
+
+HRANICE = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DOBA_ETAPY = "hlidac_stage_duration_seconds"
+HTTP_ODPOVEDI = "hlidac_http_responses_total"
+HTTP_OPAKOVANI = "hlidac_http_retries_total"
+HTTP_CHYBY = "hlidac_http_errors_total"
+DOBA_POHLEDU = "hlidac_view_duration_seconds"
+POPISY = {
+    DOBA_ETAPY: "Doba trvani etap stahovani, parsovani a ukladani",
+    HTTP_ODPOVEDI: "Pocet odpovedi systemu InfoSoud podle stavoveho kodu",
+    HTTP_OPAKOVANI: "Pocet opakovanych pozadavku na system InfoSoud",
+    HTTP_CHYBY: "Pocet pozadavku na system InfoSoud, ktere skoncily vyjimkou",
+    DOBA_POHLEDU: "Doba zpracovani pozadavku na webove pohledy",
+}
+
+Stitky = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self):
+        self.kose = [0] * (len(HRANICE) + 1)
+        self.soucet = 0.0
+        self.pocet = 0
+
+    def zaznamenat(self, hodnota: float):
+        self.kose[bisect_left(HRANICE, hodnota)] += 1
+        self.soucet += hodnota
+        self.pocet += 1
+
+
+_lock = threading.Lock()
+_citace: Dict[str, Dict[Stitky, float]] = {}
+_histogramy: Dict[str, Dict[Stitky, Histogram]] = {}
+
+
+def zapnout(hodnota=True):
+    global zapnuto
+    zapnuto = hodnota
+
+
+def vynulovat():
+    with _lock:
+        _citace.clear()
+        _histogramy.clear()
+
+
+def _stitky(stitky) -> Stitky:
+    return tuple(sorted((nazev, str(hodnota)) for nazev, hodnota in stitky.items()))
+
+
+def pricist(nazev: str, hodnota: float = 1, **stitky):
+    if not zapnuto:
+        return
+    klic = _stitky(stitky)
+    with _lock:
+        citac = _citace.setdefault(nazev, {})
+        citac[klic] = citac.get(klic, 0) + hodnota
+
+
+def zaznamenat(nazev: str, hodnota: float, **stitky):
+    if not zapnuto:
+        return
+    klic = _stitky(stitky)
+    with _lock:
+        histogramy = _histogramy.setdefault(nazev, {})
+        if klic not in histogramy:
+            histogramy[klic] = Histogram()
+        histogramy[klic].zaznamenat(hodnota)
+
+
+def mereno(etapa: str):
+    # dekorator, ktery meri dobu volani funkce jako etapu
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not zapnuto:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                zaznamenat(DOBA_ETAPY, time.perf_counter() - start, stage=etapa)
+
+        return wrapper
+
+    return decorator
+
+
+def zaznamenat_odpoved(response, sekundy: float):
+    # urllib3 uklada historii opakovani k odpovedi, ktera je nakonec vracena
+    if not zapnuto:
+        return
+    zaznamenat(DOBA_ETAPY, sekundy, stage="fetch")
+    pricist(HTTP_ODPOVEDI, status=response.status_code)
+    # odpoved httpx atribut raw nema, AsyncFetcher opakovani pocita sam
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    if retries is not None and retries.history:
+        pricist(HTTP_OPAKOVANI, len(retries.history))
+
+
+def zaznamenat_chybu(chyba: Exception, sekundy: float):
+    if not zapnuto:
+        return
+    zaznamenat(DOBA_ETAPY, sekundy, stage="fetch")
+    pricist(HTTP_CHYBY, error=type(chyba).__name__)
+
+
+def prometheus() -> str:
+    # textovy format pro Prometheus, verze 0.0.4
+    radky: List[str] = []
+    with _lock:
+        for nazev, hodnoty in sorted(_citace.items()):
+            radky += _hlavicka(nazev, "counter")
+            for stitky, hodnota in sorted(hodnoty.items()):
+                radky.append(f"{nazev}{_format_stitky(stitky)} {_cislo(hodnota)}")
+        for nazev, hodnoty in sorted(_histogramy.items()):
+            radky += _hlavicka(nazev, "histogram")
+            for stitky, histogram in sorted(hodnoty.items()):
+                radky += _histogram(nazev, stitky, histogram)
+    return "".join(f"{radek}\n" for radek in radky)
+
+
+def _hlavicka(nazev, typ) -> List[str]:
+    radky = []
+    if nazev in POPISY:
+        radky.append(f"# HELP {nazev} {POPISY[nazev]}")
+    radky.append(f"# TYPE {nazev} {typ}")
+    return radky
+
+
+def _histogram(nazev, stitky: Stitky, histogram: Histogram) -> Iterator[str]:
+    kumulativne = 0
+    for hranice, pocet in zip((*HRANICE, float("inf")), histogram.kose):
+        kumulativne += pocet
+        le = "+Inf" if hranice == float("inf") else _cislo(hranice)
+        yield f"{nazev}_bucket{_format_stitky((*stitky, ('le', le)))} {kumulativne}"
+    yield f"{nazev}_sum{_format_stitky(stitky)} {_cislo(histogram.soucet)}"
+    yield f"{nazev}_count{_format_stitky(stitky)} {histogram.pocet}"
+
+
+def _format_stitky(stitky: Stitky) -> str:
+    if not stitky:
+        return ""
+    hodnoty = ",".join(f'{nazev}="{_escape(hodnota)}"' for nazev, hodnota in stitky)
+    return f"{{{hodnoty}}}"
+
+
+def _escape(hodnota: str) -> str:
+    return hodnota.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _cislo(hodnota: float) -> str:
+    return repr(float(hodnota)) if isinstance(hodnota, float) else str(hodnota)
+
+
+def ulozit(soubor: str):
+    # pro textfile collector node_exporteru, prikazy bezi mimo webovy proces
+    with open(soubor, "w") as f:
+        f.write(prometheus())
+
+
+@contextmanager
+def profilovat(soubor: Optional[str]):
+    # cProfile se zapne jen pro jeden beh, vysledek se da prohlednout
+    # pomoci python -m pstats nebo snakeviz
+    if not soubor:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(soubor)
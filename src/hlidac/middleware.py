@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+from hlidac import metriky
+
+
+@sync_and_async_middleware
+def metriky_middleware(get_response):
+    # bez zapnutych metrik se middleware vubec nepouzije; umi i asynchronni
+    # pohledy, aby je Django pod ASGI nespoustelo ve vlakne
+    if not metriky.zapnuto:
+        raise MiddlewareNotUsed
+
+    if asyncio.iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            start = time.perf_counter()
+            response = await get_response(request)
+            _zaznamenat(request, response, start)
+            return response
+
+    else:
+
+        def middleware(request):
+            start = time.perf_counter()
+            response = get_response(request)
+            _zaznamenat(request, response, start)
+            return response
+
+    return middleware
+
+
+def _zaznamenat(request, response, start):
+    match = request.resolver_match
+    metriky.zaznamenat(
+        metriky.DOBA_POHLEDU,
+        time.perf_counter() - start,
+        view=match.view_name if match else "",
+        method=request.method,
+        status=response.status_code,
+    )
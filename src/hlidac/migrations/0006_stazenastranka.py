@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0005_rizeni_soud'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StazenaStranka',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=1000, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=200)),
+                ('last_modified', models.CharField(blank=True, max_length=100)),
+                ('hash_obsahu', models.CharField(max_length=64)),
+                ('stazeno', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0006_stazenastranka'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Udalost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('druh', models.CharField(max_length=20)),
+                ('poradi', models.PositiveIntegerField()),
+                ('nazev', models.CharField(max_length=100)),
+                ('datum', models.DateField()),
+                ('url', models.URLField(blank=True, max_length=1000)),
+                ('rizeni', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='udalosti', to='hlidac.rizeni')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DilciRizeni',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('spisova_znacka', models.CharField(max_length=20)),
+                ('rizeni', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dilci_rizeni', to='hlidac.rizeni')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='udalost',
+            index=models.Index(fields=['rizeni', 'druh', 'datum'], name='udalost_rizeni_druh_datum'),
+        ),
+        migrations.AddConstraint(
+            model_name='udalost',
+            constraint=models.UniqueConstraint(fields=('rizeni', 'druh', 'poradi'), name='unique_udalost'),
+        ),
+        migrations.AddConstraint(
+            model_name='dilcirizeni',
+            constraint=models.UniqueConstraint(fields=('rizeni', 'spisova_znacka'), name='unique_dilci_rizeni'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0007_udalost_dilcirizeni'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Uloha',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=1000)),
+                ('stav', models.CharField(choices=[('ceka', 'Čeká na zpracování'), ('bezi', 'Zpracovává se'), ('hotovo', 'Hotovo'), ('chyba', 'Chyba')], default='ceka', max_length=10)),
+                ('vysledek', models.JSONField(blank=True, null=True)),
+                ('chyba', models.TextField(blank=True)),
+                ('vytvoreno', models.DateTimeField(auto_now_add=True)),
+                ('zahajeno', models.DateTimeField(blank=True, null=True)),
+                ('dokonceno', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='uloha',
+            index=models.Index(fields=['stav', 'vytvoreno'], name='uloha_stav_vytvoreno'),
+        ),
+    ]
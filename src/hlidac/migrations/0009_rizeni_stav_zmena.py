@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0008_uloha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rizeni',
+            name='stav',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.CreateModel(
+            name='Zmena',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('druh', models.CharField(choices=[('nova_udalost', 'Nová událost'), ('zmena_stavu', 'Změna stavu řízení'), ('nove_dilci_rizeni', 'Nové dílčí řízení'), ('skonceni', 'Skončení věci'), ('odvolani', 'Odvolání')], max_length=20)),
+                ('popis', models.CharField(max_length=300)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('vytvoreno', models.DateTimeField(auto_now_add=True)),
+                ('odeslano', models.DateTimeField(blank=True, null=True)),
+                ('rizeni', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zmeny', to='hlidac.rizeni')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='zmena',
+            index=models.Index(fields=['odeslano', 'vytvoreno'], name='zmena_odeslano_vytvoreno'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0009_rizeni_stav_zmena'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rizeni',
+            name='pristi_kontrola',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='rizeni',
+            index=models.Index(fields=['pristi_kontrola'], name='rizeni_pristi_kontrola'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0010_rizeni_pristi_kontrola'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlovnikKomprese',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kodek', models.CharField(max_length=10)),
+                ('data', models.BinaryField()),
+                ('vytvoreno', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Snimek',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('kodek', models.CharField(max_length=10)),
+                ('data', models.BinaryField()),
+                ('velikost', models.PositiveIntegerField()),
+                ('vytvoreno', models.DateTimeField(auto_now_add=True)),
+                ('slovnik', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='hlidac.slovnikkomprese')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='stazenastranka',
+            name='snimek',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='hlidac.snimek'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0011_snimek'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rizeni',
+            index=models.Index(fields=['zmena_ve_spisu', 'id'], name='rizeni_zmena'),
+        ),
+        migrations.AddIndex(
+            model_name='rizeni',
+            index=models.Index(fields=['soud', 'zmena_ve_spisu', 'id'], name='rizeni_soud_zmena'),
+        ),
+        migrations.AddIndex(
+            model_name='rizeni',
+            index=models.Index(fields=['predmet', 'zmena_ve_spisu', 'id'], name='rizeni_predmet_zmena'),
+        ),
+        migrations.AddIndex(
+            model_name='rizeni',
+            index=models.Index(fields=['ukoncene', 'zmena_ve_spisu', 'id'], name='rizeni_ukoncene_zmena'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:43
+
+from collections import defaultdict
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def _org(rizeni):
+    # kod soudu z url rizeni, bez nej nejde poznat, ktery soud rizeni vede
+    return parse_qs(urlsplit(rizeni.url).query).get('org', [None])[0] or rizeni.pk
+
+
+def odstranit_duplicity(apps, schema_editor):
+    # stejne rizeni ma stejnou znacku i kod soudu v url, ponecha se nejdrive
+    # pridane s vyplnenym soudem; ruzna rizeni se stejnou znackou a prazdnym
+    # soudem (sloupec pridal 0005) dostanou kod soudu z url, nazvem se prepise
+    # pri dalsi obnove; co takto rozlisit nejde, se nemaze a migrace skonci
+    Rizeni = apps.get_model('hlidac', 'Rizeni')
+    znacky = (
+        Rizeni.objects.values('spisova_znacka')
+        .annotate(pocet=Count('id'))
+        .filter(pocet__gt=1)
+        .values_list('spisova_znacka', flat=True)
+    )
+    smazat, doplnit, konflikty = [], {}, []
+    for znacka in znacky:
+        podle_org = defaultdict(list)
+        for rizeni in Rizeni.objects.filter(spisova_znacka=znacka).order_by('pk'):
+            podle_org[_org(rizeni)].append(rizeni)
+        podle_soudu = defaultdict(list)
+        for org, stejna in podle_org.items():
+            if len({rizeni.soud for rizeni in stejna if rizeni.soud}) > 1:
+                konflikty.extend(stejna)
+                continue
+            stejna.sort(key=lambda rizeni: (not rizeni.soud, rizeni.pk))
+            smazat.extend(rizeni.pk for rizeni in stejna[1:])
+            podle_soudu[stejna[0].soud].append((org, stejna[0]))
+        for soud, ruzna in podle_soudu.items():
+            if len(ruzna) == 1:
+                continue
+            if soud or any(not isinstance(org, str) for org, _ in ruzna):
+                konflikty.extend(rizeni for _, rizeni in ruzna)
+                continue
+            for org, rizeni in ruzna:
+                doplnit[rizeni.pk] = org
+    if konflikty:
+        raise RuntimeError(
+            'Řízení se stejnou spisovou značkou a soudem nejde rozlišit, '
+            'před migrací je opravte nebo smažte:\n'
+            + '\n'.join(
+                f'{rizeni.pk} {rizeni.spisova_znacka} {rizeni.soud!r} {rizeni.url}'
+                for rizeni in konflikty
+            )
+        )
+    Rizeni.objects.filter(pk__in=smazat).delete()
+    for pk, org in doplnit.items():
+        Rizeni.objects.filter(pk=pk).update(soud=org)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0012_rizeni_indexy_seznamu'),
+    ]
+
+    operations = [
+        migrations.RunPython(odstranit_duplicity, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='rizeni',
+            constraint=models.UniqueConstraint(fields=('spisova_znacka', 'soud'), name='unique_rizeni'),
+        ),
+    ]
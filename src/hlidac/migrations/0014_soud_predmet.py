@@ -0,0 +1,127 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def naplnit_ciselniky(apps, schema_editor):
+    Rizeni = apps.get_model('hlidac', 'Rizeni')
+    for pole, model in (('soud', 'Soud'), ('predmet', 'Predmet')):
+        Ciselnik = apps.get_model('hlidac', model)
+        nazvy = Rizeni.objects.values_list(f'{pole}_nazev', flat=True).distinct()
+        for nazev in nazvy:
+            if pole == 'predmet' and not nazev:
+                continue
+            polozka = Ciselnik.objects.create(nazev=nazev)
+            Rizeni.objects.filter(**{f'{pole}_nazev': nazev}).update(**{pole: polozka})
+
+
+def vratit_nazvy(apps, schema_editor):
+    Rizeni = apps.get_model('hlidac', 'Rizeni')
+    for pole, model in (('soud', 'Soud'), ('predmet', 'Predmet')):
+        Ciselnik = apps.get_model('hlidac', model)
+        for polozka in Ciselnik.objects.all():
+            Rizeni.objects.filter(**{pole: polozka}).update(**{f'{pole}_nazev': polozka.nazev})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0013_rizeni_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Predmet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nazev', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'předměty',
+                'ordering': ['nazev'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Soud',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nazev', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'soudy',
+                'ordering': ['nazev'],
+                'abstract': False,
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='rizeni',
+            name='unique_rizeni',
+        ),
+        migrations.RemoveIndex(
+            model_name='rizeni',
+            name='rizeni_soud_zmena',
+        ),
+        migrations.RemoveIndex(
+            model_name='rizeni',
+            name='rizeni_predmet_zmena',
+        ),
+        migrations.RenameField(
+            model_name='rizeni',
+            old_name='soud',
+            new_name='soud_nazev',
+        ),
+        migrations.RenameField(
+            model_name='rizeni',
+            old_name='predmet',
+            new_name='predmet_nazev',
+        ),
+        migrations.AddField(
+            model_name='rizeni',
+            name='soud',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='rizeni', to='hlidac.soud'),
+        ),
+        migrations.AddField(
+            model_name='rizeni',
+            name='predmet',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='rizeni', to='hlidac.predmet'),
+        ),
+        migrations.RunPython(naplnit_ciselniky, vratit_nazvy),
+        # pri vraceni migrace se sloupce nazvu znovu zalozi s vychozi hodnotou
+        migrations.AlterField(
+            model_name='rizeni',
+            name='soud_nazev',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='rizeni',
+            name='predmet_nazev',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.RemoveField(
+            model_name='rizeni',
+            name='soud_nazev',
+        ),
+        migrations.RemoveField(
+            model_name='rizeni',
+            name='predmet_nazev',
+        ),
+        migrations.AlterField(
+            model_name='rizeni',
+            name='soud',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='rizeni', to='hlidac.soud'),
+        ),
+        migrations.AddConstraint(
+            model_name='rizeni',
+            constraint=models.UniqueConstraint(fields=('spisova_znacka', 'soud'), name='unique_rizeni'),
+        ),
+        migrations.AddIndex(
+            model_name='rizeni',
+            index=models.Index(fields=['soud', 'zmena_ve_spisu', 'id'], name='rizeni_soud_zmena'),
+        ),
+        migrations.AddIndex(
+            model_name='rizeni',
+            index=models.Index(fields=['predmet', 'zmena_ve_spisu', 'id'], name='rizeni_predmet_zmena'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 3.2.25 on 2026-10-18 14:05
+
+import re
+
+from django.db import migrations, models
+
+# kopie hlidac.spisova_znacka v dobe migrace, migrace nesmi zaviset na
+# pozdejsich zmenach aplikace
+SPISOVA_ZNACKA_RE = re.compile(
+    r'^\s*(?P<senat>\d+)[\s-]+(?P<rejstrik>[^\W\d_]+(?:[\s-]+[^\W\d_]+)*)[\s-]+'
+    r'(?P<cislo>\d+)\s*[/-]\s*(?P<rocnik>\d{4})\s*$'
+)
+
+
+def rozlozit_znacky(apps, schema_editor):
+    Rizeni = apps.get_model('hlidac', 'Rizeni')
+    zmenena = []
+    for rizeni in Rizeni.objects.only('spisova_znacka').iterator():
+        match = SPISOVA_ZNACKA_RE.match(rizeni.spisova_znacka)
+        if match:
+            rizeni.senat = int(match['senat'])
+            rizeni.rejstrik = ' '.join(re.split(r'[\s-]+', match['rejstrik'])).upper()
+            rizeni.cislo = int(match['cislo'])
+            rizeni.rocnik = int(match['rocnik'])
+            zmenena.append(rizeni)
+    Rizeni.objects.bulk_update(zmenena, ['senat', 'rejstrik', 'cislo', 'rocnik'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0014_soud_predmet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rizeni',
+            name='cislo',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='rizeni',
+            name='rejstrik',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='rizeni',
+            name='rocnik',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='rizeni',
+            name='senat',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(rozlozit_znacky, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='rizeni',
+            index=models.Index(fields=['senat', 'rejstrik', 'rocnik', 'cislo'], name='rizeni_znacka'),
+        ),
+    ]
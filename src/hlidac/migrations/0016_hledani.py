@@ -0,0 +1,84 @@
+# Generated by Django 3.2.25 on 2026-10-18 15:10
+
+from django.db import migrations
+
+TABULKY = ('hlidac_soud', 'hlidac_predmet')
+
+POSTGRESQL = [
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    # unaccent neni IMMUTABLE, do indexu musi jit pres obalovou funkci
+    "CREATE OR REPLACE FUNCTION hlidac_unaccent(text) RETURNS text AS "
+    "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT",
+] + [
+    sql
+    for tabulka in TABULKY
+    for sql in (
+        f"CREATE INDEX {tabulka}_hledani ON {tabulka} "
+        f"USING gin (to_tsvector('simple', hlidac_unaccent(nazev)))",
+        f"CREATE INDEX {tabulka}_trigramy ON {tabulka} "
+        f"USING gin (hlidac_unaccent(lower(nazev)) gin_trgm_ops)",
+    )
+]
+
+POSTGRESQL_ZPET = [
+    f'DROP INDEX IF EXISTS {tabulka}_{index}'
+    for tabulka in TABULKY
+    for index in ('hledani', 'trigramy')
+] + ['DROP FUNCTION IF EXISTS hlidac_unaccent(text)']
+
+# FTS5 tabulka bere obsah z ciselniku a udrzuji ji triggery, takze funguje
+# i pro bulk_create; pri prestavbe tabulky ciselniku schema editorem SQLite
+# triggery zaniknou a je nutne je zalozit znovu
+SQLITE = [
+    sql
+    for tabulka in TABULKY
+    for sql in (
+        f"CREATE VIRTUAL TABLE {tabulka}_fts USING fts5(nazev, "
+        f"content='{tabulka}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {tabulka}_fts_insert AFTER INSERT ON {tabulka} BEGIN "
+        f"INSERT INTO {tabulka}_fts (rowid, nazev) VALUES (new.id, new.nazev); END",
+        f"CREATE TRIGGER {tabulka}_fts_delete AFTER DELETE ON {tabulka} BEGIN "
+        f"INSERT INTO {tabulka}_fts ({tabulka}_fts, rowid, nazev) "
+        f"VALUES ('delete', old.id, old.nazev); END",
+        f"CREATE TRIGGER {tabulka}_fts_update AFTER UPDATE ON {tabulka} BEGIN "
+        f"INSERT INTO {tabulka}_fts ({tabulka}_fts, rowid, nazev) "
+        f"VALUES ('delete', old.id, old.nazev); "
+        f"INSERT INTO {tabulka}_fts (rowid, nazev) VALUES (new.id, new.nazev); END",
+        f"INSERT INTO {tabulka}_fts ({tabulka}_fts) VALUES ('rebuild')",
+    )
+]
+
+SQLITE_ZPET = [
+    sql
+    for tabulka in TABULKY
+    for sql in (
+        f'DROP TRIGGER IF EXISTS {tabulka}_fts_insert',
+        f'DROP TRIGGER IF EXISTS {tabulka}_fts_delete',
+        f'DROP TRIGGER IF EXISTS {tabulka}_fts_update',
+        f'DROP TABLE IF EXISTS {tabulka}_fts',
+    )
+]
+
+
+def provest(prikazy):
+    def provest(apps, schema_editor):
+        for sql in prikazy.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+    return provest
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0015_rizeni_znacka'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            provest({'postgresql': POSTGRESQL, 'sqlite': SQLITE}),
+            provest({'postgresql': POSTGRESQL_ZPET, 'sqlite': SQLITE_ZPET}),
+        ),
+    ]
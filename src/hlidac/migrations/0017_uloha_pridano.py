@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0016_hledani'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uloha',
+            name='stav',
+            field=models.CharField(choices=[('ceka', 'Čeká na zpracování'), ('bezi', 'Zpracovává se'), ('hotovo', 'Hotovo'), ('chyba', 'Chyba'), ('pridano', 'Řízení přidáno')], default='ceka', max_length=10),
+        ),
+    ]
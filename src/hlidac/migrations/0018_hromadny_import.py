@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hlidac', '0017_uloha_pridano'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HromadnyImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('soubor', models.CharField(blank=True, max_length=255)),
+                ('vytvoreno', models.DateTimeField(auto_now_add=True)),
+                ('odmitnute', models.JSONField(blank=True, default=list)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='uloha',
+            name='hromadny_import',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ulohy', to='hlidac.hromadnyimport'),
+        ),
+    ]
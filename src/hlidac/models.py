@@ -1,25 +1,239 @@
+from abc import ABC, abstractmethod
 from datetime import date
 
-from django.db import models
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.db.models import DurationField, ExpressionWrapper, F, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import make_aware
+
+from hlidac import metriky, parser
+from hlidac.spisova_znacka import SpisovaZnacka
+
+BATCH_SIZE = 1000
+FAZETY_CACHE_KEY = "hlidac:fazety"
+
+
+def zneplatnit_fazety():
+    cache.delete(FAZETY_CACHE_KEY)
+
+
+class CiselnikManager(models.Manager):
+    def podle_nazvu(self, nazvy):
+        # ciselniky jsou male a pribyva v nich malo, chybejici nazvy se
+        # zalozi hromadne
+        nazvy = set(nazvy)
+        polozky = {polozka.nazev: polozka for polozka in self.filter(nazev__in=nazvy)}
+        chybejici = nazvy - polozky.keys()
+        if chybejici:
+            self.bulk_create(
+                [self.model(nazev=nazev) for nazev in chybejici],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            polozky.update(
+                (polozka.nazev, polozka) for polozka in self.filter(nazev__in=chybejici)
+            )
+        return polozky
+
+
+class Ciselnik(models.Model):
+    nazev = models.CharField(max_length=100, unique=True)
+
+    objects = CiselnikManager()
+
+    class Meta:
+        abstract = True
+        ordering = ["nazev"]
+
+    def __str__(self):
+        return self.nazev
+
+
+class Soud(Ciselnik):
+    class Meta(Ciselnik.Meta):
+        verbose_name_plural = "soudy"
+
+
+class Predmet(Ciselnik):
+    class Meta(Ciselnik.Meta):
+        verbose_name_plural = "předměty"
+
+
+class RizeniQuerySet(models.QuerySet):
+    def s_delkou(self):
+        return self.annotate(
+            delka=ExpressionWrapper(
+                Coalesce(F("datum_skonceni"), Value(date.today()))
+                - F("datum_zahajeni"),
+                output_field=DurationField(),
+            )
+        )
+
+    def podle_znacky(self, znacka):
+        # hleda podle slozek znacky v indexu rizeni_znacka, takze nezalezi
+        # na zapisu (62 NC 1/2019, 62-Nc-1-2019)
+        if not isinstance(znacka, SpisovaZnacka):
+            znacka = SpisovaZnacka.parse(znacka)
+        return self.filter(**znacka._asdict())
+
+    @metriky.mereno("upsert")
+    def upsert(self, objs, batch_size=BATCH_SIZE):
+        # INSERT ... ON CONFLICT umi shodne PostgreSQL i SQLite od verze 3.24,
+        # Django 3.2 ho v bulk_create jeste nema; existujici rizeni se paruji
+        # podle spisove znacky a soudu a prepisi se jen AKTUALIZOVANA_POLE,
+        # adresa a plan kontrol zustavaji
+        objs = list(objs)
+        if not objs:
+            return objs
+        ulozit_ciselniky(objs)
+        for obj in objs:
+            obj.rozlozit_znacku()
+        # stejne rizeni nesmi byt v jednom prikazu dvakrat, ulozi se posledni
+        jedinecne = list(
+            {(obj.spisova_znacka, obj.soud_id): obj for obj in objs}.values()
+        )
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        opts = self.model._meta
+        fields = [f for f in opts.concrete_fields if not f.primary_key]
+        klic = ", ".join(
+            quote_name(opts.get_field(name).column)
+            for name in ("spisova_znacka", "soud")
+        )
+        update = ", ".join(
+            f"{quote_name(column)} = EXCLUDED.{quote_name(column)}"
+            for column in (
+                opts.get_field(name).column for name in self.model.AKTUALIZOVANA_POLE
+            )
+        )
+        radek = f"({', '.join(['%s'] * len(fields))})"
+        batch_size = min(batch_size, connection.ops.bulk_batch_size(fields, jedinecne))
+        with connection.cursor() as cursor:
+            for start in range(0, len(jedinecne), batch_size):
+                batch = jedinecne[start : start + batch_size]
+                params = []
+                for obj in batch:
+                    obj.ukoncene = bool(obj.datum_skonceni)
+                    params += [
+                        f.get_db_prep_save(f.pre_save(obj, True), connection)
+                        for f in fields
+                    ]
+                cursor.execute(
+                    f"INSERT INTO {quote_name(opts.db_table)} "
+                    f"({', '.join(quote_name(f.column) for f in fields)}) "
+                    f"VALUES {', '.join([radek] * len(batch))} "
+                    f"ON CONFLICT ({klic}) DO UPDATE SET {update}",
+                    params,
+                )
+
+        # primarni klice se dohledaji, RETURNING nema SQLite do verze 3.35
+        pks = {}
+        for start in range(0, len(jedinecne), batch_size):
+            batch = jedinecne[start : start + batch_size]
+            for pk, spisova_znacka, soud_id in self.filter(
+                spisova_znacka__in={obj.spisova_znacka for obj in batch},
+                soud__in={obj.soud_id for obj in batch},
+            ).values_list("pk", "spisova_znacka", "soud"):
+                pks[spisova_znacka, soud_id] = pk
+        for obj in objs:
+            obj.pk = pks[obj.spisova_znacka, obj.soud_id]
+        zneplatnit_fazety()
+        return objs
 
 
 class Rizeni(models.Model):
     spisova_znacka = models.CharField(max_length=20)
-    predmet = models.CharField(max_length=100)
+    # slozky spisove znacky, u znacky v neznamem tvaru zustanou prazdne
+    senat = models.PositiveIntegerField(null=True, blank=True)
+    rejstrik = models.CharField(max_length=20, blank=True)
+    cislo = models.PositiveIntegerField(null=True, blank=True)
+    rocnik = models.PositiveSmallIntegerField(null=True, blank=True)
+    predmet = models.ForeignKey(
+        Predmet,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="rizeni",
+    )
     url = models.URLField()
     zmena_ve_spisu = models.DateTimeField()
     ukoncene = models.BooleanField()
     datum_zahajeni = models.DateField()
     datum_skonceni = models.DateField(null=True, blank=True)
     probehlo_odvolani = models.BooleanField(null=True, blank=True)
-    soud = models.CharField(max_length=100)
+    soud = models.ForeignKey(Soud, on_delete=models.PROTECT, related_name="rizeni")
+    stav = models.CharField(max_length=200, blank=True)
+    pristi_kontrola = models.DateTimeField(null=True, blank=True)
+
+    objects = RizeniQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["spisova_znacka", "soud"], name="unique_rizeni"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["pristi_kontrola"], name="rizeni_pristi_kontrola"),
+            # vyhledani podle znacky i dotazy typu senat 62, rejstrik NC, rok 2019
+            models.Index(
+                fields=["senat", "rejstrik", "rocnik", "cislo"], name="rizeni_znacka"
+            ),
+            # seznam rizeni se strankuje podle posledni zmeny a id
+            models.Index(fields=["zmena_ve_spisu", "id"], name="rizeni_zmena"),
+            models.Index(
+                fields=["soud", "zmena_ve_spisu", "id"], name="rizeni_soud_zmena"
+            ),
+            models.Index(
+                fields=["predmet", "zmena_ve_spisu", "id"], name="rizeni_predmet_zmena"
+            ),
+            models.Index(
+                fields=["ukoncene", "zmena_ve_spisu", "id"],
+                name="rizeni_ukoncene_zmena",
+            ),
+        ]
+
+    AKTUALIZOVANA_POLE = [
+        "spisova_znacka",
+        "senat",
+        "rejstrik",
+        "cislo",
+        "rocnik",
+        "soud",
+        "predmet",
+        "zmena_ve_spisu",
+        "datum_zahajeni",
+        "datum_skonceni",
+        "ukoncene",
+        "probehlo_odvolani",
+        "stav",
+    ]
 
     def __str__(self):
         return self.spisova_znacka
 
     def save(self, *args, **kwargs):
         self.ukoncene = bool(self.datum_skonceni)
+        self.rozlozit_znacku()
+        ulozit_ciselniky([self])
         super().save(*args, **kwargs)
+        zneplatnit_fazety()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        zneplatnit_fazety()
+        return result
+
+    def rozlozit_znacku(self):
+        # znacka se ulozi ve tvaru 62 NC 2528 / 2019, aby jedinecnost podle
+        # spisove znacky a soudu nezavisela na zapisu
+        znacka = SpisovaZnacka.parse_or_none(self.spisova_znacka)
+        if znacka:
+            self.spisova_znacka = str(znacka)
+            self.senat, self.rejstrik, self.cislo, self.rocnik = znacka
+        else:
+            self.senat, self.rejstrik, self.cislo, self.rocnik = None, "", None, None
 
     @property
     def delka_rizeni(self):
@@ -28,3 +242,332 @@ class Rizeni(models.Model):
         else:
             konec = date.today()
         return konec - self.datum_zahajeni
+
+    def aktualizovat(self, rizeni):
+        self.spisova_znacka = rizeni.spisova_znacka
+        # ciselniky se dohledaji hromadne v ulozit_ciselniky
+        self.soud = Soud(nazev=rizeni.soud)
+        if rizeni.predmet_rizeni:
+            self.predmet = Predmet(nazev=rizeni.predmet_rizeni)
+        else:
+            self.predmet = None
+        self.zmena_ve_spisu = make_aware(rizeni.posledni_zmena)
+        self.datum_zahajeni = rizeni.zahajeni.datum
+        if rizeni.skonceni:
+            self.datum_skonceni = rizeni.skonceni.datum
+        else:
+            self.datum_skonceni = None
+        self.ukoncene = bool(self.datum_skonceni)
+        self.probehlo_odvolani = rizeni.probehlo_odvolani
+        self.stav = rizeni.stav_rizeni
+
+
+def ulozit_ciselniky(rizeni_list):
+    # neulozene soudy a predmety nastavene v Rizeni.aktualizovat se nahradi
+    # zaznamy z ciselniku
+    for name, model in (("soud", Soud), ("predmet", Predmet)):
+        field = Rizeni._meta.get_field(name)
+        neulozene = [
+            rizeni
+            for rizeni in rizeni_list
+            if getattr(rizeni, field.attname) is None
+            and field.get_cached_value(rizeni, None) is not None
+        ]
+        if not neulozene:
+            continue
+        polozky = model.objects.podle_nazvu(
+            field.get_cached_value(rizeni).nazev for rizeni in neulozene
+        )
+        for rizeni in neulozene:
+            setattr(rizeni, name, polozky[field.get_cached_value(rizeni).nazev])
+
+
+class SynchronizaceManager(models.Manager, ABC):
+    # polozky rizeni se zapisuji hromadne pro vice rizeni najednou, existujici
+    # zaznamy se paruji podle key_fields a prepisuji jen pri zmene update_fields
+    key_fields = ()
+    update_fields = ()
+
+    @abstractmethod
+    def from_parsed(self, rizeni, polozka):
+        pass
+
+    def synchronizovat(self, dvojice, batch_size=BATCH_SIZE):
+        dvojice = list(dvojice)
+        nove = {}
+        for rizeni, polozky in dvojice:
+            for polozka in polozky:
+                obj = self.from_parsed(rizeni, polozka)
+                nove[self._key(obj)] = obj
+
+        existujici = {
+            self._key(obj): obj
+            for obj in self.filter(rizeni__in=[rizeni for rizeni, _ in dvojice])
+        }
+        create = []
+        update = []
+        for key, obj in nove.items():
+            puvodni = existujici.pop(key, None)
+            if puvodni is None:
+                create.append(obj)
+            elif any(
+                getattr(puvodni, name) != getattr(obj, name)
+                for name in self.update_fields
+            ):
+                obj.pk = puvodni.pk
+                update.append(obj)
+
+        self.bulk_create(create, batch_size=batch_size, ignore_conflicts=True)
+        if update:
+            self.bulk_update(update, self.update_fields, batch_size=batch_size)
+        if existujici:
+            self.filter(pk__in=[obj.pk for obj in existujici.values()]).delete()
+
+    def _key(self, obj):
+        return tuple(getattr(obj, name) for name in self.key_fields)
+
+
+class UdalostManager(SynchronizaceManager):
+    key_fields = ("rizeni_id", "druh", "poradi")
+    update_fields = ("nazev", "datum", "url")
+
+    def from_parsed(self, rizeni, polozka):
+        return self.model(
+            rizeni=rizeni,
+            druh=polozka.druh,
+            poradi=polozka.poradi,
+            nazev=polozka.nazev,
+            datum=polozka.datum,
+            url=polozka.url,
+        )
+
+
+class DilciRizeniManager(SynchronizaceManager):
+    key_fields = ("rizeni_id", "spisova_znacka")
+
+    def from_parsed(self, rizeni, polozka):
+        return self.model(rizeni=rizeni, spisova_znacka=polozka.spisova_znacka)
+
+
+class Udalost(models.Model):
+    rizeni = models.ForeignKey(
+        Rizeni, on_delete=models.CASCADE, related_name="udalosti"
+    )
+    druh = models.CharField(max_length=20)
+    poradi = models.PositiveIntegerField()
+    nazev = models.CharField(max_length=100)
+    datum = models.DateField()
+    url = models.URLField(max_length=1000, blank=True)
+
+    objects = UdalostManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["rizeni", "druh", "poradi"], name="unique_udalost"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["rizeni", "druh", "datum"], name="udalost_rizeni_druh_datum"
+            ),
+        ]
+
+    def __str__(self):
+        return self.nazev
+
+
+class DilciRizeni(models.Model):
+    rizeni = models.ForeignKey(
+        Rizeni, on_delete=models.CASCADE, related_name="dilci_rizeni"
+    )
+    spisova_znacka = models.CharField(max_length=20)
+
+    objects = DilciRizeniManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["rizeni", "spisova_znacka"], name="unique_dilci_rizeni"
+            ),
+        ]
+
+    def __str__(self):
+        return self.spisova_znacka
+
+
+@metriky.mereno("ulozit_polozky")
+@transaction.atomic
+def ulozit_polozky(dvojice, batch_size=BATCH_SIZE):
+    dvojice = list(dvojice)
+    # udalost bez odkazu nema klic (druh, poradi), a proto se neuklada
+    Udalost.objects.synchronizovat(
+        [
+            (rizeni, [u for u in nactene.udalosti if u.poradi is not None])
+            for rizeni, nactene in dvojice
+        ],
+        batch_size,
+    )
+    DilciRizeni.objects.synchronizovat(
+        [(rizeni, nactene.dilci_rizeni) for rizeni, nactene in dvojice], batch_size
+    )
+
+
+class Zmena(models.Model):
+    NOVA_UDALOST = "nova_udalost"
+    ZMENA_STAVU = "zmena_stavu"
+    NOVE_DILCI_RIZENI = "nove_dilci_rizeni"
+    SKONCENI = "skonceni"
+    ODVOLANI = "odvolani"
+    DRUHY = [
+        (NOVA_UDALOST, "Nová událost"),
+        (ZMENA_STAVU, "Změna stavu řízení"),
+        (NOVE_DILCI_RIZENI, "Nové dílčí řízení"),
+        (SKONCENI, "Skončení věci"),
+        (ODVOLANI, "Odvolání"),
+    ]
+
+    rizeni = models.ForeignKey(Rizeni, on_delete=models.CASCADE, related_name="zmeny")
+    druh = models.CharField(max_length=20, choices=DRUHY)
+    popis = models.CharField(max_length=300)
+    data = models.JSONField(default=dict, blank=True)
+    vytvoreno = models.DateTimeField(auto_now_add=True)
+    odeslano = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["odeslano", "vytvoreno"], name="zmena_odeslano_vytvoreno"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.rizeni}: {self.popis}"
+
+    def to_dict(self):
+        return {
+            "id": self.pk,
+            "rizeni": self.rizeni_id,
+            "spisova_znacka": self.rizeni.spisova_znacka,
+            "url": self.rizeni.url,
+            "druh": self.druh,
+            "popis": self.popis,
+            "data": self.data,
+            "vytvoreno": self.vytvoreno.isoformat(),
+        }
+
+
+class SlovnikKomprese(models.Model):
+    kodek = models.CharField(max_length=10)
+    data = models.BinaryField()
+    vytvoreno = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kodek} {self.vytvoreno:%d.%m.%Y}"
+
+
+class Snimek(models.Model):
+    # stazena stranka ulozena podle hashe obsahu, stejny obsah se uklada jednou
+    hash = models.CharField(max_length=64, primary_key=True)
+    kodek = models.CharField(max_length=10)
+    slovnik = models.ForeignKey(
+        SlovnikKomprese, on_delete=models.PROTECT, null=True, blank=True
+    )
+    data = models.BinaryField()
+    velikost = models.PositiveIntegerField()
+    vytvoreno = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.hash
+
+
+class StazenaStranka(models.Model):
+    url = models.URLField(max_length=1000, unique=True)
+    etag = models.CharField(max_length=200, blank=True)
+    last_modified = models.CharField(max_length=100, blank=True)
+    hash_obsahu = models.CharField(max_length=64)
+    stazeno = models.DateTimeField(auto_now=True)
+    snimek = models.ForeignKey(Snimek, on_delete=models.SET_NULL, null=True, blank=True)
+
+    def __str__(self):
+        return self.url
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def stejna_jako(self, other):
+        return other is not None and (
+            self.etag,
+            self.last_modified,
+            self.hash_obsahu,
+            self.snimek_id,
+        ) == (other.etag, other.last_modified, other.hash_obsahu, other.snimek_id)
+
+
+class HromadnyImport(models.Model):
+    soubor = models.CharField(max_length=255, blank=True)
+    vytvoreno = models.DateTimeField(auto_now_add=True)
+    # radky odmitnute uz pri zarazeni do fronty (chybny zapis, duplicita)
+    odmitnute = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return self.soubor or f"Import {self.pk}"
+
+    def pocty(self) -> dict:
+        return dict(
+            self.ulohy.order_by().values_list("stav").annotate(pocet=models.Count("pk"))
+        )
+
+
+class Uloha(models.Model):
+    CEKA = "ceka"
+    BEZI = "bezi"
+    HOTOVO = "hotovo"
+    CHYBA = "chyba"
+    PRIDANO = "pridano"
+    STAVY = [
+        (CEKA, "Čeká na zpracování"),
+        (BEZI, "Zpracovává se"),
+        (HOTOVO, "Hotovo"),
+        (CHYBA, "Chyba"),
+        (PRIDANO, "Řízení přidáno"),
+    ]
+
+    url = models.URLField(max_length=1000)
+    stav = models.CharField(max_length=10, choices=STAVY, default=CEKA)
+    vysledek = models.JSONField(null=True, blank=True)
+    chyba = models.TextField(blank=True)
+    vytvoreno = models.DateTimeField(auto_now_add=True)
+    zahajeno = models.DateTimeField(null=True, blank=True)
+    dokonceno = models.DateTimeField(null=True, blank=True)
+    # uloha hromadneho importu prida rizeni bez nahledu
+    hromadny_import = models.ForeignKey(
+        HromadnyImport,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="ulohy",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["stav", "vytvoreno"], name="uloha_stav_vytvoreno")
+        ]
+
+    def __str__(self):
+        return self.url
+
+    @property
+    def dokoncena(self):
+        return self.stav in (self.HOTOVO, self.CHYBA, self.PRIDANO)
+
+    @property
+    def rizeni(self):
+        if self.vysledek is None:
+            return None
+        return parser.Rizeni.from_dict(self.vysledek)
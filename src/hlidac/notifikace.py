@@ -0,0 +1,92 @@
+from abc import ABC, abstractmethod
+from itertools import groupby
+from typing import List
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail import send_mass_mail
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from hlidac.fetcher import Fetcher
+from hlidac.models import Zmena
+
+# HLIDAC_NOTIFIKATORY = [
+#     {"BACKEND": "hlidac.notifikace.EmailNotifikator", "OPTIONS": {"prijemci": [...]}},
+#     {"BACKEND": "hlidac.notifikace.WebhookNotifikator", "OPTIONS": {"url": "..."}},
+# ]
+VYCHOZI_NOTIFIKATORY = [{"BACKEND": "hlidac.notifikace.EmailNotifikator"}]
+
+
+class Notifikator(ABC):
+    @abstractmethod
+    def odeslat(self, zmeny: List[Zmena]):
+        pass
+
+
+class EmailNotifikator(Notifikator):
+    def __init__(self, prijemci=None, odesilatel=None):
+        self.prijemci = prijemci or [email for _, email in settings.ADMINS]
+        self.odesilatel = odesilatel
+        if not self.prijemci:
+            # bez prijemcu by se zmeny oznacily jako odeslane a ztratily
+            raise ImproperlyConfigured(
+                "EmailNotifikator nemá příjemce, nastavte ADMINS nebo prijemci"
+            )
+
+    def odeslat(self, zmeny: List[Zmena]):
+        # jeden e-mail za kazde rizeni
+        zpravy = []
+        zmeny = sorted(zmeny, key=lambda zmena: zmena.rizeni_id)
+        for rizeni, zmeny_rizeni in groupby(zmeny, key=lambda zmena: zmena.rizeni):
+            text = "\n".join(f"- {zmena.popis}" for zmena in zmeny_rizeni)
+            zpravy.append(
+                (
+                    f"Změna ve spisu {rizeni.spisova_znacka}",
+                    f"{text}\n\n{rizeni.url}\n",
+                    self.odesilatel,
+                    self.prijemci,
+                )
+            )
+        send_mass_mail(zpravy)
+
+
+class WebhookNotifikator(Notifikator):
+    def __init__(self, url, fetcher=None):
+        self.url = url
+        self.fetcher = fetcher or Fetcher()
+
+    def odeslat(self, zmeny: List[Zmena]):
+        self.fetcher.post(
+            self.url, json={"zmeny": [zmena.to_dict() for zmena in zmeny]}
+        )
+
+
+def get_notifikatory() -> List[Notifikator]:
+    notifikatory = []
+    for config in getattr(settings, "HLIDAC_NOTIFIKATORY", VYCHOZI_NOTIFIKATORY):
+        notifikator_class = import_string(config["BACKEND"])
+        notifikatory.append(notifikator_class(**config.get("OPTIONS", {})))
+    return notifikatory
+
+
+def odeslat_notifikace(notifikatory=None, batch_size=500) -> int:
+    # zmeny slouzi jako fronta, odeslana zmena dostane cas odeslani; pokud
+    # nektery notifikator selze, zustane davka neodeslana a odesle se znovu
+    # pri dalsim spusteni
+    notifikatory = get_notifikatory() if notifikatory is None else notifikatory
+    odeslano = 0
+    while True:
+        zmeny = list(
+            Zmena.objects.filter(odeslano__isnull=True)
+            .select_related("rizeni")
+            .order_by("vytvoreno", "pk")[:batch_size]
+        )
+        if not zmeny:
+            return odeslano
+        for notifikator in notifikatory:
+            notifikator.odeslat(zmeny)
+        Zmena.objects.filter(pk__in=[zmena.pk for zmena in zmeny]).update(
+            odeslano=timezone.now()
+        )
+        odeslano += len(zmeny)
@@ -1,12 +1,18 @@
+import hashlib
+import os
 import re
 from dataclasses import dataclass, field
 from datetime import date, datetime
+from functools import cached_property
 from typing import List, Optional, Union
 from urllib.parse import parse_qs, urljoin, urlsplit
 
-import requests
+import lxml.html
+from lxml import etree
 from pyquery import PyQuery
 
+from hlidac import metriky
+from hlidac.fetcher import AsyncFetcher, Fetcher, get_default_fetcher
 
 INFOSOUD_URL = "https://infosoud.justice.cz/InfoSoud/public/"
 
@@ -14,6 +20,18 @@ DRUH_ZAHAJENI = "ZAHAJ_RIZ"
 DRUH_SKONCENI = "ST_VEC_ODS"
 DRUH_ODVOLANI = "ODVOLANI"
 
+DATETIME_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+BACKEND_PYQUERY = "pyquery"
+BACKEND_LXML = "lxml"
+BACKENDS = (BACKEND_PYQUERY, BACKEND_LXML)
+DEFAULT_BACKEND = os.environ.get("HLIDAC_PARSER_BACKEND", BACKEND_PYQUERY)
+
+# casti stranky, ktere se meni s kazdym stazenim, i kdyz se spis nezmenil
+PROMENLIVY_OBSAH_RE = re.compile(
+    r";jsessionid=[\w.-]+|(?<=<br>)\s*\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2}"
+)
+
 
 @dataclass
 class Udalost:
@@ -25,15 +43,30 @@ class Udalost:
     def absolute_url(self):
         return urljoin(INFOSOUD_URL, self.url).replace(" ", "%20")
 
-    @property
-    def druh(self):
-        parts = urlsplit(self.url)
-        return parse_qs(parts.query)["druhUdalosti"][0]
+    # parametry odkazu se rozeberou jednou, adresa udalosti se po nacteni nemeni;
+    # udalost bez odkazu (url None) nema druh ani poradi
+    @cached_property
+    def _query(self):
+        return parse_qs(urlsplit(self.url or "").query)
+
+    @cached_property
+    def druh(self) -> Optional[str]:
+        return self._query.get("druhUdalosti", [None])[0]
+
+    @cached_property
+    def poradi(self) -> Optional[int]:
+        poradi = self._query.get("poradiUdalosti")
+        return int(poradi[0]) if poradi else None
 
 
 @dataclass
 class DilciRizeni:
     spisova_znacka: str
+    url: str = field(default="", compare=False, repr=False)
+
+    @property
+    def absolute_url(self):
+        return urljoin(INFOSOUD_URL, self.url).replace(" ", "%20")
 
 
 @dataclass
@@ -48,7 +81,10 @@ class Rizeni:
     cas_aktualizace: Optional[datetime] = None
 
     def udalosti_podle_druhu(self, druh) -> List[Udalost]:
-        return list(filter(lambda x: x.druh == druh, self.udalosti))
+        # druh je memoizovany na udalosti, vyber je jen pruchod seznamem bez
+        # rozebirani adres; seznam udalosti jde menit na miste, proto se
+        # vysledek necachuje
+        return [udalost for udalost in self.udalosti if udalost.druh == druh]
 
     @property
     def zahajeni(self) -> Udalost:
@@ -76,23 +112,75 @@ class Rizeni:
     def probehlo_odvolani(self):
         return bool(self.udalosti_podle_druhu(DRUH_ODVOLANI))
 
-    def set_predmet_rizeni(self):
-        response = requests.get(self.zahajeni.absolute_url)
-        response.raise_for_status()
+    def set_predmet_rizeni(self, fetcher: Optional[Fetcher] = None):
+        fetcher = fetcher or get_default_fetcher()
+        response = fetcher.get(self.zahajeni.absolute_url)
         self.predmet_rizeni = parse_predmet_rizeni(response.text)
 
+    async def set_predmet_rizeni_async(self, fetcher: AsyncFetcher):
+        response = await fetcher.get(self.zahajeni.absolute_url)
+        self.predmet_rizeni = parse_predmet_rizeni(response.text)
+
+    def to_dict(self) -> dict:
+        return {
+            "spisova_znacka": self.spisova_znacka,
+            "soud": self.soud,
+            "stav_rizeni": self.stav_rizeni,
+            "udalosti": [
+                {"nazev": u.nazev, "datum": u.datum.isoformat(), "url": u.url}
+                for u in self.udalosti
+            ],
+            "dilci_rizeni": [
+                {"spisova_znacka": d.spisova_znacka, "url": d.url}
+                for d in self.dilci_rizeni
+            ],
+            "predmet_rizeni": self.predmet_rizeni,
+            "posledni_zmena": _isoformat(self.posledni_zmena),
+            "cas_aktualizace": _isoformat(self.cas_aktualizace),
+        }
+
+    @classmethod
+    def from_dict(cls, data) -> "Rizeni":
+        return cls(
+            spisova_znacka=data["spisova_znacka"],
+            soud=data["soud"],
+            stav_rizeni=data["stav_rizeni"],
+            udalosti=[
+                Udalost(u["nazev"], date.fromisoformat(u["datum"]), u["url"])
+                for u in data["udalosti"]
+            ],
+            dilci_rizeni=[
+                DilciRizeni(d["spisova_znacka"], d["url"]) for d in data["dilci_rizeni"]
+            ],
+            predmet_rizeni=data["predmet_rizeni"],
+            posledni_zmena=_fromisoformat(data["posledni_zmena"]),
+            cas_aktualizace=_fromisoformat(data["cas_aktualizace"]),
+        )
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _fromisoformat(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
 
 class SpisovaZnackaNeexistujeError(Exception):
     pass
 
 
-def parse_rizeni(html) -> Rizeni:
+@metriky.mereno("parse_rizeni")
+def parse_rizeni(html, backend=None) -> Rizeni:
     neexituje_re = re.search(r"Hledaná spisová značka ([\w\s\/]+) neexistuje", html)
     if neexituje_re:
         raise SpisovaZnackaNeexistujeError(
             f"Spisová značka {neexituje_re.group(1)} neexistuje"
         )
 
+    if _get_backend(backend) == BACKEND_LXML:
+        return _parse_rizeni_lxml(html)
+
     query = PyQuery(html)
     prefix = "td.body > table > tr > td > table"
     content = query(prefix)
@@ -100,40 +188,27 @@ def parse_rizeni(html) -> Rizeni:
     soud = content.children(
         "tr:nth-child(3) > td table tr td span.body-vyrazny-text"
     ).text()
-    stav = content.children("tr:nth-child(4) > td").text().split(":")[1].strip()
+    stav = content.children("tr:nth-child(4) > td").text()
     prubeh = content.children("tr:nth-child(7) > td > table").children("tr")
+    zmeny = content.children(
+        "tr:nth-child(9) > td > table > tr > td:nth-child(2)"
+    ).text()
 
-    parts = (
-        content.children("tr:nth-child(9) > td > table > tr > td:nth-child(2)")
-        .text()
-        .split()
-    )
-    posledni_zmena = datetime.strptime(f"{parts[0]} {parts[1]}", "%d.%m.%Y %H:%M:%S")
-    cas_aktualizace = datetime.strptime(f"{parts[2]} {parts[3]}", "%d.%m.%Y %H:%M:%S")
-
-    rizeni = Rizeni(
-        spisova_znacka=spisova_znacka,
-        soud=soud,
-        stav_rizeni=stav,
-        posledni_zmena=posledni_zmena,
-        cas_aktualizace=cas_aktualizace,
-    )
-
+    rizeni = _create_rizeni(spisova_znacka, soud, stav, zmeny)
     for polozka in prubeh[1:]:
-        ret = parse_udalost(polozka)
-        if isinstance(ret, Udalost):
-            rizeni.udalosti.append(ret)
-        elif isinstance(ret, DilciRizeni):
-            rizeni.dilci_rizeni.append(ret)
-
+        _add_udalost(rizeni, parse_udalost(polozka, backend=BACKEND_PYQUERY))
     return rizeni
 
 
-def parse_udalost(elem) -> Union[DilciRizeni, Udalost]:
+@metriky.mereno("parse_udalost")
+def parse_udalost(elem, backend=None) -> Union[DilciRizeni, Udalost]:
+    if _get_backend(backend) == BACKEND_LXML:
+        return _parse_udalost_lxml(elem)
+
     udalost = PyQuery(elem)
     if "Senátní věc" in udalost.html():
-        spisova_znacka = udalost.children("td:nth-child(2) > a").text()
-        return DilciRizeni(spisova_znacka=spisova_znacka)
+        link = udalost.children("td:nth-child(2) > a")
+        return DilciRizeni(spisova_znacka=link.text(), url=link.attr("href"))
     else:
         link = udalost.children("td:first-child > a")
         url = link.attr("href")
@@ -143,20 +218,124 @@ def parse_udalost(elem) -> Union[DilciRizeni, Udalost]:
         return Udalost(typ, datum, url)
 
 
-def parse_predmet_rizeni(html):
-    query = PyQuery(html)
-    content = query("td.body > table > tr > td > table > tr:nth-child(7) > td")
-    predmet_rizeni = content.text().split(":")
+@metriky.mereno("parse_predmet_rizeni")
+def parse_predmet_rizeni(html, backend=None):
+    if _get_backend(backend) == BACKEND_LXML:
+        content = _PREDMET_XPATH(lxml.html.fromstring(html))
+        predmet_rizeni = _text(content).split(":")
+    else:
+        query = PyQuery(html)
+        content = query("td.body > table > tr > td > table > tr:nth-child(7) > td")
+        predmet_rizeni = content.text().split(":")
     assert predmet_rizeni[0].strip() == "Předmět řízení"
     return predmet_rizeni[1].strip()
 
 
-def load_from_url(url) -> Rizeni:
-    response = requests.get(url)
-    response.raise_for_status()
-    return parse_rizeni(response.text)
+def _get_backend(backend):
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Neznamy parser {backend}, k dispozici jsou {BACKENDS}")
+    return backend
+
+
+def _create_rizeni(spisova_znacka, soud, stav, zmeny) -> Rizeni:
+    parts = zmeny.split()
+    return Rizeni(
+        spisova_znacka=spisova_znacka,
+        soud=soud,
+        stav_rizeni=stav.split(":")[1].strip(),
+        posledni_zmena=datetime.strptime(f"{parts[0]} {parts[1]}", DATETIME_FORMAT),
+        cas_aktualizace=datetime.strptime(f"{parts[2]} {parts[3]}", DATETIME_FORMAT),
+    )
+
+
+def _add_udalost(rizeni, udalost):
+    if isinstance(udalost, Udalost):
+        rizeni.udalosti.append(udalost)
+    elif isinstance(udalost, DilciRizeni):
+        rizeni.dilci_rizeni.append(udalost)
+
+
+# lxml varianta prochazi strom jen predkompilovanymi XPath vyrazy bez obalovani
+# kazdeho elementu do PyQuery, vysledky musi byt shodne s PyQuery variantou
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_CONTENT = f"//td[{_has_class('body')}]/table/tr/td/table"
+_CONTENT_XPATH = etree.XPath(_CONTENT)
+_SPISOVA_ZNACKA_XPATH = etree.XPath(
+    f".//*[1][self::tr]//td//span[{_has_class('body-banner-data')}]"
+)
+_SOUD_XPATH = etree.XPath(
+    f"*[3][self::tr]/td//table//tr//td//span[{_has_class('body-vyrazny-text')}]"
+)
+_STAV_XPATH = etree.XPath("*[4][self::tr]/td")
+_PRUBEH_XPATH = etree.XPath("*[7][self::tr]/td/table/tr")
+_ZMENY_XPATH = etree.XPath("*[9][self::tr]/td/table/tr/*[2][self::td]")
+_PREDMET_XPATH = etree.XPath(f"{_CONTENT}/*[7][self::tr]/td")
+_DILCI_RIZENI_XPATH = etree.XPath("*[2][self::td]/a")
+_UDALOST_LINK_XPATH = etree.XPath("*[1][self::td]/a")
+_UDALOST_DATUM_XPATH = etree.XPath("*[2][self::td]")
+
+# HTML bile znaky dle pyquery.text, nezlomitelna mezera mezi ne nepatri
+_WHITESPACE_RE = re.compile("[\x20\x09\x0c\u200b\x0a\x0d]+")
+
+
+def _text(elements) -> str:
+    return " ".join(
+        _WHITESPACE_RE.sub(" ", elem.text_content()).strip() for elem in elements
+    )
+
+
+def _select(elements, xpath):
+    return [found for elem in elements for found in xpath(elem)]
+
+
+def _parse_rizeni_lxml(html) -> Rizeni:
+    content = _CONTENT_XPATH(lxml.html.fromstring(html))
+    rizeni = _create_rizeni(
+        _text(_select(content, _SPISOVA_ZNACKA_XPATH)),
+        _text(_select(content, _SOUD_XPATH)),
+        _text(_select(content, _STAV_XPATH)),
+        _text(_select(content, _ZMENY_XPATH)),
+    )
+    for polozka in _select(content, _PRUBEH_XPATH)[1:]:
+        _add_udalost(rizeni, parse_udalost(polozka, backend=BACKEND_LXML))
+    return rizeni
+
+
+def _parse_udalost_lxml(elem) -> Union[DilciRizeni, Udalost]:
+    if isinstance(elem, str):
+        elem = lxml.html.fragment_fromstring(elem)
+    if "Senátní věc" in elem.text_content():
+        link = _DILCI_RIZENI_XPATH(elem)
+        url = link[0].get("href") if link else None
+        return DilciRizeni(spisova_znacka=_text(link), url=url)
+    link = _UDALOST_LINK_XPATH(elem)
+    url = link[0].get("href") if link else None
+    datum_str = _text(_UDALOST_DATUM_XPATH(elem))
+    datum = datetime.strptime(datum_str, "%d.%m.%Y").date()
+    return Udalost(_text(link), datum, url)
+
+
+def content_hash(html) -> str:
+    return hashlib.sha256(PROMENLIVY_OBSAH_RE.sub("", html).encode()).hexdigest()
+
+
+@metriky.mereno("load_from_url")
+def load_from_url(url, fetcher: Optional[Fetcher] = None, backend=None) -> Rizeni:
+    fetcher = fetcher or get_default_fetcher()
+    response = fetcher.get(url)
+    return parse_rizeni(response.text, backend=backend)
+
+
+async def load_from_url_async(url, fetcher: AsyncFetcher, backend=None) -> Rizeni:
+    # parsovani je kratke a CPU vazane, bezi primo ve smycce udalosti
+    response = await fetcher.get(url)
+    return parse_rizeni(response.text, backend=backend)
 
 
-def load_from_file(filename) -> Rizeni:
+def load_from_file(filename, backend=None) -> Rizeni:
     with open(filename) as f:
-        return parse_rizeni(f.read())
+        return parse_rizeni(f.read(), backend=backend)
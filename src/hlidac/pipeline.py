@@ -0,0 +1,153 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import transaction
+
+from hlidac import metriky, parser
+from hlidac.models import BATCH_SIZE, Rizeni, ulozit_polozky
+from hlidac.serializace import RizeniZaznam
+from hlidac.spisova_znacka import SpisovaZnacka
+
+# pocet polozek, ktere se posilaji do procesu najednou, aby se rezie
+# predavani mezi procesy rozlozila
+VELIKOST_DAVKY = 16
+
+
+@dataclass
+class Vysledek:
+    zdroj: str
+    url: str = ""
+    # z procesu prichazi jako RizeniZaznam, paralelne vraci parser.Rizeni
+    rizeni: Optional[parser.Rizeni] = None
+    chyba: str = ""
+
+
+def paralelne(
+    funkce: Callable[[tuple], Tuple[str, parser.Rizeni]],
+    polozky: Iterable[tuple],
+    max_workers=None,
+    max_rozpracovanych=None,
+    initializer=None,
+    initargs=(),
+) -> Iterator[Vysledek]:
+    # polozky se ctou postupne a rozpracovanych davek je nejvys
+    # max_rozpracovanych, takze pamet nezavisi na velikosti vstupu; vysledky
+    # se vraceji v poradi dokonceni
+    max_workers = max_workers or os.cpu_count()
+    max_rozpracovanych = max_rozpracovanych or max_workers * 2
+    polozky = iter(polozky)
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        rozpracovane = set()
+        while True:
+            while len(rozpracovane) < max_rozpracovanych:
+                davka = list(islice(polozky, VELIKOST_DAVKY))
+                if not davka:
+                    break
+                rozpracovane.add(executor.submit(_zpracovat_davku, funkce, davka))
+            if not rozpracovane:
+                return
+            hotove, rozpracovane = wait(rozpracovane, return_when=FIRST_COMPLETED)
+            for future in hotove:
+                for vysledek in future.result():
+                    if vysledek.rizeni is not None:
+                        vysledek.rizeni = vysledek.rizeni.to_rizeni()
+                    yield vysledek
+
+
+def _zpracovat_davku(funkce, davka) -> List[Vysledek]:
+    # chyba jedne polozky nesmi ukoncit zpracovani ostatnich, proto se
+    # zachytava cokoliv, i assert uvnitr parseru
+    vysledky = []
+    for polozka in davka:
+        try:
+            url, rizeni = funkce(polozka)
+        except Exception as e:
+            vysledky.append(Vysledek(polozka[0], chyba=f"{type(e).__name__}: {e}"))
+        else:
+            # mezi procesy se posila kompaktni zaznam misto objektu parseru,
+            # udalosti nesou druh a poradi a jejich adresy se znovu nerozebiraji
+            vysledky.append(
+                Vysledek(polozka[0], url=url, rizeni=RizeniZaznam.from_rizeni(rizeni))
+            )
+    return vysledky
+
+
+def po_davkach(
+    vysledky: Iterable[Vysledek],
+    ulozit: Callable[[List[Vysledek]], None],
+    velikost=BATCH_SIZE,
+) -> Iterator[Vysledek]:
+    # uspesne vysledky se ukladaji po davkach, volajicimu se vraci vsechny
+    davka = []
+    for vysledek in vysledky:
+        if vysledek.rizeni:
+            davka.append(vysledek)
+            if len(davka) >= velikost:
+                ulozit(davka)
+                davka = []
+        yield vysledek
+    if davka:
+        ulozit(davka)
+
+
+@metriky.mereno("ulozit_rizeni")
+@transaction.atomic
+def ulozit_rizeni(vysledky: List[Vysledek]):
+    # rizeni se paruji podle soudu a spisove znacky, stejne rizeni muze byt
+    # ulozene s jinou adresou, nez ze ktere se nacetlo
+    predmety = {
+        (spisova_znacka, soud): predmet
+        for spisova_znacka, soud, predmet in Rizeni.objects.filter(
+            spisova_znacka__in=[
+                vysledek.rizeni.spisova_znacka for vysledek in vysledky
+            ],
+            predmet__isnull=False,
+        ).values_list("spisova_znacka", "soud__nazev", "predmet__nazev")
+    }
+    dvojice = []
+    for vysledek in vysledky:
+        klic = (vysledek.rizeni.spisova_znacka, vysledek.rizeni.soud)
+        if not vysledek.rizeni.predmet_rizeni and klic in predmety:
+            # predmet rizeni je na jine strance, ktera nemusi byt k dispozici
+            vysledek.rizeni.predmet_rizeni = predmety[klic]
+        rizeni = Rizeni(url=vysledek.url)
+        rizeni.aktualizovat(vysledek.rizeni)
+        dvojice.append((rizeni, vysledek.rizeni))
+
+    Rizeni.objects.upsert(rizeni for rizeni, _ in dvojice)
+    ulozit_polozky(dvojice)
+
+
+def projit_adresar(cesta) -> Iterator[Tuple[str]]:
+    # stranky zahajeni rizeni ulozene vedle stranky rizeni se ctou spolu s ni
+    for adresar, podadresare, soubory in os.walk(cesta):
+        podadresare.sort()
+        for nazev in sorted(soubory):
+            if nazev.endswith(".html") and not nazev.endswith(
+                f"-{parser.DRUH_ZAHAJENI}.html"
+            ):
+                yield (os.path.join(adresar, nazev),)
+
+
+def parsovat_soubor(polozka: Tuple[str]) -> Tuple[str, parser.Rizeni]:
+    soubor = Path(polozka[0])
+    rizeni = parser.parse_rizeni(soubor.read_text())
+    zahajeni = soubor.with_name(f"{soubor.stem}-{parser.DRUH_ZAHAJENI}.html")
+    if zahajeni.exists():
+        rizeni.predmet_rizeni = parser.parse_predmet_rizeni(zahajeni.read_text())
+    return url_rizeni(rizeni), rizeni
+
+
+def url_rizeni(rizeni: parser.Rizeni) -> str:
+    # ulozena stranka neobsahuje svou adresu, da se ale sestavit z odkazu
+    # na zahajeni rizeni, ktery obsahuje soud i spisovou znacku
+    url = rizeni.zahajeni.absolute_url
+    org = parse_qs(urlsplit(url).query)["org"][0]
+    return SpisovaZnacka.from_url(url).url(org)
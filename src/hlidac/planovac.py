@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from hlidac.models import BATCH_SIZE, Rizeni, Udalost
+
+MIN_INTERVAL = timedelta(hours=1)
+MAX_INTERVAL = timedelta(days=14)
+UKONCENE_INTERVAL = timedelta(days=30)
+CHYBA_INTERVAL = timedelta(hours=1)
+# cast doby od posledni zmeny ve spisu, po ktere se rizeni znovu zkontroluje
+PODIL_KLIDU = 0.25
+OBDOBI_UDALOSTI = timedelta(days=365)
+
+
+def interval_kontroly(
+    rizeni: Rizeni, pocet_udalosti: int, ted: Optional[datetime] = None
+) -> timedelta:
+    # rizeni, ve kterem se dlouho nic nestalo, se nejspis hned nezmeni;
+    # rizeni s castymi udalostmi se kontroluje podle jejich prumerneho odstupu
+    ted = ted or timezone.now()
+    if rizeni.ukoncene:
+        return UKONCENE_INTERVAL
+    interval = (ted - rizeni.zmena_ve_spisu) * PODIL_KLIDU
+    if pocet_udalosti:
+        interval = min(interval, OBDOBI_UDALOSTI / pocet_udalosti * PODIL_KLIDU)
+    return min(max(interval, MIN_INTERVAL), MAX_INTERVAL)
+
+
+def naplanovat(rizeni_list: Iterable[Rizeni], ted: Optional[datetime] = None):
+    rizeni_list = [rizeni for rizeni in rizeni_list if rizeni.pk]
+    ted = ted or timezone.now()
+    pocty = dict(
+        Udalost.objects.filter(
+            rizeni__in=rizeni_list, datum__gte=(ted - OBDOBI_UDALOSTI).date()
+        )
+        .values_list("rizeni")
+        .annotate(pocet=Count("pk"))
+        .order_by()
+    )
+    for rizeni in rizeni_list:
+        rizeni.pristi_kontrola = ted + interval_kontroly(
+            rizeni, pocty.get(rizeni.pk, 0), ted
+        )
+    Rizeni.objects.bulk_update(rizeni_list, ["pristi_kontrola"], batch_size=BATCH_SIZE)
+
+
+def odlozit(rizeni_list: Iterable[Rizeni], interval=CHYBA_INTERVAL):
+    rizeni_list = [rizeni for rizeni in rizeni_list if rizeni.pk]
+    pristi_kontrola = timezone.now() + interval
+    for rizeni in rizeni_list:
+        rizeni.pristi_kontrola = pristi_kontrola
+    Rizeni.objects.bulk_update(rizeni_list, ["pristi_kontrola"], batch_size=BATCH_SIZE)
+
+
+def k_obnoveni(rozpocet: Optional[int] = None, ted: Optional[datetime] = None):
+    # fronta podle indexovaneho casu pristi kontroly, nikdy nekontrolovana
+    # rizeni jsou na rade jako prvni
+    ted = ted or timezone.now()
+    queryset = Rizeni.objects.filter(
+        Q(pristi_kontrola__isnull=True) | Q(pristi_kontrola__lte=ted)
+    ).order_by(F("pristi_kontrola").asc(nulls_first=True), "pk")
+    if rozpocet is not None:
+        queryset = queryset[:rozpocet]
+    return queryset
@@ -0,0 +1,197 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.timezone import make_aware
+
+from hlidac import archiv, metriky, models, parser
+from hlidac.fetcher import AsyncFetcher, Fetcher, HostRateLimiter
+from hlidac.planovac import naplanovat, odlozit
+from hlidac.zmeny import najit_zmeny
+
+
+@dataclass
+class RefreshResult:
+    rizeni: models.Rizeni
+    stranka: Optional[models.StazenaStranka] = None
+    nactene: Optional[parser.Rizeni] = None
+    error: Optional[Exception] = None
+    snimek: Optional[models.Snimek] = None
+
+    @property
+    def zmeneno(self):
+        return self.nactene is not None
+
+
+def fetch_rizeni(url, fetcher: Optional[Fetcher] = None) -> parser.Rizeni:
+    rizeni = parser.load_from_url(url, fetcher=fetcher)
+    rizeni.set_predmet_rizeni(fetcher=fetcher)
+    return rizeni
+
+
+async def fetch_rizeni_async(url, fetcher: AsyncFetcher) -> parser.Rizeni:
+    # adresa stranky zahajeni je az na strance rizeni, takze se obe stahuji
+    # za sebou; soubezne muze bezet mnoho ruznych rizeni
+    rizeni = await parser.load_from_url_async(url, fetcher)
+    await rizeni.set_predmet_rizeni_async(fetcher)
+    return rizeni
+
+
+def fetch_if_changed(
+    rizeni: models.Rizeni,
+    stranka: Optional[models.StazenaStranka],
+    fetcher: Fetcher,
+    slovnik: Optional[models.SlovnikKomprese] = None,
+    bez_udalosti=False,
+    archivace: Optional[archiv.Archivace] = None,
+) -> RefreshResult:
+    # bezi ve vlakne, nesmi sahat do databaze; rizeni bez ulozenych udalosti
+    # (zalozena driv, nez se zacaly ukladat) se nactou cela i bez zmeny
+    # stranky, aby se udalosti a dilci rizeni doplnily
+    puvodni = None if bez_udalosti else stranka
+    headers = puvodni.conditional_headers() if puvodni else {}
+    response = fetcher.get(rizeni.url, headers=headers)
+    if response.status_code == 304:
+        return RefreshResult(rizeni)
+
+    nova_stranka = models.StazenaStranka(
+        pk=stranka.pk if stranka else None,
+        url=rizeni.url,
+        etag=response.headers.get("ETag", ""),
+        last_modified=response.headers.get("Last-Modified", ""),
+        hash_obsahu=parser.content_hash(response.text),
+        stazeno=timezone.now(),
+        snimek_id=stranka.snimek_id if stranka else None,
+    )
+    snimek = None
+    if nova_stranka.snimek_id != nova_stranka.hash_obsahu:
+        snimek = archiv.vytvorit_snimek(
+            response.text, slovnik, nova_stranka.hash_obsahu
+        )
+        nova_stranka.snimek_id = snimek.hash
+    if puvodni and puvodni.hash_obsahu == nova_stranka.hash_obsahu:
+        return RefreshResult(rizeni, stranka=nova_stranka, snimek=snimek)
+
+    nactene = parser.parse_rizeni(response.text)
+    if (
+        puvodni
+        and rizeni.predmet_id
+        and rizeni.zmena_ve_spisu == make_aware(nactene.posledni_zmena)
+    ):
+        return RefreshResult(rizeni, stranka=nova_stranka, snimek=snimek)
+
+    nactene.set_predmet_rizeni(
+        fetcher=archivace.fetcher(fetcher) if archivace else fetcher
+    )
+    return RefreshResult(rizeni, stranka=nova_stranka, nactene=nactene, snimek=snimek)
+
+
+def refresh_all(
+    rizeni_list: Iterable[models.Rizeni],
+    max_workers=8,
+    requests_per_second=5.0,
+    batch_size=500,
+    fetcher: Optional[Fetcher] = None,
+) -> Iterator[RefreshResult]:
+    # stahuje se souběžně ve vláknech, do databáze zapisuje jen volající vlákno
+    # a to hromadně po batch_size výsledcích
+    rizeni_list = list(rizeni_list)
+    # stranky a rizeni s udalostmi se nacitaji po castech, jeden dotaz pres
+    # vsechna rizeni by mel prilis mnoho parametru (SQLite jich dovoli 32766)
+    stranky = {}
+    s_udalostmi = set()
+    for i in range(0, len(rizeni_list), models.BATCH_SIZE):
+        cast = rizeni_list[i : i + models.BATCH_SIZE]
+        stranky.update(
+            models.StazenaStranka.objects.in_bulk(
+                [rizeni.url for rizeni in cast], field_name="url"
+            )
+        )
+        s_udalostmi.update(
+            models.Udalost.objects.filter(rizeni__in=cast)
+            .values_list("rizeni_id", flat=True)
+            .distinct()
+        )
+    slovnik = archiv.aktualni_slovnik()
+    archivace = archiv.Archivace(slovnik)
+    fetcher = fetcher or Fetcher(
+        pool_maxsize=max_workers,
+        rate_limiter=HostRateLimiter(requests_per_second),
+    )
+    with fetcher, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                fetch_if_changed,
+                rizeni,
+                stranky.get(rizeni.url),
+                fetcher,
+                slovnik,
+                bez_udalosti=rizeni.pk not in s_udalostmi,
+                archivace=archivace,
+            ): rizeni
+            for rizeni in rizeni_list
+        }
+        results = []
+        for future in as_completed(futures):
+            rizeni = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # i neocekavana stranka (chyba parseru) je jen chyba jednoho
+                # rizeni, uz stazene vysledky davky se ulozi
+                results.append(RefreshResult(rizeni, error=e))
+            if len(results) >= batch_size:
+                save_results(results, stranky)
+                archivace.ulozit()
+                yield from results
+                results = []
+        save_results(results, stranky)
+        archivace.ulozit()
+        yield from results
+
+
+def fazety_rizeni(rizeni: models.Rizeni):
+    return rizeni.soud_id, rizeni.predmet_id, rizeni.ukoncene
+
+
+@metriky.mereno("save_results")
+@transaction.atomic
+def save_results(results: List[RefreshResult], stranky=None):
+    stranky = stranky or {}
+    zmenene = [result for result in results if result.zmeneno]
+    # zmeny se hledaji pred aktualizaci, dokud je v databazi puvodni stav
+    zmeny = najit_zmeny([(result.rizeni, result.nactene) for result in zmenene])
+    puvodni = [fazety_rizeni(result.rizeni) for result in zmenene]
+    for result in zmenene:
+        result.rizeni.aktualizovat(result.nactene)
+    models.ulozit_ciselniky([result.rizeni for result in zmenene])
+    if puvodni != [fazety_rizeni(result.rizeni) for result in zmenene]:
+        models.zneplatnit_fazety()
+    models.Rizeni.objects.bulk_update(
+        [result.rizeni for result in zmenene],
+        models.Rizeni.AKTUALIZOVANA_POLE,
+        batch_size=models.BATCH_SIZE,
+    )
+    models.ulozit_polozky([(result.rizeni, result.nactene) for result in zmenene])
+    models.Zmena.objects.bulk_create(zmeny, batch_size=models.BATCH_SIZE)
+    naplanovat([result.rizeni for result in results if not result.error])
+    odlozit([result.rizeni for result in results if result.error])
+
+    archiv.ulozit_snimky([result.snimek for result in results if result.snimek])
+    nove_stranky = [
+        result.stranka
+        for result in results
+        if result.stranka
+        and not result.stranka.stejna_jako(stranky.get(result.rizeni.url))
+    ]
+    models.StazenaStranka.objects.bulk_create(
+        [stranka for stranka in nove_stranky if stranka.pk is None],
+        batch_size=models.BATCH_SIZE,
+    )
+    models.StazenaStranka.objects.bulk_update(
+        [stranka for stranka in nove_stranky if stranka.pk is not None],
+        ["etag", "last_modified", "hash_obsahu", "stazeno", "snimek"],
+        batch_size=models.BATCH_SIZE,
+    )
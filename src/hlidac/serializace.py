@@ -0,0 +1,176 @@
+import json
+from datetime import date, datetime, timedelta
+from typing import IO, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from hlidac import parser
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# v binarnim formatu je rizeni seznam hodnot v pevnem poradi, data jsou cela
+# cisla, udalosti nesou i druh a poradi, aby se po nacteni znovu nerozebiraly
+# jejich adresy; pri zmene radku je potreba zvysit VERZE
+VERZE = 1
+EPOCHA = datetime(1970, 1, 1)
+
+
+class UdalostZaznam(NamedTuple):
+    nazev: str
+    datum: date
+    url: str = ""
+    druh: str = ""
+    poradi: int = 0
+
+
+class DilciRizeniZaznam(NamedTuple):
+    spisova_znacka: str
+    url: str = ""
+
+
+class RizeniZaznam(NamedTuple):
+    # kompaktni varianta parser.Rizeni bez __dict__ pro hromadne analyzy
+    spisova_znacka: str
+    soud: str
+    stav_rizeni: str
+    udalosti: Tuple[UdalostZaznam, ...] = ()
+    dilci_rizeni: Tuple[DilciRizeniZaznam, ...] = ()
+    predmet_rizeni: str = ""
+    posledni_zmena: Optional[datetime] = None
+    cas_aktualizace: Optional[datetime] = None
+
+    @classmethod
+    def from_rizeni(cls, rizeni: parser.Rizeni) -> "RizeniZaznam":
+        return cls(
+            spisova_znacka=rizeni.spisova_znacka,
+            soud=rizeni.soud,
+            stav_rizeni=rizeni.stav_rizeni,
+            udalosti=tuple(
+                UdalostZaznam(u.nazev, u.datum, u.url, *_druh_a_poradi(u))
+                for u in rizeni.udalosti
+            ),
+            dilci_rizeni=tuple(
+                DilciRizeniZaznam(d.spisova_znacka, d.url) for d in rizeni.dilci_rizeni
+            ),
+            predmet_rizeni=rizeni.predmet_rizeni,
+            posledni_zmena=rizeni.posledni_zmena,
+            cas_aktualizace=rizeni.cas_aktualizace,
+        )
+
+    def to_rizeni(self) -> parser.Rizeni:
+        return parser.Rizeni(
+            spisova_znacka=self.spisova_znacka,
+            soud=self.soud,
+            stav_rizeni=self.stav_rizeni,
+            udalosti=[_udalost(*u) for u in self.udalosti],
+            dilci_rizeni=[parser.DilciRizeni(*d) for d in self.dilci_rizeni],
+            predmet_rizeni=self.predmet_rizeni,
+            posledni_zmena=self.posledni_zmena,
+            cas_aktualizace=self.cas_aktualizace,
+        )
+
+
+def _druh_a_poradi(udalost: parser.Udalost) -> Tuple[str, int]:
+    if not udalost.url:
+        return "", 0
+    return udalost.druh, udalost.poradi
+
+
+def _udalost(nazev, datum, url, druh, poradi) -> parser.Udalost:
+    udalost = parser.Udalost(nazev, datum, url)
+    if druh:
+        # predvyplni memoizovane hodnoty, adresa se uz nemusi rozebirat
+        udalost.druh = druh
+        udalost.poradi = poradi
+    return udalost
+
+
+def zapsat_jsonl(rizeni: Iterable[parser.Rizeni], f: IO[str]):
+    for r in rizeni:
+        f.write(json.dumps(r.to_dict(), ensure_ascii=False))
+        f.write("\n")
+
+
+def cist_jsonl(f: IO[str]) -> Iterator[parser.Rizeni]:
+    for line in f:
+        if line.strip():
+            yield parser.Rizeni.from_dict(json.loads(line))
+
+
+def zapsat_msgpack(rizeni: Iterable[parser.Rizeni], f: IO[bytes]):
+    _zkontrolovat_msgpack()
+    packer = msgpack.Packer()
+    f.write(packer.pack(VERZE))
+    for r in rizeni:
+        f.write(packer.pack(_na_radek(RizeniZaznam.from_rizeni(r))))
+
+
+def cist_msgpack(f: IO[bytes], kompaktni=False) -> Iterator:
+    # s kompaktni=True vraci RizeniZaznam misto parser.Rizeni
+    _zkontrolovat_msgpack()
+    unpacker = msgpack.Unpacker(f, use_list=False, raw=False)
+    verze = next(unpacker, None)
+    if verze is None:
+        return
+    if verze != VERZE:
+        raise ValueError(f"Nepodporovaná verze formátu {verze}")
+    for radek in unpacker:
+        zaznam = _z_radku(radek)
+        yield zaznam if kompaktni else zaznam.to_rizeni()
+
+
+def _zkontrolovat_msgpack():
+    if msgpack is None:
+        raise RuntimeError("Pro binární formát je potřeba nainstalovat balíček msgpack")
+
+
+def _na_radek(zaznam: RizeniZaznam) -> tuple:
+    return (
+        zaznam.spisova_znacka,
+        zaznam.soud,
+        zaznam.stav_rizeni,
+        [
+            (u.nazev, u.datum.toordinal(), u.url, u.druh, u.poradi)
+            for u in zaznam.udalosti
+        ],
+        [tuple(d) for d in zaznam.dilci_rizeni],
+        zaznam.predmet_rizeni,
+        _na_sekundy(zaznam.posledni_zmena),
+        _na_sekundy(zaznam.cas_aktualizace),
+    )
+
+
+def _z_radku(radek) -> RizeniZaznam:
+    (
+        spisova_znacka,
+        soud,
+        stav_rizeni,
+        udalosti,
+        dilci_rizeni,
+        predmet_rizeni,
+        posledni_zmena,
+        cas_aktualizace,
+    ) = radek
+    return RizeniZaznam(
+        spisova_znacka,
+        soud,
+        stav_rizeni,
+        tuple(
+            UdalostZaznam(nazev, date.fromordinal(datum), url, druh, poradi)
+            for nazev, datum, url, druh, poradi in udalosti
+        ),
+        tuple(DilciRizeniZaznam(*d) for d in dilci_rizeni),
+        predmet_rizeni,
+        _ze_sekund(posledni_zmena),
+        _ze_sekund(cas_aktualizace),
+    )
+
+
+def _na_sekundy(value: Optional[datetime]) -> Optional[int]:
+    # InfoSoud uvadi casy v sekundach a bez casove zony
+    return None if value is None else int((value - EPOCHA).total_seconds())
+
+
+def _ze_sekund(value: Optional[int]) -> Optional[datetime]:
+    return None if value is None else EPOCHA + timedelta(seconds=value)
@@ -0,0 +1,80 @@
+import re
+from pathlib import PurePath
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qs, quote, urlencode, urljoin, urlsplit
+
+from hlidac.parser import INFOSOUD_URL
+
+# znacka se zapisuje jako 62 NC 2528 / 2019 nebo 62 NC 2528/2019, v nazvech
+# souboru jako 62-Nc-2528-2019, rejstrik muze mit vice casti (12 P A NC)
+SPISOVA_ZNACKA_RE = re.compile(
+    r"^\s*(?P<senat>\d+)[\s-]+(?P<rejstrik>[^\W\d_]+(?:[\s-]+[^\W\d_]+)*)[\s-]+"
+    r"(?P<cislo>\d+)\s*[/-]\s*(?P<rocnik>\d{4})\s*$"
+)
+
+
+class NeplatnaSpisovaZnackaError(ValueError):
+    pass
+
+
+class SpisovaZnacka(NamedTuple):
+    senat: int
+    rejstrik: str
+    cislo: int
+    rocnik: int
+
+    def __str__(self):
+        return f"{self.senat} {self.rejstrik} {self.cislo} / {self.rocnik}"
+
+    @classmethod
+    def parse(cls, value) -> "SpisovaZnacka":
+        match = SPISOVA_ZNACKA_RE.match(value)
+        if not match:
+            raise NeplatnaSpisovaZnackaError(f"Neplatná spisová značka {value}")
+        return cls(
+            senat=int(match["senat"]),
+            rejstrik=" ".join(re.split(r"[\s-]+", match["rejstrik"])).upper(),
+            cislo=int(match["cislo"]),
+            rocnik=int(match["rocnik"]),
+        )
+
+    @classmethod
+    def parse_or_none(cls, value) -> Optional["SpisovaZnacka"]:
+        try:
+            return cls.parse(value)
+        except NeplatnaSpisovaZnackaError:
+            return None
+
+    @classmethod
+    def from_filename(cls, path) -> "SpisovaZnacka":
+        return cls.parse(PurePath(path).stem)
+
+    @classmethod
+    def from_url(cls, url) -> "SpisovaZnacka":
+        query = parse_qs(urlsplit(url).query)
+        try:
+            return cls(
+                senat=int(query["cisloSenatu"][0]),
+                rejstrik=query["druhVec"][0].upper(),
+                cislo=int(query["bcVec"][0]),
+                rocnik=int(query["rocnik"][0]),
+            )
+        except (KeyError, ValueError):
+            raise NeplatnaSpisovaZnackaError(f"Adresa {url} neobsahuje spisovou značku")
+
+    def url(self, org) -> str:
+        # typ soudu odpovida prvnim dvema znakum kodu soudu, napr. OSPHA09 -> os
+        query = urlencode(
+            {
+                "org": org,
+                "cisloSenatu": self.senat,
+                "druhVec": self.rejstrik,
+                "bcVec": self.cislo,
+                "rocnik": self.rocnik,
+                "typSoudu": org[:2].lower(),
+                "autoFill": "true",
+                "type": "spzn",
+            },
+            quote_via=quote,
+        )
+        return urljoin(INFOSOUD_URL, f"search.do?{query}")
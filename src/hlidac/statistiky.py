@@ -0,0 +1,104 @@
+from datetime import timedelta
+from typing import Dict, List, Sequence
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import Avg, Count, F, Max, Min, Window
+from django.db.models.functions import CumeDist, ExtractYear
+
+from hlidac.models import Rizeni
+
+SKUPINY = {
+    "soud": F("soud__nazev"),
+    "predmet": F("predmet__nazev"),
+    "rok": ExtractYear("datum_zahajeni"),
+    "probehlo_odvolani": F("probehlo_odvolani"),
+}
+PERCENTILY = (0.5, 0.9)
+
+
+def statistiky_delky(
+    queryset=None, podle: Sequence[str] = ("soud",), percentily=PERCENTILY
+) -> List[Dict]:
+    for skupina in podle:
+        if skupina not in SKUPINY:
+            raise ValueError(f"Nelze seskupit podle {skupina}")
+    if queryset is None:
+        queryset = Rizeni.objects.all()
+    queryset = queryset.s_delkou().annotate(
+        **{f"skupina_{skupina}": SKUPINY[skupina] for skupina in podle}
+    )
+    sloupce = [f"skupina_{skupina}" for skupina in podle]
+
+    agregace = {
+        "pocet": Count("id"),
+        "prumer": Avg("delka"),
+        "minimum": Min("delka"),
+        "maximum": Max("delka"),
+    }
+    if sloupce:
+        souhrn = queryset.values(*sloupce).annotate(**agregace).order_by(*sloupce)
+    else:
+        souhrn = [queryset.aggregate(**agregace)]
+    percentily_skupin = _percentily(queryset, sloupce, percentily)
+
+    vysledek = []
+    for radek in souhrn:
+        klic = tuple(radek[sloupec] for sloupec in sloupce)
+        vysledek.append(
+            {
+                **{skupina: radek[f"skupina_{skupina}"] for skupina in podle},
+                "pocet": radek["pocet"],
+                "prumer": radek["prumer"],
+                "minimum": radek["minimum"],
+                "maximum": radek["maximum"],
+                **percentily_skupin.get(klic, {}),
+            }
+        )
+    return vysledek
+
+
+def _percentily(queryset, sloupce, percentily) -> Dict[tuple, Dict[str, timedelta]]:
+    # percentil se urci v databazi jako nejmensi delka, jejiz kumulativni
+    # distribuce v ramci skupiny dosahne pozadovane hodnoty, agregace nad
+    # window funkci ale ORM neumi, proto se vnitrni dotaz obali rucne
+    if not percentily:
+        return {}
+    vnitrni = queryset.annotate(
+        kumulativni=Window(
+            CumeDist(),
+            partition_by=[F(sloupec) for sloupec in sloupce] or None,
+            order_by=F("delka").asc(),
+        )
+    ).values(*sloupce, "delka", "kumulativni")
+    try:
+        sql, params = vnitrni.query.sql_with_params()
+    except EmptyResultSet:
+        return {}
+
+    qn = connection.ops.quote_name
+    skupiny = ", ".join(qn(sloupec) for sloupec in sloupce)
+    hodnoty = ", ".join(
+        f"MIN(CASE WHEN {qn('kumulativni')} >= %s THEN {qn('delka')} END)"
+        for _ in percentily
+    )
+    dotaz = f"SELECT {skupiny + ', ' if sloupce else ''}{hodnoty} FROM ({sql}) vnitrni"
+    if sloupce:
+        dotaz += f" GROUP BY {skupiny}"
+
+    vysledek = {}
+    with connection.cursor() as cursor:
+        cursor.execute(dotaz, [*percentily, *params])
+        for radek in cursor.fetchall():
+            klic = tuple(radek[: len(sloupce)])
+            vysledek[klic] = {
+                f"p{round(percentil * 100)}": _na_timedelta(hodnota)
+                for percentil, hodnota in zip(percentily, radek[len(sloupce) :])
+            }
+    return vysledek
+
+
+def _na_timedelta(hodnota):
+    if hodnota is None or isinstance(hodnota, timedelta):
+        return hodnota
+    return timedelta(microseconds=hodnota)
@@ -0,0 +1,66 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from django.db.models import Q
+
+from hlidac.models import Rizeni
+
+SEZNAM_POLI = (
+    "id",
+    "spisova_znacka",
+    "soud__nazev",
+    "predmet__nazev",
+    "url",
+    "ukoncene",
+    "zmena_ve_spisu",
+    "datum_zahajeni",
+    "datum_skonceni",
+    "delka",
+)
+# nazvy z ciselniku se ve vystupu jmenuji jako pole rizeni
+PREJMENOVANA_POLE = {"soud__nazev": "soud", "predmet__nazev": "predmet"}
+
+
+class NeplatnyKurzorError(ValueError):
+    pass
+
+
+def zakodovat_kurzor(zmena_ve_spisu: datetime, pk: int) -> str:
+    hodnota = f"{zmena_ve_spisu.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(hodnota.encode()).decode()
+
+
+def dekodovat_kurzor(kurzor: str) -> Tuple[datetime, int]:
+    try:
+        hodnota = base64.urlsafe_b64decode(kurzor.encode()).decode()
+        zmena_ve_spisu, pk = hodnota.split("|")
+        return datetime.fromisoformat(zmena_ve_spisu), int(pk)
+    except ValueError:
+        raise NeplatnyKurzorError(f"Neplatný kurzor {kurzor}")
+
+
+def stranka_rizeni(
+    filtr: Q = Q(), kurzor: Optional[str] = None, velikost=50
+) -> Tuple[List[dict], Optional[str]]:
+    # strankovani podle klice (zmena_ve_spisu, id) od nejnovejsich, dalsi
+    # stranka navazuje za poslednim radkem pres index a nepocita preskocene
+    # radky jako OFFSET; delka rizeni se pocita v databazi
+    queryset = Rizeni.objects.filter(filtr).s_delkou()
+    if kurzor:
+        zmena_ve_spisu, pk = dekodovat_kurzor(kurzor)
+        queryset = queryset.filter(
+            Q(zmena_ve_spisu__lt=zmena_ve_spisu)
+            | Q(zmena_ve_spisu=zmena_ve_spisu, pk__lt=pk)
+        )
+    radky = [
+        {PREJMENOVANA_POLE.get(pole, pole): hodnota for pole, hodnota in radek.items()}
+        for radek in queryset.order_by("-zmena_ve_spisu", "-pk").values(*SEZNAM_POLI)[
+            : velikost + 1
+        ]
+    ]
+    dalsi = None
+    if len(radky) > velikost:
+        radky = radky[:velikost]
+        dalsi = zakodovat_kurzor(radky[-1]["zmena_ve_spisu"], radky[-1]["id"])
+    return radky, dalsi
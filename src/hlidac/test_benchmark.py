@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from hlidac.benchmark import (
+    STAGE_UDALOST,
+    BenchmarkResult,
+    compare,
+    run_benchmark,
+    synthetic_page,
+    to_json,
+    udalost_rows,
+)
+from hlidac.parser import BACKEND_LXML, parse_rizeni
+
+
+class TestBenchmark(TestCase):
+    def test_synthetic_page(self):
+        html = synthetic_page(120)
+        self.assertEqual(len(udalost_rows(html)), 120)
+        self.assertEqual(
+            len(parse_rizeni(html, BACKEND_LXML).udalosti)
+            + len(parse_rizeni(html, BACKEND_LXML).dilci_rizeni),
+            120,
+        )
+
+    def test_run_benchmark(self):
+        results = run_benchmark(backends=[BACKEND_LXML], repeat=1, synthetic_sizes=[50])
+        udalosti = [
+            r for r in results if r.stage == STAGE_UDALOST and r.page == "synteticka-50"
+        ]
+        self.assertEqual(udalosti[0].calls, 50)
+        self.assertTrue(all(r.seconds > 0 and r.peak_memory > 0 for r in results))
+
+    def test_compare(self):
+        baseline = to_json([BenchmarkResult("a", "b", "lxml", 10, 1.0, 0)])
+        results = [BenchmarkResult("a", "b", "lxml", 10, 1.5, 0)]
+        self.assertEqual(compare(results, baseline), {"a:b:lxml": 1.5})
+        self.assertEqual(compare(results, baseline, tolerance=0.6), {})
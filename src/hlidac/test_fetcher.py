@@ -0,0 +1,71 @@
+from unittest import TestCase, mock
+
+import requests
+import responses
+
+from hlidac import metriky
+from hlidac.fetcher import Fetcher, HostRateLimiter
+
+URL = "https://infosoud.justice.cz/InfoSoud/public/search.do"
+
+
+class TestFetcher(TestCase):
+    @responses.activate
+    def test_get(self):
+        responses.add(responses.GET, URL, body="obsah")
+        with Fetcher() as fetcher:
+            self.assertEqual(fetcher.get(URL).text, "obsah")
+        self.assertIn("gzip", responses.calls[0].request.headers["Accept-Encoding"])
+
+    @responses.activate
+    def test_get__chyba(self):
+        responses.add(responses.GET, URL, status=404)
+        with Fetcher() as fetcher:
+            with self.assertRaises(requests.HTTPError):
+                fetcher.get(URL)
+
+    @responses.activate
+    def test_get__rate_limiter(self):
+        responses.add(responses.GET, URL, body="obsah")
+        rate_limiter = HostRateLimiter(10)
+        with mock.patch.object(rate_limiter, "wait") as wait:
+            with Fetcher(rate_limiter=rate_limiter) as fetcher:
+                fetcher.get(URL)
+        wait.assert_called_once_with(URL)
+
+    @responses.activate
+    def test_get__metriky(self):
+        metriky.vynulovat()
+        metriky.zapnout()
+        self.addCleanup(metriky.vynulovat)
+        self.addCleanup(metriky.zapnout, False)
+        responses.add(responses.GET, URL, body="obsah")
+        responses.add(responses.GET, URL, status=404)
+        responses.add(responses.GET, URL, body=requests.ConnectionError())
+        with Fetcher() as fetcher:
+            fetcher.get(URL)
+            with self.assertRaises(requests.HTTPError):
+                fetcher.get(URL)
+            with self.assertRaises(requests.ConnectionError):
+                fetcher.get(URL)
+        vystup = metriky.prometheus()
+        self.assertIn('hlidac_http_responses_total{status="200"} 1', vystup)
+        self.assertIn('hlidac_http_responses_total{status="404"} 1', vystup)
+        self.assertIn('hlidac_http_errors_total{error="ConnectionError"} 1', vystup)
+        self.assertIn('hlidac_stage_duration_seconds_count{stage="fetch"} 3', vystup)
+
+
+class TestHostRateLimiter(TestCase):
+    @mock.patch("hlidac.fetcher.time")
+    def test_wait(self, time_mock):
+        time_mock.monotonic.return_value = 100.0
+        rate_limiter = HostRateLimiter(2)
+
+        rate_limiter.wait(URL)
+        time_mock.sleep.assert_not_called()
+
+        rate_limiter.wait(URL)
+        time_mock.sleep.assert_called_once_with(0.5)
+
+        rate_limiter.wait("https://example.com/")
+        time_mock.sleep.assert_called_once_with(0.5)
@@ -0,0 +1,54 @@
+import os
+import pstats
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from hlidac import metriky
+from hlidac.parser import load_from_file
+
+testdata_dir = Path(__file__).parent / "testdata"
+
+
+# jen registr metrik a jeho vystupy; mereni Fetcheru a parseru se testuje
+# u nich, pohled a prikazy v tests.MetrikyTest
+class TestMetriky(TestCase):
+    def setUp(self):
+        metriky.vynulovat()
+        metriky.zapnout()
+
+    def tearDown(self):
+        metriky.zapnout(False)
+        metriky.vynulovat()
+
+    def test_vypnuto(self):
+        metriky.zapnout(False)
+        metriky.zaznamenat("doba", 0.003, stage="a")
+        metriky.pricist(metriky.HTTP_CHYBY)
+        self.assertEqual(metriky.prometheus(), "")
+
+    def test_histogram(self):
+        metriky.zaznamenat("doba", 0.003, stage="a")
+        metriky.zaznamenat("doba", 20, stage="a")
+        vystup = metriky.prometheus().splitlines()
+        self.assertIn('doba_bucket{stage="a",le="0.001"} 0', vystup)
+        self.assertIn('doba_bucket{stage="a",le="0.005"} 1', vystup)
+        self.assertIn('doba_bucket{stage="a",le="10.0"} 1', vystup)
+        self.assertIn('doba_bucket{stage="a",le="+Inf"} 2', vystup)
+        self.assertIn('doba_sum{stage="a"} 20.003', vystup)
+
+    def test_ulozit(self):
+        metriky.pricist(metriky.HTTP_OPAKOVANI, 2)
+        with tempfile.TemporaryDirectory() as adresar:
+            soubor = os.path.join(adresar, "hlidac.prom")
+            metriky.ulozit(soubor)
+            with open(soubor) as f:
+                self.assertIn("hlidac_http_retries_total 2\n", f.read())
+
+    def test_profilovat(self):
+        with tempfile.TemporaryDirectory() as adresar:
+            soubor = os.path.join(adresar, "profil.prof")
+            with metriky.profilovat(soubor):
+                load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+            stats = pstats.Stats(soubor)
+            self.assertTrue(any(funkce[2] == "parse_rizeni" for funkce in stats.stats))
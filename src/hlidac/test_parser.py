@@ -1,17 +1,25 @@
 import datetime
+import json
 import os
 from datetime import date, timedelta
 from pathlib import Path
-from unittest import TestCase
+from unittest import TestCase, mock
 
+import responses
+
+from hlidac import metriky
 from hlidac.parser import (
+    BACKEND_LXML,
+    BACKEND_PYQUERY,
     DRUH_ZAHAJENI,
     DilciRizeni,
     Rizeni,
     SpisovaZnackaNeexistujeError,
     Udalost,
+    content_hash,
     load_from_file,
     parse_predmet_rizeni,
+    parse_rizeni,
     parse_udalost,
 )
 
@@ -106,13 +114,52 @@ class Test(TestCase):
         rizeni = load_from_file(testdata_dir / "62-Nc-2528-2019.html")
         self.assertEqual(rizeni.delka_rizeni, timedelta(days=153))
 
+    def test_udalosti_podle_druhu(self):
+        rizeni = load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        skonceni = rizeni.skonceni
+        with mock.patch("hlidac.parser.parse_qs") as parse_qs:
+            rizeni.delka_rizeni
+            rizeni.probehlo_odvolani
+            parse_qs.assert_not_called()
+
+        rizeni.udalosti = [rizeni.zahajeni]
+        self.assertIsNone(rizeni.skonceni)
+        rizeni.udalosti.append(skonceni)
+        self.assertEqual(rizeni.skonceni, skonceni)
+        # nahrazeni na miste a smazani s pridanim delku seznamu nemeni
+        rizeni.udalosti[1] = rizeni.zahajeni
+        self.assertIsNone(rizeni.skonceni)
+        del rizeni.udalosti[1]
+        rizeni.udalosti.append(skonceni)
+        self.assertEqual(rizeni.skonceni, skonceni)
+
+    @responses.activate
     def test_set_predmet_rizeni(self):
         rizeni = load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        with open(testdata_dir / "62-Nc-2528-2019-ZAHAJ_RIZ.html") as f:
+            responses.add(responses.GET, rizeni.zahajeni.absolute_url, body=f.read())
         rizeni.set_predmet_rizeni()
         self.assertEqual(
             rizeni.predmet_rizeni, "Svěření do péče a určení výživného (včetně změn)"
         )
 
+    def test_dilci_rizeni_url(self):
+        rizeni = load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        self.assertEqual(
+            rizeni.dilci_rizeni[0].absolute_url,
+            "https://infosoud.justice.cz/InfoSoud/public/search.do?org=OSPHA09"
+            "&cisloSenatu=12&druhVec=P%20A%20NC&bcVec=105&rocnik=2019&typSoudu=os"
+            "&autoFill=true&type=spzn",
+        )
+
+    def test_to_dict(self):
+        rizeni = load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        rizeni.predmet_rizeni = "Výživné"
+        obnovene = Rizeni.from_dict(json.loads(json.dumps(rizeni.to_dict())))
+        self.assertEqual(obnovene, rizeni)
+        self.assertEqual(obnovene.zahajeni.url, rizeni.zahajeni.url)
+        self.assertEqual(obnovene.dilci_rizeni[0].url, rizeni.dilci_rizeni[0].url)
+
     def test_probehlo_odvolani__false(self):
         rizeni = load_from_file(testdata_dir / "62-Nc-2528-2019.html")
         self.assertFalse(rizeni.probehlo_odvolani)
@@ -121,6 +168,31 @@ class Test(TestCase):
         rizeni = load_from_file(testdata_dir / "62-Nc-2503-2019.html")
         self.assertTrue(rizeni.probehlo_odvolani)
 
+    def test_content_hash(self):
+        with open(testdata_dir / "62-Nc-2528-2019.html") as f:
+            html = f.read()
+        aktualizovano = html.replace("08.03.2021 19:50:40", "09.03.2021 07:00:00")
+        zmeneno = html.replace("08.08.2019 16:46:30", "09.03.2021 07:00:00")
+
+        self.assertEqual(content_hash(html), content_hash(aktualizovano))
+        self.assertNotEqual(content_hash(html), content_hash(zmeneno))
+
+    def test_metriky(self):
+        metriky.vynulovat()
+        metriky.zapnout()
+        self.addCleanup(metriky.vynulovat)
+        self.addCleanup(metriky.zapnout, False)
+        load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        vystup = metriky.prometheus()
+        self.assertIn("# TYPE hlidac_stage_duration_seconds histogram", vystup)
+        self.assertIn(
+            'hlidac_stage_duration_seconds_bucket{stage="parse_rizeni",le="+Inf"} 1',
+            vystup,
+        )
+        self.assertIn(
+            'hlidac_stage_duration_seconds_count{stage="parse_rizeni"} 1', vystup
+        )
+
 
 class TestUdalost(TestCase):
     def test_absolute_url(self):
@@ -142,9 +214,67 @@ class TestUdalost(TestCase):
         )
         self.assertEqual(u.druh, DRUH_ZAHAJENI)
 
+    def test_druh__bez_odkazu(self):
+        u = Udalost(nazev="", datum=date(2019, 1, 1), url=None)
+        self.assertIsNone(u.druh)
+        self.assertIsNone(u.poradi)
+
     def test_parse_predmet_rizeni(self):
         with open(testdata_dir / "62-Nc-2528-2019-ZAHAJ_RIZ.html") as f:
             self.assertEqual(
                 parse_predmet_rizeni(f.read()),
                 "Svěření do péče a určení výživného (včetně změn)",
             )
+
+
+class TestLxmlBackend(TestCase):
+    def test_parse_rizeni(self):
+        for filename in [
+            "62-Nc-2528-2019.html",
+            "62-Nc-2503-2019.html",
+            "12-P-A-NC-105.html",
+        ]:
+            with self.subTest(filename=filename):
+                expected = load_from_file(testdata_dir / filename, BACKEND_PYQUERY)
+                rizeni = load_from_file(testdata_dir / filename, BACKEND_LXML)
+                self.assertEqual(rizeni, expected)
+                self.assertEqual(
+                    [u.url for u in rizeni.udalosti],
+                    [u.url for u in expected.udalosti],
+                )
+                self.assertEqual(
+                    [d.url for d in rizeni.dilci_rizeni],
+                    [d.url for d in expected.dilci_rizeni],
+                )
+
+    def test_neexistujici_rizeni(self):
+        with self.assertRaisesRegex(
+            SpisovaZnackaNeexistujeError, "Spisová značka 62 NC 1/2019 neexistuje"
+        ):
+            load_from_file(testdata_dir / "neexistuje.html", BACKEND_LXML)
+
+    def test_parse_udalost(self):
+        html = """<tr>
+    <td class="data">
+        Senátní věc
+    </td>
+    <td class="data">
+        <a href="search.do?org=OSPHA09">12
+            P A NC 105 / 2019</a>
+    </td>
+</tr>"""
+        self.assertEqual(
+            parse_udalost(html, BACKEND_LXML),
+            DilciRizeni(spisova_znacka="12 P A NC 105 / 2019"),
+        )
+
+    def test_parse_predmet_rizeni(self):
+        with open(testdata_dir / "62-Nc-2528-2019-ZAHAJ_RIZ.html") as f:
+            self.assertEqual(
+                parse_predmet_rizeni(f.read(), BACKEND_LXML),
+                "Svěření do péče a určení výživného (včetně změn)",
+            )
+
+    def test_neznamy_backend(self):
+        with self.assertRaises(ValueError):
+            parse_rizeni("", backend="bs4")
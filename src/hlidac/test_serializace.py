@@ -0,0 +1,79 @@
+import io
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+from hlidac.parser import load_from_file
+from hlidac.serializace import (
+    RizeniZaznam,
+    cist_jsonl,
+    cist_msgpack,
+    msgpack,
+    zapsat_jsonl,
+    zapsat_msgpack,
+)
+
+testdata_dir = Path(__file__).parent / "testdata"
+
+
+class TestSerializace(TestCase):
+    def setUp(self):
+        self.rizeni = [
+            load_from_file(testdata_dir / name)
+            for name in (
+                "62-Nc-2528-2019.html",
+                "62-Nc-2503-2019.html",
+                "12-P-A-NC-105.html",
+            )
+        ]
+        self.rizeni[0].predmet_rizeni = "Svěření do péče a určení výživného"
+
+    def assertRizeniEqual(self, nactena, ocekavana):
+        self.assertEqual(nactena, ocekavana)
+        for nactene, ocekavane in zip(nactena, ocekavana):
+            self.assertEqual(
+                [(u.url, u.druh, u.poradi) for u in nactene.udalosti],
+                [(u.url, u.druh, u.poradi) for u in ocekavane.udalosti],
+            )
+            self.assertEqual(
+                [d.url for d in nactene.dilci_rizeni],
+                [d.url for d in ocekavane.dilci_rizeni],
+            )
+
+    def test_jsonl(self):
+        f = io.StringIO()
+        zapsat_jsonl(self.rizeni, f)
+        f.seek(0)
+
+        self.assertEqual(len(f.getvalue().splitlines()), 3)
+        self.assertRizeniEqual(list(cist_jsonl(f)), self.rizeni)
+
+    @skipUnless(msgpack, "msgpack neni nainstalovany")
+    def test_msgpack(self):
+        f = io.BytesIO()
+        zapsat_msgpack(self.rizeni, f)
+        f.seek(0)
+
+        self.assertRizeniEqual(list(cist_msgpack(f)), self.rizeni)
+
+    @skipUnless(msgpack, "msgpack neni nainstalovany")
+    def test_msgpack__kompaktni(self):
+        f = io.BytesIO()
+        zapsat_msgpack(self.rizeni, f)
+        f.seek(0)
+
+        zaznamy = list(cist_msgpack(f, kompaktni=True))
+
+        self.assertEqual(zaznamy, [RizeniZaznam.from_rizeni(r) for r in self.rizeni])
+        self.assertEqual(zaznamy[0].udalosti[0].druh, "ZAHAJ_RIZ")
+        self.assertFalse(hasattr(zaznamy[0].udalosti[0], "__dict__"))
+
+    @skipUnless(msgpack, "msgpack neni nainstalovany")
+    def test_msgpack__prazdny(self):
+        self.assertEqual(list(cist_msgpack(io.BytesIO())), [])
+
+    def test_zaznam(self):
+        zaznam = RizeniZaznam.from_rizeni(self.rizeni[0])
+        self.assertFalse(hasattr(zaznam, "__dict__"))
+        rizeni = zaznam.to_rizeni()
+        self.assertRizeniEqual([rizeni], self.rizeni[:1])
+        self.assertEqual(rizeni.delka_rizeni, self.rizeni[0].delka_rizeni)
@@ -1,3 +1,1313 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import requests
+import responses
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.timezone import make_aware
+
+from hlidac import archiv, export, hledani, metriky, parser
+from hlidac.crawler import CrawlState, klic_rizeni
+from hlidac.falesny_infosoud import FalesnyInfoSoud, Nastaveni
+from hlidac.fazety import fazety
+from hlidac.fetcher import AsyncFetcher, httpx
+from hlidac.hromadny_import import (
+    CHYBA,
+    DUPLICITNI,
+    PRIDANO,
+    importovat,
+    nacist_radky,
+    zaradit,
+)
+from hlidac.models import (
+    DilciRizeni,
+    HromadnyImport,
+    Predmet,
+    Rizeni,
+    Snimek,
+    Soud,
+    StazenaStranka,
+    Udalost,
+    Uloha,
+    Zmena,
+    ulozit_polozky,
+)
+from hlidac.notifikace import VYCHOZI_NOTIFIKATORY, odeslat_notifikace
+from hlidac.pipeline import Vysledek, po_davkach
+from hlidac.planovac import (
+    MAX_INTERVAL,
+    MIN_INTERVAL,
+    UKONCENE_INTERVAL,
+    interval_kontroly,
+    k_obnoveni,
+)
+from hlidac.refresh import fetch_rizeni_async
+from hlidac.spisova_znacka import NeplatnaSpisovaZnackaError, SpisovaZnacka
+from hlidac.statistiky import statistiky_delky
+from hlidac.ulohy import vyzvednout_ulohu
+from hlidac.zatez import FAZE_IMPORT, FAZE_OBNOVENI, INFOSOUD_ZAKLAD, zatezovy_test
+
+testdata_dir = Path(__file__).parent / "testdata"
+
+RIZENI_URL = (
+    "https://infosoud.justice.cz/InfoSoud/public/search.do?org=OSPHA09&krajOrg=MSPHAAB"
+    "&cisloSenatu=62&druhVec=NC&bcVec=2528&rocnik=2019&typSoudu=os&autoFill=true"
+    "&type=spzn"
+)
+DILCI_URL = (
+    "https://infosoud.justice.cz/InfoSoud/public/search.do?org=OSPHA09"
+    "&cisloSenatu=12&druhVec=P%20A%20NC&bcVec={}&rocnik=2019&typSoudu=os"
+    "&autoFill=true&type=spzn"
+)
+ZAHAJENI_URL = (
+    "https://infosoud.justice.cz/InfoSoud/public/list.do?druhVec=NC&rocnik=2019"
+    "&cisloSenatu=62&bcVec=2528&kraj=MSPHAAB&org=OSPHA09&poradiUdalosti=1"
+    "&cisloSenatuLabel=62&typSoudu=os&agendaNc=CIVIL&druhUdalosti=ZAHAJ_RIZ"
+    "&idUdalosti=null&druhVecId=NC&rocnikId=2019&cisloSenatuId=62&bcVecId=2528"
+    "&orgId=OSPHA09"
+)
+
+
+def add_infosoud_responses():
+    with open(testdata_dir / "62-Nc-2528-2019.html") as f:
+        responses.add(responses.GET, RIZENI_URL, body=f.read())
+    with open(testdata_dir / "62-Nc-2528-2019-ZAHAJ_RIZ.html") as f:
+        responses.add(responses.GET, ZAHAJENI_URL, body=f.read())
+
+
+def add_dilci_responses():
+    # hlavni rizeni, jeho dilci rizeni 105 a nedostupne dilci rizeni 104
+    add_infosoud_responses()
+    dilci = parser.load_from_file(testdata_dir / "12-P-A-NC-105.html")
+    with open(testdata_dir / "12-P-A-NC-105.html") as f:
+        responses.add(responses.GET, DILCI_URL.format(105), body=f.read())
+    with open(testdata_dir / "62-Nc-2528-2019-ZAHAJ_RIZ.html") as f:
+        responses.add(responses.GET, dilci.zahajeni.absolute_url, body=f.read())
+    responses.add(responses.GET, DILCI_URL.format(104), status=404)
+
+
+def create_rizeni(soud="Městský soud Praha\xa0>\xa0Obvodní soud Praha 9", **kwargs):
+    if "predmet" in kwargs:
+        kwargs["predmet"] = Predmet.objects.get_or_create(nazev=kwargs["predmet"])[0]
+    return Rizeni.objects.create(
+        **{
+            "url": RIZENI_URL,
+            "spisova_znacka": "62 NC 2528 / 2019",
+            "soud": Soud.objects.get_or_create(nazev=soud)[0],
+            "zmena_ve_spisu": make_aware(datetime.datetime(2019, 3, 8)),
+            "datum_zahajeni": date(2019, 3, 8),
+            **kwargs,
+        }
+    )
+
+
+class ObnovitRizeniTest(TestCase):
+    @responses.activate
+    def test_obnovit_rizeni(self):
+        add_infosoud_responses()
+        rizeni = create_rizeni()
+
+        out = StringIO()
+        call_command("obnovit_rizeni", stdout=out, stderr=StringIO())
+
+        rizeni.refresh_from_db()
+        self.assertTrue(rizeni.ukoncene)
+        self.assertEqual(rizeni.datum_skonceni, date(2019, 8, 8))
+        self.assertEqual(
+            rizeni.predmet.nazev, "Svěření do péče a určení výživného (včetně změn)"
+        )
+        self.assertEqual(
+            rizeni.soud.nazev, "Městský soud Praha\xa0>\xa0Obvodní soud Praha 9"
+        )
+        self.assertIn("Obnoveno 1 řízení, beze změny: 0, chyb: 0", out.getvalue())
+        self.assertEqual(
+            list(
+                rizeni.udalosti.order_by("datum", "poradi").values_list("druh", "datum")
+            ),
+            [
+                ("ZAHAJ_RIZ", date(2019, 3, 8)),
+                ("ST_VEC_ODS", date(2019, 8, 8)),
+                ("ST_VEC_VYR", date(2019, 8, 8)),
+            ],
+        )
+        self.assertEqual(
+            set(rizeni.dilci_rizeni.values_list("spisova_znacka", flat=True)),
+            {"12 P A NC 105 / 2019", "12 P A NC 104 / 2019"},
+        )
+
+    @responses.activate
+    def test_obnovit_rizeni__chyba(self):
+        with open(testdata_dir / "neexistuje.html") as f:
+            responses.add(responses.GET, RIZENI_URL, body=f.read())
+        create_rizeni()
+
+        out = StringIO()
+        err = StringIO()
+        call_command("obnovit_rizeni", stdout=out, stderr=err)
+
+        self.assertIn("Obnoveno 0 řízení, beze změny: 0, chyb: 1", out.getvalue())
+        self.assertIn("neexistuje", err.getvalue())
+
+    @responses.activate
+    def test_obnovit_rizeni__chyba_parseru(self):
+        add_infosoud_responses()
+        responses.add(responses.GET, DILCI_URL.format(105), body="<html></html>")
+        rizeni = create_rizeni()
+        create_rizeni(spisova_znacka="12 P A NC 105 / 2019", url=DILCI_URL.format(105))
+
+        out = StringIO()
+        call_command("obnovit_rizeni", stdout=out, stderr=StringIO())
+
+        self.assertIn("Obnoveno 1 řízení, beze změny: 0, chyb: 1", out.getvalue())
+        rizeni.refresh_from_db()
+        self.assertTrue(rizeni.ukoncene)
+
+    @responses.activate
+    def test_obnovit_rizeni__beze_zmeny(self):
+        add_infosoud_responses()
+        create_rizeni()
+        call_command("obnovit_rizeni", stdout=StringIO())
+        self.assertEqual(len(responses.calls), 2)
+
+        out = StringIO()
+        call_command("obnovit_rizeni", vse=True, stdout=out)
+
+        self.assertEqual(len(responses.calls), 3)
+        self.assertIn("Obnoveno 0 řízení, beze změny: 1, chyb: 0", out.getvalue())
+
+    @responses.activate
+    def test_obnovit_rizeni__po_castech(self):
+        add_dilci_responses()
+        create_rizeni()
+        create_rizeni(spisova_znacka="12 P A NC 105 / 2019", url=DILCI_URL.format(105))
+
+        with mock.patch("hlidac.models.BATCH_SIZE", 1):
+            call_command("obnovit_rizeni", stdout=StringIO())
+            out = StringIO()
+            call_command("obnovit_rizeni", vse=True, stdout=out)
+
+        self.assertIn("Obnoveno 0 řízení, beze změny: 2, chyb: 0", out.getvalue())
+
+    @responses.activate
+    def test_obnovit_rizeni__planovac(self):
+        add_infosoud_responses()
+        rizeni = create_rizeni()
+        call_command("obnovit_rizeni", stdout=StringIO())
+
+        rizeni.refresh_from_db()
+        self.assertAlmostEqual(
+            rizeni.pristi_kontrola,
+            timezone.now() + UKONCENE_INTERVAL,
+            delta=timedelta(minutes=1),
+        )
+        out = StringIO()
+        call_command("obnovit_rizeni", stdout=out)
+        self.assertEqual(len(responses.calls), 2)
+        self.assertIn("Obnoveno 0 řízení, beze změny: 0, chyb: 0", out.getvalue())
+
+    def test_interval_kontroly(self):
+        ted = timezone.now()
+        rizeni = Rizeni(ukoncene=False, zmena_ve_spisu=ted - timedelta(days=4))
+        self.assertEqual(interval_kontroly(rizeni, 0, ted), timedelta(days=1))
+        self.assertEqual(interval_kontroly(rizeni, 365, ted), timedelta(hours=6))
+        self.assertEqual(interval_kontroly(rizeni, 10000, ted), MIN_INTERVAL)
+        rizeni.zmena_ve_spisu = ted - timedelta(days=1000)
+        self.assertEqual(interval_kontroly(rizeni, 0, ted), MAX_INTERVAL)
+        self.assertEqual(interval_kontroly(rizeni, 73, ted), timedelta(days=1.25))
+        rizeni.ukoncene = True
+        self.assertEqual(interval_kontroly(rizeni, 0, ted), UKONCENE_INTERVAL)
+
+    def test_k_obnoveni(self):
+        ted = timezone.now()
+        pozdeji = create_rizeni(
+            spisova_znacka="1 C 1 / 2020", pristi_kontrola=ted + timedelta(hours=1)
+        )
+        drive = create_rizeni(
+            spisova_znacka="1 C 2 / 2020", pristi_kontrola=ted - timedelta(hours=1)
+        )
+        nove = create_rizeni(spisova_znacka="1 C 3 / 2020")
+
+        self.assertEqual(list(k_obnoveni(ted=ted)), [nove, drive])
+        self.assertEqual(list(k_obnoveni(1, ted=ted)), [nove])
+        self.assertNotIn(pozdeji, k_obnoveni(ted=ted))
+
+    @responses.activate
+    def test_obnovit_rizeni__not_modified(self):
+        responses.add(responses.GET, RIZENI_URL, status=304)
+        rizeni = create_rizeni()
+        Udalost.objects.create(
+            rizeni=rizeni,
+            druh=parser.DRUH_ZAHAJENI,
+            poradi=1,
+            nazev="Zahájení řízení",
+            datum=date(2019, 3, 8),
+        )
+        StazenaStranka.objects.create(
+            url=RIZENI_URL, etag='"abc"', hash_obsahu="0" * 64
+        )
+
+        out = StringIO()
+        call_command("obnovit_rizeni", stdout=out)
+
+        self.assertEqual(responses.calls[0].request.headers["If-None-Match"], '"abc"')
+        self.assertIn("Obnoveno 0 řízení, beze změny: 1, chyb: 0", out.getvalue())
+
+    @responses.activate
+    def test_obnovit_rizeni__doplneni_udalosti(self):
+        # stranka se od posledniho stazeni nezmenila, ale udalosti rizeni
+        # jeste nejsou v databazi
+        add_infosoud_responses()
+        rizeni = create_rizeni(predmet="Péče o nezletilé")
+        with open(testdata_dir / "62-Nc-2528-2019.html") as f:
+            StazenaStranka.objects.create(
+                url=RIZENI_URL, etag='"abc"', hash_obsahu=parser.content_hash(f.read())
+            )
+
+        out = StringIO()
+        call_command("obnovit_rizeni", stdout=out)
+
+        self.assertNotIn("If-None-Match", responses.calls[0].request.headers)
+        self.assertIn("Obnoveno 1 řízení, beze změny: 0, chyb: 0", out.getvalue())
+        self.assertEqual(rizeni.udalosti.count(), 3)
+        self.assertEqual(rizeni.dilci_rizeni.count(), 2)
+        self.assertFalse(Zmena.objects.exists())
+
+
+class UlozitPolozkyTest(TestCase):
+    def test_ulozit_polozky(self):
+        rizeni = create_rizeni()
+        nactene = parser.load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        ulozit_polozky([(rizeni, nactene)])
+        zahajeni = Udalost.objects.get(rizeni=rizeni, druh=parser.DRUH_ZAHAJENI)
+
+        nactene.udalosti[0].nazev = "Zahájení"
+        del nactene.udalosti[1]
+        nactene.dilci_rizeni.append(parser.DilciRizeni("12 P A NC 106 / 2019"))
+        with self.assertNumQueries(7):
+            ulozit_polozky([(rizeni, nactene)])
+
+        self.assertEqual(rizeni.udalosti.count(), 2)
+        self.assertEqual(rizeni.dilci_rizeni.count(), 3)
+        zahajeni_po = Udalost.objects.get(rizeni=rizeni, druh=parser.DRUH_ZAHAJENI)
+        self.assertEqual(zahajeni_po.pk, zahajeni.pk)
+        self.assertEqual(zahajeni_po.nazev, "Zahájení")
+        self.assertTrue(
+            DilciRizeni.objects.filter(spisova_znacka="12 P A NC 106 / 2019").exists()
+        )
+
+    def test_ulozit_polozky__bez_odkazu(self):
+        rizeni = create_rizeni()
+        nactene = parser.load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        nactene.udalosti[1].url = None
+        ulozit_polozky([(rizeni, nactene)])
+        self.assertEqual(rizeni.udalosti.count(), 2)
+
+
+class UpsertTest(TestCase):
+    def test_upsert(self):
+        puvodni = create_rizeni(stav="Nevyřízená věc")
+        nactene = parser.load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        ulozene = Rizeni(url="http://example.com/jina-adresa")
+        ulozene.aktualizovat(nactene)
+        nactene.spisova_znacka = "62 NC 2529 / 2019"
+        nove = Rizeni(url="http://example.com/nove")
+        nove.aktualizovat(nactene)
+
+        Rizeni.objects.upsert([ulozene, nove])
+
+        self.assertEqual(ulozene.pk, puvodni.pk)
+        self.assertIsNotNone(nove.pk)
+        self.assertEqual(Rizeni.objects.count(), 2)
+        puvodni.refresh_from_db()
+        self.assertEqual(puvodni.url, RIZENI_URL)
+        self.assertEqual(puvodni.stav, nactene.stav_rizeni)
+        self.assertTrue(puvodni.ukoncene)
+        self.assertEqual(Rizeni.objects.get(pk=nove.pk).url, "http://example.com/nove")
+        self.assertEqual(
+            Rizeni.objects.get(pk=nove.pk).spisova_znacka, "62 NC 2529 / 2019"
+        )
+        self.assertEqual(
+            Rizeni.objects.podle_znacky("62-Nc-2529-2019").get().pk, nove.pk
+        )
+
+    def test_znacka(self):
+        rizeni = create_rizeni(spisova_znacka="62 nc 1/2019")
+        self.assertEqual(rizeni.spisova_znacka, "62 NC 1 / 2019")
+        self.assertEqual(
+            (rizeni.senat, rizeni.rejstrik, rizeni.cislo, rizeni.rocnik),
+            (62, "NC", 1, 2019),
+        )
+        # stejna znacka v jinem zapisu je stale stejne rizeni
+        with self.assertRaises(IntegrityError):
+            create_rizeni(spisova_znacka="62 NC 1 / 2019")
+
+
+class StatistikyTest(TestCase):
+    def setUp(self):
+        for i, (soud, dny) in enumerate(
+            [("A", 10), ("A", 20), ("A", 30), ("A", 40), ("B", 100)]
+        ):
+            create_rizeni(
+                spisova_znacka=str(i),
+                soud=soud,
+                datum_skonceni=date(2019, 3, 8) + timedelta(days=dny),
+                probehlo_odvolani=soud == "B",
+            )
+
+    def test_statistiky_delky(self):
+        statistiky = statistiky_delky(podle=["soud"])
+        self.assertEqual(
+            statistiky,
+            [
+                {
+                    "soud": "A",
+                    "pocet": 4,
+                    "prumer": timedelta(days=25),
+                    "minimum": timedelta(days=10),
+                    "maximum": timedelta(days=40),
+                    "p50": timedelta(days=20),
+                    "p90": timedelta(days=40),
+                },
+                {
+                    "soud": "B",
+                    "pocet": 1,
+                    "prumer": timedelta(days=100),
+                    "minimum": timedelta(days=100),
+                    "maximum": timedelta(days=100),
+                    "p50": timedelta(days=100),
+                    "p90": timedelta(days=100),
+                },
+            ],
+        )
+
+    def test_statistiky_delky__bez_skupin(self):
+        statistiky = statistiky_delky(podle=[], percentily=[0.5])
+        self.assertEqual(statistiky[0]["pocet"], 5)
+        self.assertEqual(statistiky[0]["p50"], timedelta(days=30))
+
+    def test_statistiky_view(self):
+        response = self.client.get(
+            reverse("statistiky"), {"podle": ["rok", "probehlo_odvolani"]}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (r["rok"], r["probehlo_odvolani"], r["pocet"], r["p50"])
+                for r in response.json()["statistiky"]
+            ],
+            [(2019, False, 4, 20.0), (2019, True, 1, 100.0)],
+        )
+
+    def test_statistiky_view__neznama_skupina(self):
+        response = self.client.get(reverse("statistiky"), {"podle": "url"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProchazetRizeniTest(TestCase):
+    @responses.activate
+    def test_prochazet_rizeni(self):
+        add_dilci_responses()
+        out = StringIO()
+        err = StringIO()
+
+        call_command("prochazet_rizeni", RIZENI_URL, stdout=out, stderr=err)
+
+        self.assertIn("Načteno 2 řízení, chyb: 1", out.getvalue())
+        self.assertEqual(
+            set(Rizeni.objects.values_list("spisova_znacka", flat=True)),
+            {"62 NC 2528 / 2019", "12 P A NC 105 / 2019"},
+        )
+        # stranky obou rizeni a jejich zahajeni
+        self.assertEqual(StazenaStranka.objects.count(), 4)
+        self.assertEqual(len(responses.calls), 5)
+
+    @responses.activate
+    def test_prochazet_rizeni__chyba_parseru(self):
+        add_infosoud_responses()
+        responses.add(responses.GET, DILCI_URL.format(105), body="<html></html>")
+        responses.add(responses.GET, DILCI_URL.format(104), status=404)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stav = os.path.join(tmpdir, "stav.json")
+            out = StringIO()
+
+            call_command(
+                "prochazet_rizeni", RIZENI_URL, stav=stav, stdout=out, stderr=StringIO()
+            )
+
+            self.assertEqual(CrawlState.load(stav).fronta, [])
+        self.assertIn("Načteno 1 řízení, chyb: 2", out.getvalue())
+
+    @responses.activate
+    def test_prochazet_rizeni__hloubka(self):
+        add_dilci_responses()
+        out = StringIO()
+
+        call_command("prochazet_rizeni", RIZENI_URL, hloubka=0, stdout=out)
+
+        self.assertIn("Načteno 1 řízení, chyb: 0", out.getvalue())
+
+    @responses.activate
+    def test_prochazet_rizeni__pokracovani(self):
+        add_dilci_responses()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stav = os.path.join(tmpdir, "stav.json")
+            state = CrawlState()
+            state.pridat(RIZENI_URL, 0)
+            state.fronta = [(DILCI_URL.format(105), 1)]
+            state.save(stav)
+            out = StringIO()
+
+            call_command("prochazet_rizeni", RIZENI_URL, stav=stav, stdout=out)
+
+            self.assertEqual(CrawlState.load(stav).fronta, [])
+        self.assertIn("Načteno 1 řízení, chyb: 0", out.getvalue())
+        self.assertEqual(Rizeni.objects.get().spisova_znacka, "12 P A NC 105 / 2019")
+
+    def test_klic_rizeni(self):
+        self.assertEqual(klic_rizeni(RIZENI_URL), klic_rizeni(ZAHAJENI_URL))
+        self.assertNotEqual(klic_rizeni(RIZENI_URL), klic_rizeni(DILCI_URL.format(105)))
+
+
+class PridatRizeniTest(TestCase):
+    @responses.activate
+    def test_pridat_rizeni(self):
+        add_infosoud_responses()
+
+        response = self.client.post(reverse("pridat-rizeni"), {"url": RIZENI_URL})
+        uloha = Uloha.objects.get()
+        nahled_url = reverse("nahled-rizeni", args=[uloha.pk])
+        self.assertRedirects(response, nahled_url)
+        self.assertEqual(len(responses.calls), 0)
+
+        response = self.client.get(nahled_url)
+        self.assertContains(response, "Načítám údaje řízení")
+        self.assertContains(response, 'http-equiv="refresh"')
+
+        call_command("zpracovat_ulohy", jednou=True, stdout=StringIO())
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(
+            set(StazenaStranka.objects.values_list("url", flat=True)),
+            {RIZENI_URL, ZAHAJENI_URL},
+        )
+
+        response = self.client.get(nahled_url)
+        self.assertNotContains(response, 'http-equiv="refresh"')
+        self.assertContains(response, "62 NC 2528 / 2019")
+        self.assertContains(response, "Svěření do péče a určení výživného")
+
+        response = self.client.post(nahled_url, {"url": RIZENI_URL, "verified": "1"})
+        self.assertRedirects(response, "/")
+        self.assertEqual(len(responses.calls), 2)
+        rizeni = Rizeni.objects.get()
+        self.assertEqual(rizeni.spisova_znacka, "62 NC 2528 / 2019")
+        self.assertEqual(rizeni.udalosti.count(), 3)
+        self.assertEqual(Uloha.objects.get().stav, Uloha.PRIDANO)
+
+        response = self.client.post(nahled_url, {"url": RIZENI_URL, "verified": "1"})
+        self.assertRedirects(response, "/")
+        self.assertEqual(Rizeni.objects.count(), 1)
+        self.assertEqual(Uloha.objects.count(), 1)
+
+    @responses.activate
+    def test_pridat_rizeni__neexistuje(self):
+        with open(testdata_dir / "neexistuje.html") as f:
+            responses.add(responses.GET, RIZENI_URL, body=f.read())
+        uloha = Uloha.objects.create(url=RIZENI_URL)
+
+        call_command("zpracovat_ulohy", jednou=True, stdout=StringIO())
+
+        response = self.client.get(reverse("nahled-rizeni", args=[uloha.pk]))
+        self.assertContains(response, "Spisová značka 62 NC 1/2019 neexistuje")
+        response = self.client.post(
+            reverse("nahled-rizeni", args=[uloha.pk]),
+            {"url": RIZENI_URL, "verified": "1"},
+        )
+        self.assertFalse(Rizeni.objects.exists())
+
+    def test_pridat_rizeni__chyba_parseru(self):
+        uloha = Uloha.objects.create(url=RIZENI_URL)
+        with mock.patch("hlidac.ulohy.fetch_rizeni", side_effect=IndexError("x")):
+            call_command("zpracovat_ulohy", jednou=True, stdout=StringIO())
+
+        uloha.refresh_from_db()
+        self.assertEqual(uloha.stav, Uloha.CHYBA)
+        self.assertIn("IndexError", uloha.chyba)
+
+    def test_vyzvednout_ulohu(self):
+        prvni = Uloha.objects.create(url=RIZENI_URL)
+        druha = Uloha.objects.create(url=RIZENI_URL)
+
+        self.assertEqual(vyzvednout_ulohu(), prvni)
+        self.assertEqual(vyzvednout_ulohu(), druha)
+        self.assertIsNone(vyzvednout_ulohu())
+
+        Uloha.objects.filter(pk=prvni.pk).update(
+            zahajeno=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(vyzvednout_ulohu(), prvni)
+
+
+class ImportRizeniTest(TestCase):
+    def test_spisova_znacka(self):
+        znacka = SpisovaZnacka.parse("12 p a nc 105/2019")
+        self.assertEqual(str(znacka), "12 P A NC 105 / 2019")
+        self.assertEqual(znacka.url("OSPHA09"), DILCI_URL.format(105))
+        self.assertEqual(
+            SpisovaZnacka.from_url(RIZENI_URL), SpisovaZnacka(62, "NC", 2528, 2019)
+        )
+        with self.assertRaises(NeplatnaSpisovaZnackaError):
+            SpisovaZnacka.parse("NC 2528/2019")
+        for zapis in ("62 NC 2528/2019", "62-Nc-2528-2019", " 62 nc 2528 /2019 "):
+            self.assertEqual(
+                SpisovaZnacka.parse(zapis), SpisovaZnacka(62, "NC", 2528, 2019)
+            )
+        self.assertEqual(
+            SpisovaZnacka.from_filename(testdata_dir / "62-Nc-2528-2019.html"),
+            SpisovaZnacka(62, "NC", 2528, 2019),
+        )
+        self.assertEqual(SpisovaZnacka.parse("12-P-A-NC-105-2019").rejstrik, "P A NC")
+        self.assertIsNone(SpisovaZnacka.parse_or_none("12-P-A-NC-105"))
+
+    def test_nacist_radky(self):
+        radky = nacist_radky(
+            [
+                "# seznam rizeni\n",
+                f"{RIZENI_URL}\n",
+                "\n",
+                "12 P A NC 105/2019;ospha09\n",
+                "nesmysl\n",
+            ]
+        )
+
+        self.assertEqual([radek.cislo for radek in radky], [2, 4, 5])
+        self.assertEqual(radky[0].spisova_znacka, "62 NC 2528 / 2019")
+        self.assertEqual(radky[1].url, DILCI_URL.format(105))
+        self.assertEqual(radky[2].stav, CHYBA)
+
+    @responses.activate
+    def test_importovat_rizeni(self):
+        add_dilci_responses()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            soubor = os.path.join(tmpdir, "rizeni.csv")
+            Path(soubor).write_text(
+                f"{RIZENI_URL}\n"
+                "12 P A NC 105/2019,OSPHA09\n"
+                "62 NC 2528/2019,OSPHA09\n"
+                "12 P A NC 104/2019,OSPHA09\n"
+                "nesmysl\n"
+            )
+            out = StringIO()
+            err = StringIO()
+
+            call_command("importovat_rizeni", soubor, stdout=out, stderr=err)
+
+            self.assertIn("Přidáno 2 řízení, duplicitních: 1, chyb: 2", out.getvalue())
+            self.assertIn(
+                "3: 62 NC 2528/2019,OSPHA09: řízení již existuje", out.getvalue()
+            )
+            self.assertIn(
+                "4: 12 P A NC 104/2019,OSPHA09: Řízení se nepodařilo", err.getvalue()
+            )
+            self.assertEqual(
+                set(Rizeni.objects.values_list("spisova_znacka", flat=True)),
+                {"62 NC 2528 / 2019", "12 P A NC 105 / 2019"},
+            )
+            self.assertEqual(Rizeni.objects.get(url=RIZENI_URL).udalosti.count(), 3)
+            pocet_pozadavku = len(responses.calls)
+
+            out = StringIO()
+            call_command("importovat_rizeni", soubor, stdout=out, stderr=StringIO())
+
+        self.assertIn("Přidáno 0 řízení, duplicitních: 3, chyb: 2", out.getvalue())
+        self.assertEqual(len(responses.calls), pocet_pozadavku + 1)
+
+    def test_zaradit__stejna_znacka_jineho_soudu(self):
+        create_rizeni()
+        radky = nacist_radky(
+            [
+                "62 NC 2528/2019,OSPHA09",
+                "62 NC 2528/2019,OSBE01",
+                "62 nc 2528/2019;osbe01",
+            ]
+        )
+
+        hromadny_import = zaradit(radky)
+
+        self.assertEqual([radek.stav for radek in radky], [DUPLICITNI, "", DUPLICITNI])
+        self.assertEqual(
+            list(hromadny_import.ulohy.values_list("url", flat=True)),
+            [SpisovaZnacka(62, "NC", 2528, 2019).url("OSBE01")],
+        )
+
+    def test_importovat__chyba_parseru(self):
+        nactene = parser.load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+
+        def fetch_rizeni(url, fetcher):
+            if url == RIZENI_URL:
+                return nactene
+            raise IndexError("list index out of range")
+
+        radky = nacist_radky([RIZENI_URL, "12 P A NC 105/2019,OSPHA09"])
+        with mock.patch("hlidac.hromadny_import.fetch_rizeni", fetch_rizeni):
+            importovat(radky)
+
+        self.assertEqual([radek.stav for radek in radky], [PRIDANO, CHYBA])
+        self.assertIn("IndexError", radky[1].zprava)
+        self.assertTrue(Rizeni.objects.filter(url=RIZENI_URL).exists())
+
+    @responses.activate
+    def test_admin_import(self):
+        add_dilci_responses()
+        User.objects.create_superuser("admin", "admin@example.com", "heslo")
+        self.client.login(username="admin", password="heslo")
+        create_rizeni()
+
+        response = self.client.get(reverse("admin:hlidac_rizeni_changelist"))
+        self.assertContains(response, reverse("admin:hlidac_rizeni_import"))
+        response = self.client.post(
+            reverse("admin:hlidac_rizeni_import"),
+            {
+                "soubor": SimpleUploadedFile(
+                    "rizeni.csv",
+                    b"62 NC 2528/2019,OSPHA09\n"
+                    b"12 P A NC 105/2019,OSPHA09\n"
+                    b"12 P A NC 104/2019,OSPHA09\n"
+                    b"nesmysl\n",
+                )
+            },
+        )
+        self.assertEqual(len(responses.calls), 0)
+        prubeh_url = reverse(
+            "admin:hlidac_rizeni_import_prubeh", args=[HromadnyImport.objects.get().pk]
+        )
+        self.assertRedirects(response, prubeh_url)
+        response = self.client.get(prubeh_url)
+        self.assertContains(response, 'http-equiv="refresh"')
+        self.assertContains(response, "Řízení již existuje")
+        self.assertContains(response, "Očekávána adresa řízení")
+
+        # nahled z formulare ma prednost pred hromadnym importem
+        nahled = Uloha.objects.create(url=RIZENI_URL)
+        self.assertEqual(vyzvednout_ulohu(), nahled)
+        Uloha.objects.filter(pk=nahled.pk).delete()
+        call_command("zpracovat_ulohy", jednou=True, stdout=StringIO())
+
+        response = self.client.get(prubeh_url)
+        self.assertNotContains(response, 'http-equiv="refresh"')
+        self.assertContains(response, "Řízení přidáno")
+        self.assertContains(response, DILCI_URL.format(104).replace("&", "&amp;"))
+        self.assertEqual(
+            set(Rizeni.objects.values_list("spisova_znacka", flat=True)),
+            {"62 NC 2528 / 2019", "12 P A NC 105 / 2019"},
+        )
+
+
+@override_settings(
+    HLIDAC_NOTIFIKATORY=[
+        {
+            "BACKEND": "hlidac.notifikace.EmailNotifikator",
+            "OPTIONS": {"prijemci": ["hlidac@example.com"]},
+        },
+        {
+            "BACKEND": "hlidac.notifikace.WebhookNotifikator",
+            "OPTIONS": {"url": "https://example.com/webhook"},
+        },
+    ]
+)
+class ZmenyTest(TestCase):
+    def create_rizeni(self):
+        # ulozeny stav pred skoncenim veci a zalozenim dilciho rizeni 104
+        nactene = parser.load_from_file(testdata_dir / "62-Nc-2528-2019.html")
+        nactene.udalosti = nactene.udalosti_podle_druhu(parser.DRUH_ZAHAJENI)
+        nactene.dilci_rizeni = nactene.dilci_rizeni[:1]
+        rizeni = create_rizeni(stav="Nevyřízená věc")
+        ulozit_polozky([(rizeni, nactene)])
+        return rizeni
+
+    def obnovit_rizeni(self):
+        call_command("obnovit_rizeni", stdout=StringIO(), stderr=StringIO())
+
+    @responses.activate
+    def test_zmeny(self):
+        add_infosoud_responses()
+        rizeni = self.create_rizeni()
+
+        self.obnovit_rizeni()
+
+        self.assertEqual(
+            sorted(rizeni.zmeny.values_list("druh", "popis")),
+            [
+                (Zmena.NOVA_UDALOST, "Vyřízení věci (08.08.2019)"),
+                (Zmena.NOVE_DILCI_RIZENI, "Dílčí řízení 12 P A NC 104 / 2019"),
+                (Zmena.SKONCENI, "Skončení věci (08.08.2019)"),
+                (
+                    Zmena.ZMENA_STAVU,
+                    "Stav řízení: Odškrtnutá - evidenčně ukončená věc (od 08.08.2019)",
+                ),
+            ],
+        )
+
+        StazenaStranka.objects.all().delete()
+        self.obnovit_rizeni()
+        self.assertEqual(Zmena.objects.count(), 4)
+
+    @responses.activate
+    def test_zmeny__nove_rizeni(self):
+        add_infosoud_responses()
+        create_rizeni()
+
+        self.obnovit_rizeni()
+
+        self.assertFalse(Zmena.objects.exists())
+
+    @responses.activate
+    def test_odeslat_notifikace(self):
+        add_infosoud_responses()
+        responses.add(responses.POST, "https://example.com/webhook")
+        self.create_rizeni()
+        self.obnovit_rizeni()
+
+        out = StringIO()
+        call_command("odeslat_notifikace", stdout=out)
+
+        self.assertIn("Odesláno 4 změn", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Změna ve spisu 62 NC 2528 / 2019")
+        self.assertIn("- Skončení věci (08.08.2019)", mail.outbox[0].body)
+        self.assertEqual(len(json.loads(responses.calls[-1].request.body)["zmeny"]), 4)
+        self.assertFalse(Zmena.objects.filter(odeslano__isnull=True).exists())
+        self.assertEqual(odeslat_notifikace(), 0)
+
+    @responses.activate
+    def test_odeslat_notifikace__bez_prijemcu(self):
+        add_infosoud_responses()
+        self.create_rizeni()
+        self.obnovit_rizeni()
+
+        with override_settings(HLIDAC_NOTIFIKATORY=VYCHOZI_NOTIFIKATORY, ADMINS=[]):
+            with self.assertRaises(CommandError):
+                call_command("odeslat_notifikace", stdout=StringIO())
+
+        self.assertEqual(Zmena.objects.filter(odeslano__isnull=True).count(), 4)
+
+
+class ArchivTest(TestCase):
+    def setUp(self):
+        self.vzorky = [
+            (testdata_dir / name).read_bytes()
+            for name in ("62-Nc-2528-2019.html", "62-Nc-2503-2019.html")
+        ]
+
+    def test_komprese(self):
+        slovnik = archiv.trenovat_slovnik(self.vzorky, archiv.KODEK_ZLIB)
+        for data in self.vzorky:
+            komprimovano = archiv.komprimovat(data, archiv.KODEK_ZLIB, slovnik.data)
+            self.assertLess(
+                len(komprimovano), len(archiv.komprimovat(data, archiv.KODEK_ZLIB))
+            )
+            self.assertEqual(
+                archiv.dekomprimovat(komprimovano, archiv.KODEK_ZLIB, slovnik.data),
+                data,
+            )
+
+    @skipUnless(archiv.zstandard, "zstandard neni nainstalovany")
+    def test_komprese__zstd(self):
+        data = self.vzorky[0]
+        komprimovano = archiv.komprimovat(data, archiv.KODEK_ZSTD, self.vzorky[1])
+        self.assertEqual(
+            archiv.dekomprimovat(komprimovano, archiv.KODEK_ZSTD, self.vzorky[1]),
+            data,
+        )
+
+    @skipUnless(archiv.zstandard, "zstandard neni nainstalovany")
+    def test_komprese__zstd_slovniky(self):
+        slovnik = archiv.trenovat_slovnik(self.vzorky * 10, archiv.KODEK_ZSTD)
+        slovnik.save()
+        with mock.patch.object(archiv, "_zstd_slovniky", {}) as slovniky:
+            komprimovano = archiv.komprimovat(
+                self.vzorky[0], archiv.KODEK_ZSTD, bytes(slovnik.data), slovnik.pk
+            )
+            self.assertEqual(list(slovniky), [slovnik.pk])
+            for i in range(archiv.MAX_ZSTD_SLOVNIKU):
+                archiv.komprimovat(b"", archiv.KODEK_ZSTD, self.vzorky[1], -i)
+            self.assertEqual(len(slovniky), archiv.MAX_ZSTD_SLOVNIKU)
+            self.assertNotIn(slovnik.pk, slovniky)
+        self.assertEqual(
+            archiv.dekomprimovat(
+                komprimovano, archiv.KODEK_ZSTD, bytes(slovnik.data), slovnik.pk
+            ),
+            self.vzorky[0],
+        )
+
+    @responses.activate
+    def test_archivace(self):
+        add_infosoud_responses()
+        rizeni = create_rizeni()
+
+        call_command("obnovit_rizeni", stdout=StringIO())
+        call_command("obnovit_rizeni", vse=True, stdout=StringIO())
+
+        snimek = StazenaStranka.objects.get(url=RIZENI_URL).snimek
+        self.assertIn("62 NC 2528 / 2019", archiv.obsah(snimek))
+        # stranka zahajeni s predmetem rizeni se archivuje take
+        zahajeni = StazenaStranka.objects.get(url=ZAHAJENI_URL).snimek
+        self.assertIn("Předmět řízení", archiv.obsah(zahajeni))
+        self.assertEqual(Snimek.objects.count(), 2)
+
+        Udalost.objects.all().delete()
+        Rizeni.objects.update(stav="", datum_skonceni=None)
+        out = StringIO()
+        call_command("preparsovat_archiv", workers=1, stdout=out)
+
+        self.assertIn("Zpracováno 1 stránek, chyb: 0", out.getvalue())
+        rizeni.refresh_from_db()
+        self.assertEqual(
+            rizeni.stav, "Odškrtnutá - evidenčně ukončená věc (od 08.08.2019)"
+        )
+        self.assertEqual(rizeni.datum_skonceni, date(2019, 8, 8))
+        self.assertEqual(
+            rizeni.predmet.nazev, "Svěření do péče a určení výživného (včetně změn)"
+        )
+        self.assertEqual(rizeni.udalosti.count(), 3)
+
+    @responses.activate
+    def test_trenovat_slovnik(self):
+        add_infosoud_responses()
+        create_rizeni()
+        call_command("obnovit_rizeni", stdout=StringIO())
+        snimek = StazenaStranka.objects.get(url=RIZENI_URL).snimek
+        obsah = archiv.obsah(snimek)
+
+        out = StringIO()
+        call_command(
+            "trenovat_slovnik",
+            kodek=archiv.KODEK_ZLIB,
+            prekomprimovat=True,
+            stdout=out,
+        )
+
+        self.assertIn("Archiv překomprimován", out.getvalue())
+        snimek = Snimek.objects.select_related("slovnik").get(pk=snimek.pk)
+        self.assertEqual(snimek.slovnik.kodek, archiv.KODEK_ZLIB)
+        self.assertEqual(archiv.obsah(snimek), obsah)
+
+
+class PipelineTest(TestCase):
+    def test_nacist_soubory(self):
+        rizeni = create_rizeni()
+        out = StringIO()
+        err = StringIO()
+
+        call_command("nacist_soubory", str(testdata_dir), stdout=out, stderr=err)
+
+        self.assertIn("Zpracováno 4 souborů, chyb: 1", out.getvalue())
+        self.assertIn("neexistuje.html: SpisovaZnackaNeexistujeError", err.getvalue())
+        self.assertEqual(
+            set(Rizeni.objects.values_list("spisova_znacka", flat=True)),
+            {"62 NC 2528 / 2019", "62 NC 2503 / 2019", "12 P A NC 105 / 2019"},
+        )
+        rizeni.refresh_from_db()
+        self.assertEqual(rizeni.url, RIZENI_URL)
+        self.assertEqual(
+            rizeni.predmet.nazev, "Svěření do péče a určení výživného (včetně změn)"
+        )
+        self.assertEqual(rizeni.udalosti.count(), 3)
+
+    def test_nacist_soubory__chybny_predmet(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            html = (testdata_dir / "62-Nc-2528-2019.html").read_text()
+            Path(tmpdir, "rizeni.html").write_text(html)
+            Path(tmpdir, "rizeni-ZAHAJ_RIZ.html").write_text("<html></html>")
+            err = StringIO()
+
+            call_command(
+                "nacist_soubory", tmpdir, workers=1, stdout=StringIO(), stderr=err
+            )
+
+        self.assertIn("rizeni.html: AssertionError", err.getvalue())
+        self.assertFalse(Rizeni.objects.exists())
+
+    def test_po_davkach(self):
+        davky = []
+        vysledky = [
+            Vysledek(str(i), rizeni=parser.Rizeni("", "", "")) for i in range(5)
+        ] + [Vysledek("chyba", chyba="chyba")]
+
+        vracene = list(po_davkach(vysledky, davky.append, velikost=2))
+
+        self.assertEqual(vracene, vysledky)
+        self.assertEqual([len(davka) for davka in davky], [2, 2, 1])
+
+
+class SeznamRizeniTest(TestCase):
+    def setUp(self):
+        zacatek = make_aware(datetime.datetime(2021, 1, 1))
+        self.rizeni = [
+            create_rizeni(
+                spisova_znacka=f"1 C {i} / 2020",
+                soud="Obvodní soud Praha 9" if i % 2 else "Okresní soud Beroun",
+                zmena_ve_spisu=zacatek + timedelta(days=i // 2),
+                datum_skonceni=date(2019, 3, 18) if i % 3 == 0 else None,
+            )
+            for i in range(7)
+        ]
+
+    def nacist_vse(self, **params):
+        znacky = []
+        response = self.client.get(reverse("api-rizeni"), params)
+        while True:
+            data = response.json()
+            znacky += [radek["spisova_znacka"] for radek in data["rizeni"]]
+            if not data["dalsi"]:
+                return znacky
+            response = self.client.get(data["dalsi"])
+
+    def test_api(self):
+        self.assertEqual(
+            self.nacist_vse(velikost=2),
+            [f"1 C {i} / 2020" for i in reversed(range(7))],
+        )
+        self.assertEqual(
+            self.nacist_vse(velikost=2, soud="Okresní soud Beroun", ukoncene="true"),
+            ["1 C 6 / 2020", "1 C 0 / 2020"],
+        )
+
+        data = self.client.get(reverse("api-rizeni"), {"ukoncene": "true"}).json()
+        self.assertEqual(data["rizeni"][-1]["delka"], 10)
+        self.assertIsNone(data["dalsi"])
+
+    def test_api__znacka(self):
+        create_rizeni(spisova_znacka="1 C 1 / 2021")
+        create_rizeni(spisova_znacka="1 EC 1 / 2020")
+        self.assertEqual(
+            self.nacist_vse(rejstrik="c", rocnik=2020, velikost=3),
+            [f"1 C {i} / 2020" for i in reversed(range(7))],
+        )
+        self.assertEqual(self.nacist_vse(spisova_znacka="1-C-1-2021"), ["1 C 1 / 2021"])
+        response = self.client.get(reverse("api-rizeni"), {"spisova_znacka": "1 C"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_hledani(self):
+        create_rizeni(spisova_znacka="1 C 7 / 2020", predmet="Výživné nezletilých")
+        create_rizeni(spisova_znacka="1 C 8 / 2020", predmet="Určení výživného")
+        predmet = Predmet.objects.get(nazev="Určení výživného")
+        predmet.nazev = "Svěření do péče"
+        predmet.save()
+
+        self.assertEqual(
+            [(s.pole, s.nazev) for s in hledani.najit("vyziv")],
+            [("predmet", "Výživné nezletilých")],
+        )
+        # kratsi nazev se stejnou shodou je vys
+        self.assertEqual(
+            [s.nazev for s in hledani.najit("OBVODNI soud")],
+            ["Obvodní soud Praha 9", "Městský soud Praha\xa0>\xa0Obvodní soud Praha 9"],
+        )
+        self.assertEqual(hledani.najit("-- "), [])
+
+        data = self.client.get(reverse("api-hledani"), {"q": "péče"}).json()
+        self.assertEqual(
+            [r["spisova_znacka"] for r in data["rizeni"]], ["1 C 8 / 2020"]
+        )
+        self.assertEqual(data["rizeni"][0]["predmet"], "Svěření do péče")
+        # Praha je dvakrat v nazvu mestskeho soudu, jeho rizeni jsou prvni
+        data = self.client.get(
+            reverse("api-hledani"), {"q": "praha", "limit": 3}
+        ).json()
+        self.assertEqual(
+            [r["spisova_znacka"] for r in data["rizeni"]],
+            ["1 C 8 / 2020", "1 C 7 / 2020", "1 C 5 / 2020"],
+        )
+        self.assertEqual(
+            self.nacist_vse(hledat="beroun", ukoncene="true"),
+            ["1 C 6 / 2020", "1 C 0 / 2020"],
+        )
+
+    def test_hledani__filtr_bez_limitu(self):
+        for i in range(hledani.MAX_SHOD):
+            create_rizeni(spisova_znacka=f"2 C {i} / 2020", soud=f"Beroun {i}")
+        self.assertEqual(len(hledani.najit("beroun")), hledani.MAX_SHOD)
+        self.assertEqual(
+            len(self.nacist_vse(hledat="beroun", velikost=50)),
+            hledani.MAX_SHOD + 4,
+        )
+
+    def test_api__neplatny_kurzor(self):
+        response = self.client.get(reverse("api-rizeni"), {"kurzor": "nesmysl"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_seznam(self):
+        response = self.client.get(reverse("seznam-rizeni"), {"velikost": 5})
+        self.assertContains(response, "1 C 6 / 2020")
+        self.assertNotContains(response, "1 C 1 / 2020")
+        self.assertContains(response, "kurzor=")
+
+    def test_admin(self):
+        User.objects.create_superuser("admin", "admin@example.com", "heslo")
+        self.client.login(username="admin", password="heslo")
+        fazety()
+        # hodnoty filtru jsou v cache, nacita se jen session, uzivatel,
+        # pocet a stranka rizeni
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                reverse("admin:hlidac_rizeni_changelist"), {"o": "5"}
+            )
+        self.assertContains(response, "1 C 6 / 2020")
+        self.assertContains(response, "Okresní soud Beroun (4)")
+
+    def test_fazety(self):
+        self.assertEqual(
+            [(nazev, pocet) for _, nazev, pocet in fazety()["soud"]],
+            [("Obvodní soud Praha 9", 3), ("Okresní soud Beroun", 4)],
+        )
+        with self.assertNumQueries(0):
+            fazety()
+
+        create_rizeni(spisova_znacka="1 C 7 / 2020", predmet="Výživné")
+
+        self.assertEqual(
+            [(nazev, pocet) for _, nazev, pocet in fazety()["predmet"]],
+            [("Výživné", 1)],
+        )
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.rizeni = create_rizeni(predmet="Výživné", datum_skonceni=date(2019, 3, 18))
+        create_rizeni(spisova_znacka="1 C 1 / 2020", soud="Okresní soud Beroun")
+        for poradi, druh in enumerate(["ZAHAJ_RIZ", "ST_VEC_VYR"]):
+            Udalost.objects.create(
+                rizeni=self.rizeni,
+                druh=druh,
+                poradi=poradi,
+                nazev=druh,
+                datum=date(2019, 3, 8 + poradi),
+            )
+
+    def stahnout(self, nazev, **params):
+        response = self.client.get(reverse("export", args=nazev.split(".")), params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv(self):
+        radky = list(csv.DictReader(io.StringIO(self.stahnout("rizeni.csv").decode())))
+        self.assertEqual(
+            [r["spisova_znacka"] for r in radky], ["62 NC 2528 / 2019", "1 C 1 / 2020"]
+        )
+        self.assertEqual(radky[0]["delka_rizeni"], "10")
+        self.assertEqual(radky[0]["predmet"], "Výživné")
+        self.assertEqual(radky[0]["datum_skonceni"], "2019-03-18")
+        self.assertEqual(radky[1]["predmet"], "")
+
+    def test_jsonl(self):
+        radky = [
+            json.loads(radek)
+            for radek in self.stahnout(
+                "udalosti.jsonl", soud="Městský soud Praha\xa0>\xa0Obvodní soud Praha 9"
+            ).splitlines()
+        ]
+        self.assertEqual([r["druh"] for r in radky], ["ZAHAJ_RIZ", "ST_VEC_VYR"])
+        self.assertEqual(radky[0]["spisova_znacka"], "62 NC 2528 / 2019")
+        self.assertEqual(radky[1]["datum"], "2019-03-09")
+        self.assertEqual(
+            self.stahnout("udalosti.jsonl", soud="Okresní soud Beroun"), b""
+        )
+
+    @skipUnless(export.pyarrow, "pyarrow neni nainstalovany")
+    def test_parquet(self):
+        tabulka = export.pyarrow.parquet.read_table(
+            io.BytesIO(self.stahnout("rizeni.parquet"))
+        )
+        self.assertEqual(tabulka.num_rows, 2)
+        self.assertEqual(tabulka.column("delka_rizeni").to_pylist()[0], 10)
+
+    def test_neznamy_format(self):
+        response = self.client.get(reverse("export", args=["rizeni", "xlsx"]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_prikaz(self):
+        with tempfile.TemporaryDirectory() as adresar:
+            soubor = os.path.join(adresar, "rizeni.jsonl")
+            call_command(
+                "exportovat",
+                "rizeni",
+                "--format=jsonl",
+                f"--vystup={soubor}",
+                "--davka=1",
+                stdout=StringIO(),
+            )
+            with open(soubor) as f:
+                radky = [json.loads(radek) for radek in f]
+        self.assertEqual([r["id"] for r in radky], sorted(r["id"] for r in radky))
+        self.assertEqual(len(radky), 2)
+
+
+class ZatezTest(TestCase):
+    def test_zatezovy_test(self):
+        # skutecne rizeni senatu 999 test nesmi obnovit ani smazat
+        skutecne = create_rizeni(spisova_znacka="999 C 5 / 2020", senat=999)
+        with FalesnyInfoSoud(nastaveni=Nastaveni(zmeny=0.5, seed=1)) as server:
+            vysledky = zatezovy_test(server.url, pocet=3, max_workers=2, opakovani=2)
+
+        self.assertEqual(
+            [(v.faze, v.rizeni, v.chyby) for v in vysledky],
+            [(FAZE_IMPORT, 3, 0), (FAZE_OBNOVENI, 3, 0), (FAZE_OBNOVENI, 3, 0)],
+        )
+        # import stahuje stranku rizeni i zahajeni
+        self.assertEqual(vysledky[0].pozadavky, 6)
+        self.assertGreater(vysledky[0].percentil(0.95), 0)
+        self.assertEqual(list(Rizeni.objects.all()), [skutecne])
+        self.assertFalse(Snimek.objects.exists())
+
+    def test_falesny_infosoud(self):
+        znacka = SpisovaZnacka(7, "C", 123, 2021)
+        with FalesnyInfoSoud(nastaveni=Nastaveni(omezeni=0.5, seed=1)) as server:
+            url = znacka.url("OSBE01").replace(
+                "https://infosoud.justice.cz", server.url
+            )
+            statusy = {requests.get(url).status_code for _ in range(10)}
+            server.nastaveni.omezeni = 0
+            rizeni = parser.load_from_url(url)
+            neexistuje = requests.get(url.replace("bcVec=123", "bcVec=0")).text
+
+        self.assertEqual(statusy, {200, 429})
+        self.assertEqual(rizeni.spisova_znacka, str(znacka))
+        self.assertIn("bcVec=123", rizeni.zahajeni.url)
+        with self.assertRaises(parser.SpisovaZnackaNeexistujeError):
+            parser.parse_rizeni(neexistuje)
+
+
+class MetrikyTest(TestCase):
+    def tearDown(self):
+        metriky.zapnout(False)
+        metriky.vynulovat()
+
+    def test_vypnuto(self):
+        self.assertEqual(self.client.get(reverse("metriky")).status_code, 404)
+
+    def test_metriky(self):
+        metriky.zapnout()
+        create_rizeni()
+        self.client.get(reverse("seznam-rizeni"))
+
+        response = self.client.get(reverse("metriky"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'hlidac_view_duration_seconds_count{method="GET",status="200",'
+            'view="seznam-rizeni"} 1',
+            response.content.decode(),
+        )
+
+    @responses.activate
+    def test_obnovit_rizeni(self):
+        add_infosoud_responses()
+        create_rizeni()
+        with tempfile.TemporaryDirectory() as adresar:
+            soubor = os.path.join(adresar, "hlidac.prom")
+            call_command("obnovit_rizeni", "--metriky", soubor, stdout=StringIO())
+            with open(soubor) as f:
+                vystup = f.read()
+
+        self.assertIn('hlidac_http_responses_total{status="200"} 2', vystup)
+        self.assertIn(
+            'hlidac_stage_duration_seconds_count{stage="save_results"} 1', vystup
+        )
+
+
+class PresmerovanyAsyncFetcher(AsyncFetcher):
+    def __init__(self, adresa, **kwargs):
+        super().__init__(**kwargs)
+        self.adresa = adresa
+
+    async def get(self, url, **kwargs):
+        url = url.replace(INFOSOUD_ZAKLAD, self.adresa, 1)
+        return await super().get(url, **kwargs)
+
+
+@skipUnless(httpx, "httpx neni nainstalovany")
+class AsyncTest(TestCase):
+    def test_fetch_rizeni_async(self):
+        znacky = [SpisovaZnacka(7, "C", cislo, 2021) for cislo in range(1, 9)]
+
+        async def nacist(adresa):
+            async with PresmerovanyAsyncFetcher(adresa) as fetcher:
+                return await asyncio.gather(
+                    *(fetch_rizeni_async(z.url("OSBE01"), fetcher) for z in znacky)
+                )
+
+        with FalesnyInfoSoud(nastaveni=Nastaveni(latence=0.2)) as server:
+            start = time.perf_counter()
+            nactena = asyncio.run(nacist(server.url))
+            sekundy = time.perf_counter() - start
+
+        self.assertEqual([r.spisova_znacka for r in nactena], [str(z) for z in znacky])
+        self.assertEqual(
+            nactena[0].predmet_rizeni,
+            "Svěření do péče a určení výživného (včetně změn)",
+        )
+        # 16 pozadavku po 0,2 s by postupne trvalo pres 3 s
+        self.assertLess(sekundy, 2.4)
+
+    def test_opakovani(self):
+        url = SpisovaZnacka(7, "C", 1, 2021).url("OSBE01")
+
+        async def nacist(adresa):
+            async with PresmerovanyAsyncFetcher(
+                adresa, retries=10, backoff_factor=0.001
+            ) as fetcher:
+                return [
+                    await parser.load_from_url_async(url, fetcher) for _ in range(5)
+                ]
+
+        with FalesnyInfoSoud(nastaveni=Nastaveni(chybovost=0.5, seed=1)) as server:
+            nactena = asyncio.run(nacist(server.url))
+            self.assertGreater(server.pocitadla[500], 0)
+        self.assertEqual(len(nactena), 5)
+
+    async def test_nahled_rizeni(self):
+        znacka = SpisovaZnacka(7, "C", 1, 2021)
+        uloha = await sync_to_async(Uloha.objects.create)(url=znacka.url("OSBE01"))
+
+        with FalesnyInfoSoud() as server:
+            with mock.patch(
+                "hlidac.views.AsyncFetcher",
+                lambda **kwargs: PresmerovanyAsyncFetcher(server.url, **kwargs),
+            ):
+                response = await self.async_client.get(
+                    reverse("nahled-rizeni", args=[uloha.pk])
+                )
+
+        self.assertContains(response, "7 C 1 / 2021")
+        await sync_to_async(uloha.refresh_from_db)()
+        self.assertEqual(uloha.stav, Uloha.HOTOVO)
+
+    async def test_nahled_rizeni__chyba_parseru(self):
+        uloha = await sync_to_async(Uloha.objects.create)(url=RIZENI_URL)
+        with mock.patch("hlidac.ulohy.fetch_rizeni_async", side_effect=IndexError("x")):
+            response = await self.async_client.get(
+                reverse("nahled-rizeni", args=[uloha.pk])
+            )
+
+        self.assertEqual(response.status_code, 200)
+        await sync_to_async(uloha.refresh_from_db)()
+        self.assertEqual(uloha.stav, Uloha.CHYBA)
+        self.assertIn("IndexError", uloha.chyba)
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from hlidac import archiv, parser
+from hlidac.fetcher import CHYBY_STAHOVANI, AsyncFetcher, Fetcher
+from hlidac.models import Rizeni, Uloha, ulozit_polozky
+from hlidac.refresh import fetch_rizeni, fetch_rizeni_async
+
+# uloha, ktera se tak dlouho zpracovava, patrila nejspis spadlemu workeru
+VYPRSENI = timedelta(minutes=5)
+CHYBA_NACTENI = "Údaje řízení se nepodařilo ze systému InfoSoud načíst"
+
+
+def vyzvednout_ulohu() -> Optional[Uloha]:
+    # uloha se zabere podminenym UPDATE, takze ji nezpracuji dva workery najednou;
+    # nahledy z formulare maji prednost pred ulohami hromadneho importu
+    while True:
+        uloha = (
+            Uloha.objects.filter(
+                Q(stav=Uloha.CEKA)
+                | Q(stav=Uloha.BEZI, zahajeno__lt=timezone.now() - VYPRSENI)
+            )
+            .order_by(F("hromadny_import").asc(nulls_first=True), "vytvoreno")
+            .first()
+        )
+        if uloha is None:
+            return None
+        if zabrat(uloha):
+            return uloha
+
+
+def zabrat(uloha: Uloha) -> bool:
+    zahajeno = timezone.now()
+    zabrano = Uloha.objects.filter(
+        pk=uloha.pk, stav=uloha.stav, zahajeno=uloha.zahajeno
+    ).update(stav=Uloha.BEZI, zahajeno=zahajeno)
+    if zabrano:
+        uloha.stav = Uloha.BEZI
+        uloha.zahajeno = zahajeno
+    return bool(zabrano)
+
+
+def zabrat_cekajici(pk) -> Optional[Uloha]:
+    uloha = Uloha.objects.filter(pk=pk, stav=Uloha.CEKA).first()
+    if uloha and zabrat(uloha):
+        return uloha
+    return None
+
+
+def zpracovat_ulohu(uloha: Uloha, fetcher: Optional[Fetcher] = None):
+    archivace = archiv.Archivace(archiv.aktualni_slovnik())
+    try:
+        rizeni = fetch_rizeni(uloha.url, archivace.fetcher(fetcher))
+    except parser.SpisovaZnackaNeexistujeError as e:
+        _dokoncit(uloha, chyba=str(e))
+    except (requests.RequestException, AssertionError):
+        _dokoncit(uloha, chyba=CHYBA_NACTENI)
+    except Exception as e:
+        # neocekavana stranka (chyba parseru) nesmi shodit worker a nechat
+        # ulohu ve stavu BEZI, kde by ji po vyprseni zkousel znovu
+        _dokoncit(uloha, chyba=f"{CHYBA_NACTENI}: {e!r}")
+    else:
+        _dokoncit(uloha, rizeni)
+    _ulozit(uloha, archivace)
+
+
+async def zpracovat_ulohu_async(uloha: Uloha, fetcher: AsyncFetcher):
+    # pri cekani na system InfoSoud se neblokuje vlakno, do databaze se
+    # zapisuje synchronne
+    archivace = archiv.Archivace(await sync_to_async(archiv.aktualni_slovnik)())
+    try:
+        rizeni = await fetch_rizeni_async(uloha.url, archivace.fetcher(fetcher))
+    except parser.SpisovaZnackaNeexistujeError as e:
+        _dokoncit(uloha, chyba=str(e))
+    except (*CHYBY_STAHOVANI, AssertionError):
+        _dokoncit(uloha, chyba=CHYBA_NACTENI)
+    except Exception as e:
+        # stejne jako v zpracovat_ulohu uloha nesmi zustat ve stavu BEZI
+        _dokoncit(uloha, chyba=f"{CHYBA_NACTENI}: {e!r}")
+    else:
+        _dokoncit(uloha, rizeni)
+    await sync_to_async(_ulozit)(uloha, archivace)
+
+
+def pridat_rizeni(uloha: Uloha, nactene: parser.Rizeni) -> bool:
+    # uloha se spotrebuje podminenym UPDATE ve stejne transakci jako ulozeni
+    # rizeni, opakovane pridani nic neulozi
+    with transaction.atomic():
+        spotrebovano = Uloha.objects.filter(pk=uloha.pk, stav=Uloha.HOTOVO).update(
+            stav=Uloha.PRIDANO
+        )
+        if not spotrebovano:
+            return False
+        rizeni = Rizeni(url=uloha.url)
+        rizeni.aktualizovat(nactene)
+        Rizeni.objects.upsert([rizeni])
+        ulozit_polozky([(rizeni, nactene)])
+    uloha.stav = Uloha.PRIDANO
+    return True
+
+
+def _ulozit(uloha: Uloha, archivace: archiv.Archivace):
+    archivace.ulozit()
+    uloha.save()
+    if uloha.stav == Uloha.HOTOVO and uloha.hromadny_import_id:
+        pridat_rizeni(uloha, uloha.rizeni)
+
+
+def _dokoncit(uloha: Uloha, rizeni: Optional[parser.Rizeni] = None, chyba=""):
+    if rizeni is not None:
+        uloha.stav = Uloha.HOTOVO
+        uloha.vysledek = rizeni.to_dict()
+    else:
+        uloha.stav = Uloha.CHYBA
+        uloha.chyba = chyba
+    uloha.dokonceno = timezone.now()
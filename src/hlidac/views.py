@@ -1,48 +1,220 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
-from django.http import HttpResponseRedirect
-from django.utils.timezone import make_aware
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views import View
 from django.views.generic import FormView, TemplateView
 
-from hlidac.forms import PridatRizeniForm
-from hlidac.models import Rizeni
-from hlidac.parser import SpisovaZnackaNeexistujeError, load_from_url
+from hlidac import export, hledani, metriky
+from hlidac.fazety import fazety
+from hlidac.fetcher import AsyncFetcher, HostRateLimiter, httpx
+from hlidac.forms import FiltrRizeniForm, PridatRizeniForm
+from hlidac.models import Uloha
+from hlidac.statistiky import statistiky_delky
+from hlidac.strankovani import NeplatnyKurzorError, stranka_rizeni
+from hlidac.ulohy import pridat_rizeni, zabrat_cekajici, zpracovat_ulohu_async
 
 
 class IndexView(TemplateView):
     template_name = "hlidac/index.html"
 
 
+class SeznamRizeniMixin:
+    velikost_stranky = 50
+
+    def nacist_stranku(self):
+        # vraci formular filtru, radky a kurzor dalsi stranky
+        form = FiltrRizeniForm(self.request.GET)
+        if not form.is_valid():
+            return form, [], None
+        try:
+            radky, dalsi = stranka_rizeni(
+                form.filtr(),
+                kurzor=form.cleaned_data["kurzor"],
+                velikost=form.cleaned_data["velikost"] or self.velikost_stranky,
+            )
+        except NeplatnyKurzorError as e:
+            form.add_error("kurzor", str(e))
+            return form, [], None
+        return form, radky, dalsi
+
+    def url_dalsi_stranky(self, dalsi):
+        if dalsi is None:
+            return None
+        params = self.request.GET.copy()
+        params["kurzor"] = dalsi
+        return f"{self.request.path}?{params.urlencode()}"
+
+
+class SeznamRizeniView(SeznamRizeniMixin, TemplateView):
+    template_name = "hlidac/seznam-rizeni.html"
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        form, radky, dalsi = self.nacist_stranku()
+        context_data["form"] = form
+        context_data["fazety"] = fazety()
+        context_data["radky"] = [
+            {**radek, "delka": _na_dny(radek["delka"])} for radek in radky
+        ]
+        context_data["dalsi"] = self.url_dalsi_stranky(dalsi)
+        return context_data
+
+
+class RizeniApiView(SeznamRizeniMixin, View):
+    def get(self, request):
+        form, radky, dalsi = self.nacist_stranku()
+        if form.errors:
+            return JsonResponse({"chyba": form.errors}, status=400)
+        return JsonResponse(
+            {
+                "rizeni": [
+                    {klic: _na_dny(hodnota) for klic, hodnota in radek.items()}
+                    for radek in radky
+                ],
+                "dalsi": self.url_dalsi_stranky(dalsi),
+            }
+        )
+
+
 class PridatRizeniView(FormView):
     form_class = PridatRizeniForm
     template_name = "hlidac/pridat-rizeni.html"
     success_url = "/"
 
     def form_valid(self, form):
-        url = form.cleaned_data["url"]
-        try:
-            rizeni = load_from_url(url)
-            rizeni.set_predmet_rizeni()
-        except SpisovaZnackaNeexistujeError as e:
-            form.add_error("url", str(e))
-            return self.form_invalid(form)
-
-        if "verified" not in self.request.POST:
-            context_data = self.get_context_data(form=form)
-            context_data["rizeni"] = rizeni
-            return self.render_to_response(context_data)
-
-        if rizeni.skonceni:
-            datum_skonceni = rizeni.skonceni.datum
+        uloha = Uloha.objects.create(url=form.cleaned_data["url"])
+        return HttpResponseRedirect(reverse("nahled-rizeni", args=[uloha.pk]))
+
+
+class NahledRizeniView(PridatRizeniView):
+    def dispatch(self, request, *args, **kwargs):
+        self.uloha = get_object_or_404(Uloha, pk=kwargs["pk"])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_initial(self):
+        return {"url": self.uloha.url}
+
+    def get_context_data(self, **kwargs):
+        context_data = super().get_context_data(**kwargs)
+        context_data["uloha"] = self.uloha
+        context_data["rizeni"] = self.uloha.rizeni
+        return context_data
+
+    def post(self, request, *args, **kwargs):
+        if "verified" in request.POST and self.uloha.stav in (
+            Uloha.HOTOVO,
+            Uloha.PRIDANO,
+        ):
+            return self.pridat_rizeni()
+        return super().post(request, *args, **kwargs)
+
+    def pridat_rizeni(self):
+        rizeni = self.uloha.rizeni
+        if pridat_rizeni(self.uloha, rizeni):
+            zprava = f"Řízení {rizeni.spisova_znacka} bylo přidáno"
         else:
-            datum_skonceni = None
-
-        Rizeni.objects.create(
-            url=url,
-            spisova_znacka=rizeni.spisova_znacka,
-            predmet=rizeni.predmet_rizeni,
-            zmena_ve_spisu=make_aware(rizeni.posledni_zmena),
-            datum_zahajeni=rizeni.zahajeni.datum,
-            datum_skonceni=datum_skonceni,
-        )
-        messages.info(self.request, f"Řízení {rizeni.spisova_znacka} bylo přidáno")
+            zprava = f"Řízení {rizeni.spisova_znacka} už bylo přidáno"
+        messages.info(self.request, zprava)
         return HttpResponseRedirect(self.get_success_url())
+
+
+# nahledy z ruznych pozadavku sdileji omezeni rychlosti vuci systemu
+# InfoSoud, vychozi rychlost je stejna jako u zpracovat_ulohy
+NAHLED_RATE_LIMITER = HostRateLimiter(5.0)
+
+
+async def nahled_rizeni(request, pk):
+    # pod ASGI se cekajici uloha zpracuje rovnou a pri cekani na system
+    # InfoSoud se neblokuje vlakno, pod WSGI ji zpracuje zpracovat_ulohy;
+    # Django 3.2 umi asynchronni jen funkce, formular zustava v NahledRizeniView
+    if request.method == "GET" and isinstance(request, ASGIRequest) and httpx:
+        uloha = await sync_to_async(zabrat_cekajici)(pk)
+        if uloha:
+            async with AsyncFetcher(rate_limiter=NAHLED_RATE_LIMITER) as fetcher:
+                await zpracovat_ulohu_async(uloha, fetcher)
+    return await sync_to_async(NahledRizeniView.as_view())(request, pk=pk)
+
+
+class StatistikyView(View):
+    def get(self, request):
+        try:
+            statistiky = statistiky_delky(
+                podle=request.GET.getlist("podle") or ["soud"]
+            )
+        except ValueError as e:
+            return JsonResponse({"chyba": str(e)}, status=400)
+        return JsonResponse(
+            {
+                "statistiky": [
+                    {klic: _na_dny(hodnota) for klic, hodnota in radek.items()}
+                    for radek in statistiky
+                ]
+            }
+        )
+
+
+class HledaniApiView(View):
+    # rizeni serazena podle shody dotazu s nazvem soudu nebo predmetu
+    def get(self, request):
+        dotaz = request.GET.get("q", "")
+        try:
+            limit = min(max(int(request.GET.get("limit", 50)), 1), 500)
+        except ValueError:
+            return JsonResponse({"chyba": {"limit": ["Neplatný počet"]}}, status=400)
+        return JsonResponse(
+            {
+                "shody": [
+                    {"pole": s.pole, "nazev": s.nazev, "skore": s.skore}
+                    for s in hledani.najit(dotaz)
+                ],
+                "rizeni": [
+                    {klic: _na_dny(hodnota) for klic, hodnota in radek.items()}
+                    for radek in hledani.hledat(dotaz, limit)
+                ],
+            }
+        )
+
+
+class ExportView(View):
+    # export se streamuje po davkach, filtruje se stejne jako seznam rizeni
+    def get(self, request, dataset, format):
+        if dataset not in export.DATASETY or format not in export.TYPY_OBSAHU:
+            raise Http404("Neznámý export")
+        if format == export.FORMAT_PARQUET and export.pyarrow is None:
+            raise Http404("Formát Parquet není dostupný")
+        form = FiltrRizeniForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"chyba": form.errors}, status=400)
+        response = StreamingHttpResponse(
+            export.exportovat(dataset, format, form.filtr()),
+            content_type=export.TYPY_OBSAHU[format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{format}"'
+        return response
+
+
+class MetrikyView(View):
+    # metriky weboveho procesu, prikazy je ukladaji do souboru pres --metriky
+    def get(self, request):
+        if not metriky.zapnuto:
+            raise Http404("Metriky nejsou zapnuté")
+        return HttpResponse(
+            metriky.prometheus(), content_type="text/plain; version=0.0.4"
+        )
+
+
+def _na_dny(hodnota):
+    if isinstance(hodnota, timedelta):
+        return hodnota / timedelta(days=1)
+    return hodnota
@@ -0,0 +1,149 @@
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+from urllib.parse import urlsplit
+
+import requests
+from django.utils import timezone
+
+from hlidac.fetcher import Fetcher, HostRateLimiter
+from hlidac.hromadny_import import CHYBA, PRIDANO, importovat, nacist_radky
+from hlidac.models import Rizeni, Snimek, StazenaStranka, zneplatnit_fazety
+from hlidac.parser import INFOSOUD_URL
+from hlidac.refresh import refresh_all
+from hlidac.spisova_znacka import SpisovaZnacka
+
+# rizeni zatezoveho testu patri vymyslenemu soudu, ktery system InfoSoud
+# nezna, takze se adresy jeho stranek nepotkaji se skutecnymi rizenimi;
+# smazou se jen rizeni zalozena behem testu
+SENAT = 999
+ORG = "ZATEZ"
+
+INFOSOUD_ZAKLAD = "{0.scheme}://{0.netloc}".format(urlsplit(INFOSOUD_URL))
+
+FAZE_IMPORT = "import"
+FAZE_OBNOVENI = "obnovení"
+
+
+class PresmerovanyFetcher(Fetcher):
+    # rizeni se ukladaji s adresami systemu InfoSoud, pozadavky se ale
+    # posilaji na nahradni server; meri se doba kazdeho pozadavku vcetne
+    # opakovani
+    def __init__(self, adresa: str, **kwargs):
+        super().__init__(**kwargs)
+        self.adresa = adresa.rstrip("/")
+        self.casy: List[float] = []
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs) -> requests.Response:
+        url = url.replace(INFOSOUD_ZAKLAD, self.adresa, 1)
+        start = time.perf_counter()
+        try:
+            return super().get(url, **kwargs)
+        finally:
+            with self._lock:
+                self.casy.append(time.perf_counter() - start)
+
+
+@dataclass
+class VysledekZateze:
+    faze: str
+    rizeni: int
+    chyby: int
+    sekundy: float
+    casy: List[float]
+
+    @property
+    def za_sekundu(self):
+        return self.rizeni / self.sekundy if self.sekundy else 0.0
+
+    @property
+    def pozadavky(self):
+        return len(self.casy)
+
+    def percentil(self, podil) -> float:
+        if not self.casy:
+            return 0.0
+        casy = sorted(self.casy)
+        return casy[max(math.ceil(podil * len(casy)) - 1, 0)]
+
+
+def zatezovy_test(
+    adresa: str,
+    pocet=100,
+    max_workers=8,
+    requests_per_second=0.0,
+    opakovani=1,
+    ponechat=False,
+) -> List[VysledekZateze]:
+    # importuje pocet rizeni z nahradniho serveru a pak je opakovane obnovi,
+    # obe cesty bezi stejne jako v provozu vcetne zapisu do databaze
+    vysledky = []
+    zacatek = timezone.now()
+    zalozena = []
+    try:
+        radky = nacist_radky(
+            f"{SpisovaZnacka(SENAT, 'C', cislo, 2020)},{ORG}"
+            for cislo in range(1, pocet + 1)
+        )
+        fetcher = _fetcher(adresa, max_workers, requests_per_second)
+        start = time.perf_counter()
+        importovat(radky, max_workers, fetcher=fetcher)
+        zalozena = list(
+            Rizeni.objects.filter(
+                url__in=[radek.url for radek in radky if radek.stav == PRIDANO]
+            ).values_list("pk", flat=True)
+        )
+        vysledky.append(
+            VysledekZateze(
+                FAZE_IMPORT,
+                rizeni=sum(1 for radek in radky if radek.stav == PRIDANO),
+                chyby=sum(1 for radek in radky if radek.stav == CHYBA),
+                sekundy=time.perf_counter() - start,
+                casy=fetcher.casy,
+            )
+        )
+
+        for _ in range(opakovani):
+            fetcher = _fetcher(adresa, max_workers, requests_per_second)
+            start = time.perf_counter()
+            results = list(
+                refresh_all(
+                    Rizeni.objects.filter(pk__in=zalozena),
+                    max_workers=max_workers,
+                    fetcher=fetcher,
+                )
+            )
+            vysledky.append(
+                VysledekZateze(
+                    FAZE_OBNOVENI,
+                    rizeni=len(results),
+                    chyby=sum(1 for result in results if result.error),
+                    sekundy=time.perf_counter() - start,
+                    casy=fetcher.casy,
+                )
+            )
+    finally:
+        if not ponechat:
+            smazat_rizeni(zalozena, zacatek)
+    return vysledky
+
+
+def _fetcher(adresa, max_workers, requests_per_second) -> PresmerovanyFetcher:
+    return PresmerovanyFetcher(
+        adresa,
+        pool_maxsize=max_workers,
+        rate_limiter=HostRateLimiter(requests_per_second),
+    )
+
+
+def smazat_rizeni(zalozena, zacatek):
+    # stazene stranky nemaji na rizeni cizi klic, mazou se stranky
+    # vymysleneho soudu podle adresy; snimky z doby testu, na ktere uz zadna
+    # stranka neodkazuje, jsou starsi verze stranek testu
+    StazenaStranka.objects.filter(url__contains=f"org={ORG}&").delete()
+    Snimek.objects.filter(vytvoreno__gte=zacatek, stazenastranka__isnull=True).delete()
+    Rizeni.objects.filter(pk__in=zalozena).delete()
+    zneplatnit_fazety()
@@ -0,0 +1,79 @@
+from collections import defaultdict
+from typing import Iterable, List, Tuple
+
+from hlidac import models, parser
+
+# udalosti, o kterych se posila samostatny druh zmeny
+DRUHY_UDALOSTI = {
+    parser.DRUH_SKONCENI: models.Zmena.SKONCENI,
+    parser.DRUH_ODVOLANI: models.Zmena.ODVOLANI,
+}
+
+
+def najit_zmeny(
+    dvojice: Iterable[Tuple[models.Rizeni, parser.Rizeni]],
+) -> List[models.Zmena]:
+    # porovnava nactena rizeni s ulozenym stavem pred jeho aktualizaci,
+    # udalosti a dilci rizeni se paruji podle klicu, takze se z databaze
+    # nacitaji jen klice a ne cele zaznamy
+    dvojice = [(rizeni, nactene) for rizeni, nactene in dvojice if rizeni.pk]
+    ulozene = [rizeni for rizeni, _ in dvojice]
+    udalosti = defaultdict(set)
+    for rizeni_id, druh, poradi in models.Udalost.objects.filter(
+        rizeni__in=ulozene
+    ).values_list("rizeni_id", "druh", "poradi"):
+        udalosti[rizeni_id].add((druh, poradi))
+    dilci_rizeni = defaultdict(set)
+    for rizeni_id, spisova_znacka in models.DilciRizeni.objects.filter(
+        rizeni__in=ulozene
+    ).values_list("rizeni_id", "spisova_znacka"):
+        dilci_rizeni[rizeni_id].add(spisova_znacka)
+
+    zmeny = []
+    for rizeni, nactene in dvojice:
+        if rizeni.stav and rizeni.stav != nactene.stav_rizeni:
+            zmeny.append(
+                models.Zmena(
+                    rizeni=rizeni,
+                    druh=models.Zmena.ZMENA_STAVU,
+                    popis=f"Stav řízení: {nactene.stav_rizeni}",
+                    data={"puvodni": rizeni.stav, "novy": nactene.stav_rizeni},
+                )
+            )
+        # rizeni bez ulozenych udalosti jeste nebylo synchronizovano, vsechny
+        # jeho udalosti by se jinak hlasily jako nove
+        if not udalosti[rizeni.pk]:
+            continue
+        for udalost in nactene.udalosti:
+            if udalost.poradi is None:
+                continue
+            if (udalost.druh, udalost.poradi) in udalosti[rizeni.pk]:
+                continue
+            zmeny.append(
+                models.Zmena(
+                    rizeni=rizeni,
+                    druh=DRUHY_UDALOSTI.get(udalost.druh, models.Zmena.NOVA_UDALOST),
+                    popis=f"{udalost.nazev} ({udalost.datum:%d.%m.%Y})",
+                    data={
+                        "druh": udalost.druh,
+                        "poradi": udalost.poradi,
+                        "datum": udalost.datum.isoformat(),
+                        "url": udalost.absolute_url,
+                    },
+                )
+            )
+        for dilci in nactene.dilci_rizeni:
+            if dilci.spisova_znacka in dilci_rizeni[rizeni.pk]:
+                continue
+            zmeny.append(
+                models.Zmena(
+                    rizeni=rizeni,
+                    druh=models.Zmena.NOVE_DILCI_RIZENI,
+                    popis=f"Dílčí řízení {dilci.spisova_znacka}",
+                    data={
+                        "spisova_znacka": dilci.spisova_znacka,
+                        "url": dilci.absolute_url if dilci.url else "",
+                    },
+                )
+            )
+    return zmeny
@@ -1,11 +1,28 @@
 from django.contrib import admin
 from django.urls import path
 
-from hlidac.views import IndexView, PridatRizeniView
+from hlidac.views import (
+    ExportView,
+    HledaniApiView,
+    IndexView,
+    MetrikyView,
+    PridatRizeniView,
+    RizeniApiView,
+    SeznamRizeniView,
+    StatistikyView,
+    nahled_rizeni,
+)
 
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", IndexView.as_view(), name="index"),
     path("pridat-rizeni", PridatRizeniView.as_view(), name="pridat-rizeni"),
+    path("pridat-rizeni/<int:pk>", nahled_rizeni, name="nahled-rizeni"),
+    path("statistiky", StatistikyView.as_view(), name="statistiky"),
+    path("rizeni", SeznamRizeniView.as_view(), name="seznam-rizeni"),
+    path("api/rizeni", RizeniApiView.as_view(), name="api-rizeni"),
+    path("api/hledani", HledaniApiView.as_view(), name="api-hledani"),
+    path("export/<slug:dataset>.<slug:format>", ExportView.as_view(), name="export"),
+    path("metrics", MetrikyView.as_view(), name="metriky"),
 ]